@@ -1,79 +1,82 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import auth, product, stock, transaction, purchase_order, report
+from app.database import engine
+from app.routers import auth, user, product, stock, transaction, purchase_order, report
 from app.routers import return_, supplier
-from app.routers import alert
-from fastapi.responses import JSONResponse
-from bson import ObjectId
-import sqlalchemy
-import contextlib
-from app.routers import xml_export
+from app.routers import alert, replenishment, forecast, stock_policy
+from app.utils.responses import FastJSONResponse
+from app.utils.hashing import shutdown_hash_pool
+from app.utils.stock_ledger import run_snapshot_loop, STOCK_SNAPSHOT_INTERVAL_SECONDS
+from app.utils.schema import check_schema_revision
+from app.utils.idempotency import IdempotencyMiddleware, run_prune_loop, IDEMPOTENCY_PRUNE_INTERVAL_SECONDS
+from app.utils.forecasting import run_forecast_loop, FORECAST_INTERVAL_SECONDS
+from app.utils.stock_policies import run_policy_loop, STOCK_POLICY_INTERVAL_SECONDS
+from app.mongodb import database as mongodb
+import asyncio
+import os
 
 
-app = FastAPI()
+# Set to 0 to leave out the XML import/export routes (and their parsers) on workers that don't serve them
+XML_ENABLED = os.getenv("XML_ENABLED", "1") == "1"
+
+# orjson-backed responses; ObjectIds, Decimals and SQL rows are encoded without an extra copy
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# Schema changes are Alembic migrations (migrations/), applied once with `alembic upgrade head`
+@app.on_event("startup")
+def check_schema():
+    check_schema_revision(engine)
+
+@app.on_event("startup")
+async def start_stock_ledger():
+    if STOCK_SNAPSHOT_INTERVAL_SECONDS > 0:
+        app.state.snapshot_task = asyncio.create_task(run_snapshot_loop())
 
-# Create tables before the app starts
 @app.on_event("startup")
-def create_tables():
-    # Create tables that don't exist yet
-    Base.metadata.create_all(bind=engine)
-    
-    # For debugging, print the tables that were created
-    inspector = sqlalchemy.inspect(engine)
-    tables = inspector.get_table_names()
-    print(f"Database tables: {tables}")
-    
-    # Explicitly check and create stock_alerts if needed
-    with contextlib.closing(engine.connect()) as conn:
-        # Use MySQL syntax (AUTO_INCREMENT instead of AUTOINCREMENT)
-        conn.execute(sqlalchemy.text("""
-            CREATE TABLE IF NOT EXISTS stock_alerts (
-                alert_id INT AUTO_INCREMENT PRIMARY KEY,
-                product_id INT NOT NULL,
-                warehouse_id INT NOT NULL, 
-                current_quantity INT NOT NULL,
-                threshold INT NOT NULL,
-                alert_type VARCHAR(50) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_resolved BOOLEAN DEFAULT FALSE,
-                resolved_at TIMESTAMP NULL,
-                FOREIGN KEY (product_id) REFERENCES products(product_id),
-                FOREIGN KEY (warehouse_id) REFERENCES warehouses(warehouse_id)
-            )
-        """))
-        conn.commit()
-        
-        # Check if stock_alerts exists in the table list
-        has_table = "stock_alerts" in inspector.get_table_names()
-        
-        if has_table:
-            print("stock_alerts table exists")
-        else:
-            print("WARNING: Failed to create stock_alerts table")
-
-# Add this custom JSON response class for handling MongoDB ObjectId
-class CustomJSONResponse(JSONResponse):
-    def render(self, content):
-        def convert_objectid(obj):
-            if isinstance(obj, ObjectId):
-                return str(obj)
-            elif isinstance(obj, dict):
-                return {key: convert_objectid(value) for key, value in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_objectid(item) for item in obj]
-            return obj
-            
-        return super().render(convert_objectid(content))
-
-# Use the custom response class as default
-app.default_response_class = CustomJSONResponse
+async def start_idempotency_pruning():
+    if IDEMPOTENCY_PRUNE_INTERVAL_SECONDS > 0:
+        app.state.idempotency_prune_task = asyncio.create_task(run_prune_loop())
+
+@app.on_event("startup")
+async def start_demand_forecasting():
+    if FORECAST_INTERVAL_SECONDS > 0:
+        app.state.forecast_task = asyncio.create_task(run_forecast_loop())
+
+@app.on_event("startup")
+async def start_stock_policy_job():
+    if STOCK_POLICY_INTERVAL_SECONDS > 0:
+        app.state.stock_policy_task = asyncio.create_task(run_policy_loop())
+
+@app.on_event("shutdown")
+def stop_hash_pool():
+    shutdown_hash_pool()
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    for name in ("snapshot_task", "idempotency_prune_task", "forecast_task", "stock_policy_task",
+                 "mongo_index_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
 
 origins = [
     "http://localhost:5173",   # ✅ React dev server
     "http://127.0.0.1:5173"    # ✅ Some systems use 127.0.0.1 instead of localhost
 ]
 
+# Retries of stock-mutating requests that carry an Idempotency-Key replay the first response.
+# Added before CORS so replayed responses still get CORS headers.
+app.add_middleware(
+    IdempotencyMiddleware,
+    paths=[
+        r"/transactions/",
+        r"/transactions/transfer",
+        r"/returns/",
+        r"/purchase-orders/receive",
+        r"/purchase-orders/\d+/receive",
+    ]
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,        # 👈 Must match frontend exactly
@@ -88,6 +91,7 @@ def root():
 
 # ✅ Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
+app.include_router(user.router)  # Router already has prefix="/users"
 app.include_router(product.router, prefix="/products", tags=["Products"])
 app.include_router(stock.router, prefix="/stock", tags=["Stock"])
 app.include_router(transaction.router, prefix="/transactions", tags=["Transactions"])
@@ -96,37 +100,40 @@ app.include_router(report.router, prefix="/reports", tags=["Reports"])
 app.include_router(return_.router, prefix="/returns", tags=["Returns"])
 app.include_router(supplier.router)  # Router already has prefix="/suppliers"
 app.include_router(alert.router, prefix="/alerts", tags=["Alerts"])
-app.include_router(xml_export.router)
-
-# Conditionally load MongoDB-related components
-try:
-    # Import MongoDB components
-    from app.mongodb.database import db
-    
-    # Only register MongoDB-related routes if connection is successful
-    if db is not None:
+app.include_router(replenishment.router)  # Router already has prefix="/replenishment"
+app.include_router(forecast.router)  # Router already has prefix="/forecasts"
+app.include_router(stock_policy.router)  # Router already has prefix="/stock-policies"
+
+if XML_ENABLED:
+    from app.routers import xml_export
+    app.include_router(xml_export.router)
+
+# MongoDB-backed category routes. The client is created at startup rather than at import,
+# and index creation runs in the background so an unreachable server can't hold up startup.
+if mongodb.MONGO_ENABLED:
+    from app.routers import categories
+    app.include_router(categories.router)
+
+    async def create_mongo_indexes(db):
         try:
-            # Import the categories router
-            from app.routers import categories
-            app.include_router(categories.router)
-            print("Category routes registered successfully")
-            
-            # Set up indexes if DB connection is available
-            @app.on_event("startup")
-            async def startup_db_client():
-                try:
-                    # Create indexes for better query performance
-                    await db.categories.create_index("code", unique=True)
-                    await db.categories.create_index("parent_id")
-                    await db.categories.create_index("level")
-                    await db.categories.create_index("path")
-                    print("MongoDB indexes created successfully")
-                except Exception as e:
-                    print(f"Error creating MongoDB indexes: {e}")
-                    # App will continue without indexes
-        except ImportError as e:
-            print(f"Could not import categories router: {e}")
-    else:
-        print("MongoDB connection not available, skipping category routes")
-except ImportError:
-    print("MongoDB support not configured, running with SQL database only")
\ No newline at end of file
+            # Create indexes for better query performance
+            await db.categories.create_index("code", unique=True)
+            await db.categories.create_index("parent_id")
+            await db.categories.create_index("level")
+            await db.categories.create_index("path")
+        except Exception as e:
+            print(f"Error creating MongoDB indexes: {e}")
+            # App will continue without indexes
+
+    @app.on_event("startup")
+    async def connect_mongodb():
+        try:
+            db = mongodb.connect()
+        except Exception as e:
+            print(f"Error connecting to MongoDB: {e}")
+            return
+        app.state.mongo_index_task = asyncio.create_task(create_mongo_indexes(db))
+
+    @app.on_event("shutdown")
+    def close_mongodb():
+        mongodb.close()
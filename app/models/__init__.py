@@ -5,3 +5,10 @@ from .warehouse import Warehouse
 from .product import Product
 from .stock import Stock
 from .transaction import Transaction
+from .category_threshold import CategoryThreshold
+from .stock_ledger import StockLedger, StockSnapshot
+from .idempotency_key import IdempotencyKey
+from .demand_forecast import DemandForecast
+from .stock_policy import StockPolicy, StockPolicyChange
+from .supplier_performance import SupplierPerformance
+from .revoked_token import RevokedToken
@@ -1,9 +1,15 @@
 # app/models/alert.py
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index, func
 from app.database import Base
 
 class StockAlert(Base):
     __tablename__ = "stock_alerts"
+    __table_args__ = (
+        # Open-alert lookups, counts and auto-resolve in check_stock_levels and /stats
+        Index("ix_stock_alerts_open", "is_resolved", "alert_type", "product_id", "warehouse_id"),
+        # Alert list, newest first
+        Index("ix_stock_alerts_resolved_created_at", "is_resolved", "created_at"),
+    )
     
     alert_id = Column(Integer, primary_key=True, autoincrement=True)
     product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
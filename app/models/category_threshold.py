@@ -0,0 +1,13 @@
+# app/models/category_threshold.py
+from sqlalchemy import Column, Integer, String, DateTime, func
+from app.database import Base
+
+class CategoryThreshold(Base):
+    """SQL mirror of the MongoDB category thresholds, resolved down the hierarchy"""
+    __tablename__ = "category_thresholds"
+
+    category_code = Column(String(50), primary_key=True)
+    min_stock_threshold = Column(Integer, nullable=True)
+    reorder_level = Column(Integer, nullable=True)
+    version = Column(Integer, nullable=False, default=0)
+    synced_at = Column(DateTime, default=func.now(), nullable=False)
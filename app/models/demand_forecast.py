@@ -0,0 +1,22 @@
+# app/models/demand_forecast.py
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from app.database import Base
+
+class DemandForecast(Base):
+    """
+    Fitted daily demand model for one (product, warehouse). Holds the smoothing state, so
+    newly closed days are folded in without refitting the history.
+    """
+    __tablename__ = "demand_forecasts"
+
+    product_id = Column(Integer, primary_key=True, autoincrement=False)
+    warehouse_id = Column(Integer, primary_key=True, autoincrement=False)
+    model = Column(String(10), nullable=False)  # ses, croston
+    alpha = Column(Float, nullable=False)
+    level = Column(Float, nullable=False)  # smoothed demand (ses) or demand size (croston)
+    demand_interval = Column(Float, nullable=False)  # smoothed days between demands (croston), 1 for ses
+    days_since_demand = Column(Integer, nullable=False)
+    forecast = Column(Float, nullable=False)  # expected units per day
+    error_variance = Column(Float, nullable=False)  # of one-day-ahead forecast errors
+    fitted_through = Column(Date, nullable=False)  # last closed day folded in
+    fitted_at = Column(DateTime, nullable=False)  # last full fit, which picks alpha and the model
@@ -0,0 +1,19 @@
+# app/models/idempotency_key.py
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, Index
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """Stored outcome of a request made with an Idempotency-Key header"""
+    __tablename__ = "idempotency_keys"
+
+    key_hash = Column(String(32), primary_key=True)  # digest of method, path, caller and the client's key
+    request_hash = Column(String(32), nullable=False)  # digest of the request body
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is still running
+    content_type = Column(String(100), nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    reserved_until = Column(DateTime, nullable=True)  # a running request's lease; past it, a retry takes over
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
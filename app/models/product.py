@@ -5,7 +5,7 @@ from app.database import Base
 class Product(Base):
     __tablename__ = "products"
 
-    product_id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     sku = Column(String(50), unique=True, nullable=False)
     description = Column(Text)
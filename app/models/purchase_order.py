@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class PurchaseOrder(Base):
     __tablename__ = "purchase_orders"
-    po_id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        # Listing and reporting by status over order dates, newest first
+        Index("ix_purchase_orders_status_order_date", "status", "order_date"),
+    )
+    po_id = Column(Integer, primary_key=True)
     supplier_id = Column(Integer, ForeignKey("suppliers.supplier_id"))
     ordered_by = Column(Integer, ForeignKey("users.user_id"))
     status = Column(String(20), default="pending")
@@ -14,9 +18,25 @@ class PurchaseOrder(Base):
 
 class PurchaseOrderItem(Base):
     __tablename__ = "purchase_order_items"
-    po_item_id = Column(Integer, primary_key=True, index=True)
-    po_id = Column(Integer, ForeignKey("purchase_orders.po_id"))
+    po_item_id = Column(Integer, primary_key=True)
+    po_id = Column(Integer, ForeignKey("purchase_orders.po_id"), index=True)
     product_id = Column(Integer, ForeignKey("products.product_id"))
     quantity = Column(Integer)
     unit_cost = Column(Integer)
     warehouse_id = Column(Integer, ForeignKey("warehouses.warehouse_id"))
+    received_quantity = Column(Integer, nullable=False, default=0, server_default="0")  # received to date
+
+class POStatusHistory(Base):
+    """One row per status transition, written by the application in the same transaction"""
+    __tablename__ = "po_status_history"
+    __table_args__ = (
+        # History of one PO in order, for the paginated history endpoint
+        Index("ix_po_status_history_po_id_history_id", "po_id", "history_id"),
+    )
+    history_id = Column(Integer, primary_key=True, autoincrement=True)
+    po_id = Column(Integer, ForeignKey("purchase_orders.po_id"), nullable=False)
+    old_status = Column(String(20))  # NULL for the row written when the PO is created
+    new_status = Column(String(20), nullable=False)
+    changed_by = Column(Integer, ForeignKey("users.user_id"))
+    changed_at = Column(DateTime, server_default=func.now())
+    notes = Column(Text)
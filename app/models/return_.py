@@ -1,11 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 class Return(Base):
     __tablename__ = "returns"
+    __table_args__ = (
+        Index("ix_returns_product_id", "product_id"),
+    )
 
-    return_id = Column(Integer, primary_key=True, index=True)
+    return_id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey("products.product_id"))
     warehouse_id = Column(Integer, ForeignKey("warehouses.warehouse_id"))
     return_type = Column(String(20))
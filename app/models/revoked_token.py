@@ -0,0 +1,14 @@
+# app/models/revoked_token.py
+from sqlalchemy import Column, String, DateTime, Index
+from app.database import Base
+
+class RevokedToken(Base):
+    """Access tokens logged out before they expire, shared by every worker"""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime, nullable=False)  # when the token would have expired anyway
+
+    __table_args__ = (
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
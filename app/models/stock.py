@@ -1,16 +1,17 @@
 # app/models/stock.py
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
 from app.database import Base
 
 class Stock(Base):
     __tablename__ = "stock"
 
-    stock_id = Column(Integer, primary_key=True, index=True)
+    stock_id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
     warehouse_id = Column(Integer, ForeignKey("warehouses.warehouse_id"), nullable=False)
     quantity = Column(Integer, nullable=False, default=0)
 
     __table_args__ = (
-        # Ensure one product per warehouse
+        # Ensure one product per warehouse; receipts upsert against this index
+        UniqueConstraint("product_id", "warehouse_id", name="product_id"),
         {'sqlite_autoincrement': True},  # optional, MySQL will still work
     )
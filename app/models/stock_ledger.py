@@ -0,0 +1,38 @@
+# app/models/stock_ledger.py
+from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class StockLedger(Base):
+    """Append-only record of every stock movement; the stock table is its running total"""
+    __tablename__ = "stock_ledger"
+
+    entry_id = Column(Integer, primary_key=True, autoincrement=True)
+    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.warehouse_id"), nullable=False)
+    delta = Column(Integer, nullable=False)
+    source = Column(String(20), nullable=False)  # opening, transaction, transfer, return, receipt, adjust
+    reference_id = Column(Integer, nullable=True)  # id of the transaction/return/PO that caused it
+    created_by = Column(Integer, ForeignKey("users.user_id"), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Covers point-in-time queries: per-key range from a snapshot's entry id, filtered
+        # on created_at and summed over delta without touching the table rows
+        Index("ix_stock_ledger_covering", "product_id", "warehouse_id", "entry_id", "created_at", "delta"),
+    )
+
+class StockSnapshot(Base):
+    """Balance of one (product, warehouse) covering every ledger entry up to last_entry_id"""
+    __tablename__ = "stock_snapshots"
+
+    snapshot_id = Column(Integer, primary_key=True, autoincrement=True)
+    product_id = Column(Integer, nullable=False)
+    warehouse_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    last_entry_id = Column(Integer, nullable=False)
+    as_of = Column(TIMESTAMP(timezone=True), nullable=False)  # created_at of the newest covered entry
+
+    __table_args__ = (
+        Index("ix_stock_snapshots_key_as_of", "product_id", "warehouse_id", "as_of"),
+    )
@@ -0,0 +1,34 @@
+# app/models/stock_policy.py
+from sqlalchemy import Column, Integer, Float, DateTime, Index
+from app.database import Base
+
+class StockPolicy(Base):
+    """Calculated safety stock and reorder point for one (product, warehouse)"""
+    __tablename__ = "stock_policies"
+
+    product_id = Column(Integer, primary_key=True, autoincrement=False)
+    warehouse_id = Column(Integer, primary_key=True, autoincrement=False)
+    safety_stock = Column(Integer, nullable=False)
+    reorder_point = Column(Integer, nullable=False)
+    demand_per_day = Column(Float, nullable=False)
+    demand_std = Column(Float, nullable=False)  # of daily demand
+    lead_time_days = Column(Float, nullable=False)
+    lead_time_std = Column(Float, nullable=False)
+    calculated_at = Column(DateTime, nullable=False)
+
+class StockPolicyChange(Base):
+    """Before and after values of a policy the recalculation job changed"""
+    __tablename__ = "stock_policy_changes"
+
+    change_id = Column(Integer, primary_key=True, autoincrement=True)
+    product_id = Column(Integer, nullable=False)
+    warehouse_id = Column(Integer, nullable=False)
+    old_safety_stock = Column(Integer, nullable=True)  # NULL for a pair's first policy
+    new_safety_stock = Column(Integer, nullable=False)
+    old_reorder_point = Column(Integer, nullable=True)
+    new_reorder_point = Column(Integer, nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_policy_changes_key_changed_at", "product_id", "warehouse_id", "changed_at"),
+    )
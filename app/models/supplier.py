@@ -5,7 +5,7 @@ from app.database import Base
 class Supplier(Base):
     __tablename__ = "suppliers"
 
-    supplier_id = Column(Integer, primary_key=True, index=True)
+    supplier_id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     contact_name = Column(String(100))
     email = Column(String(100))
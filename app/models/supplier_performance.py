@@ -0,0 +1,30 @@
+# app/models/supplier_performance.py
+from sqlalchemy import Column, Integer, Numeric, DateTime, func
+from app.database import Base
+
+class SupplierPerformance(Base):
+    """
+    Running totals per supplier over its closed (received or cancelled) purchase orders.
+    Every column is a sum, so a PO is folded in once when it closes instead of the
+    metrics being recomputed from all history.
+    """
+    __tablename__ = "supplier_performance"
+
+    supplier_id = Column(Integer, primary_key=True, autoincrement=False)
+    orders_received = Column(Integer, nullable=False, default=0)
+    orders_cancelled = Column(Integer, nullable=False, default=0)
+    due_orders = Column(Integer, nullable=False, default=0)  # received POs that had an expected_delivery
+    on_time_orders = Column(Integer, nullable=False, default=0)  # ... and arrived by it
+    lead_time_orders = Column(Integer, nullable=False, default=0)  # received POs with a known receipt date
+    lead_time_days_sum = Column(Integer, nullable=False, default=0)
+    lead_time_days_sq_sum = Column(Integer, nullable=False, default=0)
+    # Lead time distribution: order_date to receipt, in days
+    lead_le_7 = Column(Integer, nullable=False, default=0)
+    lead_le_14 = Column(Integer, nullable=False, default=0)
+    lead_le_30 = Column(Integer, nullable=False, default=0)
+    lead_gt_30 = Column(Integer, nullable=False, default=0)
+    quantity_ordered = Column(Integer, nullable=False, default=0)  # on POs that received anything
+    quantity_received = Column(Integer, nullable=False, default=0)
+    standard_cost = Column(Numeric(14, 2), nullable=False, default=0)  # received quantity at catalogue cost
+    cost_variance = Column(Numeric(14, 2), nullable=False, default=0)  # paid above catalogue cost
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
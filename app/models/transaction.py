@@ -1,12 +1,18 @@
 # app/models/transaction.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Product movement over a date range; covers the columns it sums
+        Index("ix_transactions_product_id_created_at", "product_id", "created_at", "transaction_type", "quantity"),
+        # Newest-first listing and the outbound windows read by forecasting and replenishment
+        Index("ix_transactions_created_at", "created_at", "transaction_type", "product_id", "warehouse_id", "quantity"),
+    )
 
-    transaction_id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
     warehouse_id = Column(Integer, ForeignKey("warehouses.warehouse_id"), nullable=False)
     transaction_type = Column(String(20), nullable=False)
@@ -4,6 +4,7 @@ from app.database import Base
 class User(Base):
     __tablename__ = "users"
 
-    user_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, primary_key=True)
     username = Column(String(50), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
+    role_id = Column(Integer, nullable=True)  # 1 = admin, 2 = staff (see app/utils/permissions.py)
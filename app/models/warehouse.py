@@ -5,6 +5,6 @@ from app.database import Base
 class Warehouse(Base):
     __tablename__ = "warehouses"
 
-    warehouse_id = Column(Integer, primary_key=True, index=True)
+    warehouse_id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     location = Column(Text)
@@ -1,12 +1,13 @@
 # app/mongodb/database.py
-from typing import Annotated, Any, ClassVar, Optional, TypeVar, Generic, Type
+from typing import Annotated, Any, ClassVar, Optional, TypeVar, Generic, Type, TYPE_CHECKING
 from pydantic import BaseModel, ConfigDict, BeforeValidator, Field
 from bson import ObjectId
-import motor.motor_asyncio
-from pymongo.collection import Collection
 from dotenv import load_dotenv
 import os
 
+if TYPE_CHECKING:
+    from pymongo.collection import Collection
+
 # Load environment variables
 load_dotenv()
 
@@ -14,13 +15,28 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/inventory_system")
 DB_NAME = MONGO_URI.split("/")[-1].split("?")[0]  # Extract DB name from URI
 
-try:
-    # Initialize the MongoDB client
+# Set to 0 to run without the MongoDB-backed category routes (SQL database only)
+MONGO_ENABLED = os.getenv("MONGO_ENABLED", "1") == "1"
+
+# Created by connect() in the app's startup handler, not at import time; motor and
+# pymongo are only imported then
+client = None
+db = None
+
+def connect():
+    """Create the MongoDB client; it connects lazily on the first operation"""
+    global client, db
+    import motor.motor_asyncio
+
     client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
     db = client[DB_NAME]
-    print(f"MongoDB connection initialized to database: {DB_NAME}")
-except Exception as e:
-    print(f"Error connecting to MongoDB: {e}")
+    return db
+
+def close():
+    global client, db
+    if client is not None:
+        client.close()
+    client = None
     db = None
 
 # Define a proper ObjectId field validator for Pydantic v2
@@ -57,7 +73,7 @@ class MongoRepository(Generic[T]):
     model_class: ClassVar[Type[T]]
     
     @classmethod
-    def get_collection(cls) -> Collection:
+    def get_collection(cls) -> "Collection":
         return db[cls.collection_name]
     
     @classmethod
@@ -80,8 +96,8 @@ class MongoRepository(Generic[T]):
     async def create(cls, data: dict) -> T:
         collection = cls.get_collection()
         result = await collection.insert_one(data)
-        created_doc = await collection.find_one({"_id": result.inserted_id})
-        return cls.model_class.model_validate(created_doc)
+        # The inserted document is exactly what we sent, no need to read it back
+        return cls.model_class.model_validate({**data, "_id": result.inserted_id})
     
     @classmethod
     async def update(cls, id: str, data: dict) -> Optional[T]:
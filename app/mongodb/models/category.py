@@ -74,6 +74,10 @@ class UpdateCategoryRequest(BaseModel):
     default_reorder_level: Optional[int] = None
     storage_requirements: Optional[Dict[str, Any]] = None
 
+class MoveCategoryRequest(BaseModel):
+    """Input model for moving a category (and its subtree) under a new parent"""
+    new_parent_id: Optional[str] = None  # None moves the category to the root
+
 class CategoryTree(BaseModel):
     """Category with its children for tree view"""
     id: str
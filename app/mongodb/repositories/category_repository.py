@@ -1,7 +1,11 @@
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from bson import ObjectId
-from app.mongodb.database import db
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from pydantic import ValidationError
+from fastapi import HTTPException
+from app.mongodb import database
 from app.mongodb.models.category import (
     Category,
     CategoryAttribute,
@@ -10,23 +14,34 @@ from app.mongodb.models.category import (
     CategoryTree
 )
 
+# Number of writes sent per bulk_write call when importing categories
+IMPORT_BATCH_SIZE = 1000
+
+class _Collection:
+    """Looks the collection up on each access; the client is created at app startup"""
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if database.db is None:
+            raise HTTPException(status_code=503, detail="MongoDB is not available")
+        return database.db[self.name]
+
 class CategoryRepository:
-    collection = db.categories
+    collection = _Collection("categories")
     
     @classmethod
     async def create(cls, data: CreateCategoryRequest, user_id: int) -> str:
         """Create a new category"""
-        # Check if code already exists
-        existing = await cls.collection.find_one({"code": data.code})
-        if existing:
-            raise ValueError(f"Category with code '{data.code}' already exists")
-        
         # Get parent to set level and path
         level = 0
         path = [data.code]
         
         if data.parent_id:
-            parent = await cls.collection.find_one({"_id": ObjectId(data.parent_id)})
+            parent = await cls.collection.find_one(
+                {"_id": ObjectId(data.parent_id)},
+                {"level": 1, "path": 1}
+            )
             if not parent:
                 raise ValueError(f"Parent category with id '{data.parent_id}' not found")
             level = parent["level"] + 1
@@ -51,9 +66,12 @@ class CategoryRepository:
             updated_by=user_id
         )
         
-        # Save to MongoDB
+        # Save to MongoDB; the unique index on code rejects duplicates atomically
         category_dict = category.model_dump(by_alias=True, exclude={"id"})
-        result = await cls.collection.insert_one(category_dict)
+        try:
+            result = await cls.collection.insert_one(category_dict)
+        except DuplicateKeyError:
+            raise ValueError(f"Category with code '{data.code}' already exists")
         return str(result.inserted_id)
     
     @classmethod
@@ -70,6 +88,66 @@ class CategoryRepository:
         
         return result.modified_count > 0
     
+    @classmethod
+    async def move(cls, category_id: str, new_parent_id: Optional[str], user_id: int) -> int:
+        """
+        Re-parent a category, rewriting path and level for its whole subtree in a single
+        update_many. Returns the number of categories updated.
+        """
+        projection = {"code": 1, "path": 1, "parent_id": 1}
+        category = await cls.collection.find_one({"_id": ObjectId(category_id)}, projection)
+        if not category:
+            raise ValueError(f"Category with id '{category_id}' not found")
+        
+        if (category.get("parent_id") or None) == new_parent_id:
+            return 0
+        
+        parent_path = []
+        if new_parent_id:
+            parent = await cls.collection.find_one({"_id": ObjectId(new_parent_id)}, projection)
+            if not parent:
+                raise ValueError(f"Parent category with id '{new_parent_id}' not found")
+            if category["code"] in parent.get("path", []):
+                raise ValueError("Cannot move a category under itself or one of its descendants")
+            parent_path = parent["path"]
+        
+        return await cls._rewrite_subtree(category, parent_path, new_parent_id, user_id)
+    
+    @classmethod
+    async def _rewrite_subtree(cls, category: Dict[str, Any], parent_path: List[str],
+                               parent_id: Optional[str], user_id: int) -> int:
+        """
+        Put a category (its code and _id) under parent_path, rewriting path and level for
+        its whole subtree in a single update_many. Everything before the category's code
+        in each path is replaced, so paths already partly rewritten come out right too.
+        """
+        result = await cls.collection.update_many(
+            # The multikey path index finds the subtree
+            {"path": category["code"]},
+            [
+                {"$set": {
+                    "path": {"$concatArrays": [
+                        {"$literal": parent_path},
+                        {"$slice": [
+                            "$path",
+                            {"$indexOfArray": ["$path", category["code"]]},
+                            {"$size": "$path"}
+                        ]}
+                    ]},
+                    "parent_id": {"$cond": [
+                        {"$eq": ["$_id", category["_id"]]},
+                        {"$literal": parent_id},
+                        "$parent_id"
+                    ]},
+                    "updated_at": datetime.now(),
+                    "updated_by": user_id
+                }},
+                {"$set": {"level": {"$subtract": [{"$size": "$path"}, 1]}}}
+            ]
+        )
+        
+        return result.modified_count
+    
     @classmethod
     async def delete(cls, category_id: str) -> bool:
         """Delete a category if it has no children"""
@@ -215,21 +293,74 @@ class CategoryRepository:
                 })
                 
         return result
-    
+
+    @classmethod
+    async def get_effective_thresholds(cls, root_code: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Resolve stock thresholds per category, inheriting unset values from ancestors.
+
+        If root_code is given only that category and its descendants are returned.
+        """
+        projection = {
+            "_id": 0,
+            "code": 1,
+            "path": 1,
+            "min_stock_threshold": 1,
+            "default_reorder_level": 1
+        }
+
+        if root_code:
+            root = await cls.collection.find_one({"code": root_code}, projection)
+            if not root:
+                return []
+            # The subtree plus its ancestors, which supply inherited values
+            ancestors = root.get("path", [])[:-1]
+            cursor = cls.collection.find(
+                {"$or": [{"path": root_code}, {"code": {"$in": ancestors}}]},
+                projection
+            )
+        else:
+            cursor = cls.collection.find({}, projection)
+
+        categories = await cursor.to_list(length=None)
+
+        # Parents always have shorter paths, so they are resolved before their children
+        categories.sort(key=lambda c: len(c.get("path") or []))
+
+        resolved = {}
+        for category in categories:
+            path = category.get("path") or [category["code"]]
+            parent = resolved.get(path[-2]) if len(path) > 1 else None
+
+            min_stock_threshold = category.get("min_stock_threshold")
+            reorder_level = category.get("default_reorder_level")
+            if parent:
+                if min_stock_threshold is None:
+                    min_stock_threshold = parent["min_stock_threshold"]
+                if reorder_level is None:
+                    reorder_level = parent["reorder_level"]
+
+            resolved[category["code"]] = {
+                "category_code": category["code"],
+                "path": path,
+                "min_stock_threshold": min_stock_threshold,
+                "reorder_level": reorder_level
+            }
+
+        rows = resolved.values()
+        if root_code:
+            rows = [row for row in rows if root_code in row["path"]]
+
+        return [
+            {key: value for key, value in row.items() if key != "path"}
+            for row in rows
+        ]
+
     @classmethod
     async def add_attribute(cls, category_id: str, attribute: CategoryAttribute, user_id: int) -> bool:
         """Add a new attribute to a category"""
-        # Check if attribute already exists
-        category = await cls.get_by_id(category_id)
-        if not category:
-            raise ValueError(f"Category with id '{category_id}' not found")
-            
-        attributes = category.get("attributes", [])
-        if any(attr["name"] == attribute.name for attr in attributes):
-            raise ValueError(f"Attribute '{attribute.name}' already exists in this category")
-            
+        # Only push if no attribute with this name exists yet
         result = await cls.collection.update_one(
-            {"_id": ObjectId(category_id)},
+            {"_id": ObjectId(category_id), "attributes.name": {"$ne": attribute.name}},
             {
                 "$push": {"attributes": attribute.model_dump()},
                 "$set": {
@@ -239,34 +370,36 @@ class CategoryRepository:
             }
         )
         
+        if result.matched_count == 0:
+            # Work out why nothing matched (only on the failure path)
+            if not await cls.collection.count_documents({"_id": ObjectId(category_id)}, limit=1):
+                raise ValueError(f"Category with id '{category_id}' not found")
+            raise ValueError(f"Attribute '{attribute.name}' already exists in this category")
+        
         return result.modified_count > 0
     
     @classmethod
     async def update_attribute(cls, category_id: str, attribute_name: str, 
                               updated_attribute: CategoryAttribute, user_id: int) -> bool:
         """Update an existing attribute in a category"""
-        # First find the attribute index
-        category = await cls.get_by_id(category_id)
-        if not category or "attributes" not in category:
-            raise ValueError(f"Category with id '{category_id}' not found or has no attributes")
-            
-        attributes = category["attributes"]
-        for i, attr in enumerate(attributes):
-            if attr["name"] == attribute_name:
-                # Found the attribute to update
-                result = await cls.collection.update_one(
-                    {"_id": ObjectId(category_id)},
-                    {
-                        "$set": {
-                            f"attributes.{i}": updated_attribute.model_dump(),
-                            "updated_at": datetime.now(),
-                            "updated_by": user_id
-                        }
-                    }
-                )
-                return result.modified_count > 0
-                
-        raise ValueError(f"Attribute '{attribute_name}' not found in category")
+        # The positional operator targets the matched array element in place
+        result = await cls.collection.update_one(
+            {"_id": ObjectId(category_id), "attributes.name": attribute_name},
+            {
+                "$set": {
+                    "attributes.$": updated_attribute.model_dump(),
+                    "updated_at": datetime.now(),
+                    "updated_by": user_id
+                }
+            }
+        )
+        
+        if result.matched_count == 0:
+            if not await cls.collection.count_documents({"_id": ObjectId(category_id)}, limit=1):
+                raise ValueError(f"Category with id '{category_id}' not found or has no attributes")
+            raise ValueError(f"Attribute '{attribute_name}' not found in category")
+        
+        return result.modified_count > 0
     
     @classmethod
     async def remove_attribute(cls, category_id: str, attribute_name: str, user_id: int) -> bool:
@@ -303,4 +436,185 @@ class CategoryRepository:
             if "parent_id" in category and category["parent_id"]:
                 category["parent_id"] = str(category["parent_id"])
                 
-        return categories
\ No newline at end of file
+        return categories
+    
+    @classmethod
+    def export_cursor(cls, batch_size: int = 1000):
+        """Async cursor over all categories, parents before children, for streaming exports"""
+        return cls.collection.find({}).sort("level", 1).batch_size(batch_size)
+    
+    @classmethod
+    async def count(cls) -> int:
+        """Count all categories"""
+        return await cls.collection.count_documents({})
+    
+    @classmethod
+    async def bulk_import(cls, entries: List[Dict[str, Any]], user_id: int,
+                          batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Create or update many categories at once.
+        Entries reference their parent by parent_code, which may be another entry or an
+        existing category. Level and path are computed in memory in topological order and
+        the writes are sent with bulk_write in ordered batches. Existing categories that
+        get a new parent have their stored subtrees rewritten afterwards, as move() does.
+        """
+        skipped = []
+        by_code = {}
+        for entry in entries:
+            code = entry.get("code")
+            if not code or not entry.get("name"):
+                skipped.append(f"{code or '?'} (missing code or name)")
+            elif code in by_code:
+                skipped.append(f"{code} (duplicate code in import)")
+            elif not isinstance(entry.get("storage_requirements") or {}, dict):
+                skipped.append(f"{code} (invalid storage_requirements)")
+            else:
+                try:
+                    attributes = [CategoryAttribute(**a).model_dump() for a in entry.get("attributes") or []]
+                except (TypeError, ValidationError):
+                    skipped.append(f"{code} (invalid attributes)")
+                    continue
+                by_code[code] = {**entry, "attributes": attributes}
+        
+        # One lookup for every code we touch: existing entries are updated in place and
+        # existing parents outside the import anchor their subtrees
+        referenced = set(by_code)
+        referenced.update(e["parent_code"] for e in by_code.values() if e.get("parent_code"))
+        existing = {}
+        codes = list(referenced)
+        for i in range(0, len(codes), batch_size * 10):
+            cursor = cls.collection.find(
+                {"code": {"$in": codes[i:i + batch_size * 10]}},
+                {"code": 1, "level": 1, "path": 1, "parent_id": 1}
+            )
+            async for doc in cursor:
+                existing[doc["code"]] = doc
+        
+        resolved = {}  # code -> (_id, level, path)
+        # An existing parent outside the import sits below its nearest imported ancestor,
+        # if any, and can only be placed once that ancestor has its new path
+        anchored = {}  # imported code -> existing codes waiting on it
+        anchor_of = {}
+        for code, doc in existing.items():
+            if code in by_code:
+                continue
+            path = doc.get("path") or [code]
+            anchor = next((c for c in reversed(path[:-1]) if c in by_code), None)
+            if anchor:
+                anchored.setdefault(anchor, []).append(code)
+                anchor_of[code] = anchor
+            else:
+                resolved[code] = (doc["_id"], doc.get("level", 0), path)
+        
+        # Kahn-style walk: start from roots and from children of categories already placed
+        children = {}
+        waits_on = {}  # imported code -> imported code it cannot be placed before
+        ready = []
+        for code, entry in by_code.items():
+            parent_code = entry.get("parent_code")
+            if not parent_code or parent_code in resolved:
+                ready.append(code)
+            elif parent_code in by_code or parent_code in anchor_of:
+                children.setdefault(parent_code, []).append(code)
+                waits_on[code] = anchor_of.get(parent_code, parent_code)
+            else:
+                skipped.append(f"{code} (parent '{parent_code}' not found)")
+        
+        now = datetime.now()
+        operations = []
+        reparented = []
+        created = updated = 0
+        
+        while ready:
+            code = ready.pop()
+            entry = by_code[code]
+            parent_code = entry.get("parent_code")
+            if parent_code:
+                parent_id, parent_level, parent_path = resolved[parent_code]
+                level, path, parent_id = parent_level + 1, parent_path + [code], str(parent_id)
+            else:
+                level, path, parent_id = 0, [code], None
+            
+            fields = {
+                "name": entry["name"],
+                "description": entry.get("description"),
+                "parent_id": parent_id,
+                "level": level,
+                "path": path,
+                "icon": entry.get("icon"),
+                "display_order": entry.get("display_order", 0),
+                "visible": entry.get("visible", True),
+                "attributes": entry["attributes"],
+                "min_stock_threshold": entry.get("min_stock_threshold"),
+                "default_reorder_level": entry.get("default_reorder_level"),
+                "storage_requirements": entry.get("storage_requirements"),
+                "updated_at": now,
+                "updated_by": user_id
+            }
+            
+            if code in existing:
+                _id = existing[code]["_id"]
+                operations.append(UpdateOne({"_id": _id}, {"$set": fields}))
+                updated += 1
+                if (existing[code].get("parent_id") or None) != parent_id:
+                    reparented.append((_id, code, path, parent_id))
+            else:
+                _id = ObjectId()
+                document = Category(code=code, created_by=user_id, created_at=now, **fields)
+                operations.append(InsertOne({
+                    "_id": _id,
+                    **document.model_dump(by_alias=True, exclude={"id"})
+                }))
+                created += 1
+            
+            resolved[code] = (_id, level, path)
+            ready.extend(children.pop(code, []))
+            
+            for waiting in anchored.pop(code, []):
+                doc = existing[waiting]
+                stored = doc.get("path") or [waiting]
+                waiting_path = path + stored[stored.index(code) + 1:]
+                resolved[waiting] = (doc["_id"], len(waiting_path) - 1, waiting_path)
+                ready.extend(children.pop(waiting, []))
+            
+            if len(operations) >= batch_size:
+                await cls.collection.bulk_write(operations, ordered=True)
+                operations = []
+        
+        if operations:
+            await cls.collection.bulk_write(operations, ordered=True)
+        
+        # Stored descendants of a re-parented category still carry its old path
+        for _id, code, path, parent_id in reparented:
+            await cls._rewrite_subtree({"_id": _id, "code": code}, path[:-1], parent_id, user_id)
+        
+        # Whatever is still waiting is part of a cycle or below an entry that was skipped
+        # or is in one; follow what each waits on to tell which
+        pending = {code for waiting in children.values() for code in waiting}
+        on_cycle = set()
+        blocked_by = {}
+        seen = {}
+        for start in pending:
+            chain = []
+            code = start
+            while code in pending and code not in seen:
+                seen[code] = start
+                chain.append(code)
+                code = waits_on[code]
+            if code in pending and seen[code] == start:
+                on_cycle.update(chain[chain.index(code):])
+                chain = chain[:chain.index(code)]
+            elif code in pending:
+                code = blocked_by.get(code, code)
+            for waiting in chain:
+                blocked_by[waiting] = code
+        
+        for code in pending:
+            if code in on_cycle:
+                skipped.append(f"{code} (circular parent reference)")
+            elif blocked_by[code] in on_cycle:
+                skipped.append(f"{code} (ancestor '{blocked_by[code]}' has a circular parent reference)")
+            else:
+                skipped.append(f"{code} (ancestor '{blocked_by[code]}' was skipped)")
+        
+        return {"created": created, "updated": updated, "skipped": skipped}
@@ -8,6 +8,17 @@ import sqlalchemy
 
 router = APIRouter()
 
+# The calculated reorder point of the (product, warehouse) wins (see app/utils/stock_policies.py);
+# then the product's own reorder level, where 0 (the column default) means unset; then the
+# values mirrored from its MongoDB category (see app/utils/category_thresholds.py); else 5.
+# Stock is low below the threshold. The stock triggers (migrations/versions/0004) use the
+# same rule, keep them in step. Requires the `ct` and `sp` joins below.
+EFFECTIVE_THRESHOLD = (
+    "COALESCE(sp.reorder_point, NULLIF(p.reorder_level, 0), ct.min_stock_threshold, ct.reorder_level, 5)"
+)
+CATEGORY_THRESHOLD_JOIN = "LEFT JOIN category_thresholds ct ON ct.category_code = p.category_code"
+STOCK_POLICY_JOIN = "LEFT JOIN stock_policies sp ON sp.product_id = s.product_id AND sp.warehouse_id = s.warehouse_id"
+
 @router.get("/")
 def get_alerts(
     resolved: bool = False, 
@@ -78,7 +89,7 @@ def check_stock_levels(db: Session = Depends(get_db)):
     """
     try:
         # First, get all stock items with their thresholds
-        query = """
+        query = f"""
             SELECT 
                 s.stock_id, 
                 s.product_id, 
@@ -86,13 +97,15 @@ def check_stock_levels(db: Session = Depends(get_db)):
                 s.warehouse_id, 
                 w.name as warehouse_name,
                 s.quantity, 
-                COALESCE(p.min_stock_threshold, 5) as threshold
+                {EFFECTIVE_THRESHOLD} as threshold
             FROM 
                 stock s
             JOIN 
                 products p ON s.product_id = p.product_id
             JOIN 
                 warehouses w ON s.warehouse_id = w.warehouse_id
+            {CATEGORY_THRESHOLD_JOIN}
+            {STOCK_POLICY_JOIN}
         """
         stock_items = db.execute(sqlalchemy.text(query)).mappings().all()
         
@@ -194,7 +207,7 @@ def check_stock_levels(db: Session = Depends(get_db)):
             )
         """
         
-        resolve_low_stock_query = """
+        resolve_low_stock_query = f"""
             UPDATE stock_alerts
             SET is_resolved = TRUE, resolved_at = CURRENT_TIMESTAMP
             WHERE is_resolved = FALSE
@@ -202,9 +215,11 @@ def check_stock_levels(db: Session = Depends(get_db)):
             AND EXISTS (
                 SELECT 1 FROM stock s 
                 JOIN products p ON s.product_id = p.product_id
+                {CATEGORY_THRESHOLD_JOIN}
+                {STOCK_POLICY_JOIN}
                 WHERE s.product_id = stock_alerts.product_id 
                 AND s.warehouse_id = stock_alerts.warehouse_id 
-                AND s.quantity >= COALESCE(p.min_stock_threshold, 5)
+                AND s.quantity >= {EFFECTIVE_THRESHOLD}
             )
         """
         
@@ -350,63 +365,3 @@ def check_stock_table(db: Session = Depends(get_db)):
     except Exception as e:
         print(f"Error checking stock table: {e}")
         return {"error": str(e)}
-
-@router.post("/mysql-fix")
-def mysql_fix(db: Session = Depends(get_db)):
-    """Create stock_alerts table with proper MySQL syntax"""
-    try:
-        # Check if table exists
-        table_check = db.execute(sqlalchemy.text("""
-            SELECT COUNT(*)
-            FROM information_schema.tables
-            WHERE table_schema = DATABASE()
-            AND table_name = 'stock_alerts'
-        """)).scalar()
-        
-        if table_check == 0:
-            # Create table with MySQL syntax
-            db.execute(sqlalchemy.text("""
-                CREATE TABLE stock_alerts (
-                    alert_id INT AUTO_INCREMENT PRIMARY KEY,
-                    product_id INT NOT NULL,
-                    warehouse_id INT NOT NULL,
-                    current_quantity INT NOT NULL,
-                    threshold INT NOT NULL,
-                    alert_type VARCHAR(50) NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_resolved BOOLEAN DEFAULT FALSE,
-                    resolved_at TIMESTAMP NULL,
-                    FOREIGN KEY (product_id) REFERENCES products(product_id),
-                    FOREIGN KEY (warehouse_id) REFERENCES warehouses(warehouse_id)
-                )
-            """))
-            table_created = True
-        else:
-            table_created = False
-            
-        # Create test alerts
-        db.execute(sqlalchemy.text("DELETE FROM stock_alerts"))
-        
-        db.execute(sqlalchemy.text("""
-            INSERT INTO stock_alerts 
-            (product_id, warehouse_id, current_quantity, threshold, alert_type, created_at, is_resolved)
-            VALUES 
-            (1, 1, 0, 5, 'out_of_stock', CURRENT_TIMESTAMP, FALSE),
-            (2, 1, 0, 5, 'out_of_stock', CURRENT_TIMESTAMP, FALSE)
-        """))
-        
-        # Count alerts
-        count = db.execute(sqlalchemy.text("SELECT COUNT(*) FROM stock_alerts")).scalar()
-        
-        db.commit()
-        
-        
-        return {
-            "success": True,
-            "table_created": table_created,
-            "alerts_created": count
-        }
-    except Exception as e:
-        db.rollback()
-        print(f"Error in mysql_fix: {e}")
-        return {"success": False, "error": str(e)}
\ No newline at end of file
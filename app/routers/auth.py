@@ -1,40 +1,85 @@
 # app/routers/auth.py
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.models.revoked_token import RevokedToken
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, UserLogin, Token
-from app.utils.hashing import hash_password, verify_password
-from app.utils.token import create_access_token
-from app.utils.dependencies import get_current_user
+from app.utils.hashing import hash_password_async, verify_and_update_async
+from app.utils.token import create_access_token, revoke_token
+from app.utils.dependencies import get_current_user, get_token_claims
+from app.utils.permissions import permissions_for_role
 
 router = APIRouter()
 
-@router.post("/register", response_model=UserOut)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    print("Received registration:", user)
-    existing = db.query(User).filter(User.username == user.username).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Username already exists")
+def find_user(db: Session, username: str):
+    return db.query(User).filter(User.username == username).first()
 
-    hashed_pw = hash_password(user.password)
-    db_user = User(username=user.username, password_hash=hashed_pw)
+def add_user(db: Session, username: str, password_hash: str) -> User:
+    db_user = User(username=username, password_hash=password_hash)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+def update_password_hash(db: Session, user: User, password_hash: str) -> None:
+    user.password_hash = password_hash
+    db.commit()
+    # Reload here rather than on first attribute access back in the event loop
+    db.refresh(user)
+
+# Register and login are async so bcrypt runs in the hashing process pool rather than
+# occupying one of the threadpool workers that all sync endpoints share; their queries
+# still block, so those go to the threadpool and the event loop stays free
+@router.post("/register", response_model=UserOut)
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    print("Received registration:", user.username)
+    existing = await run_in_threadpool(find_user, db, user.username)
+    if existing:
+        raise HTTPException(status_code=400, detail="Username already exists")
+
+    hashed_pw = await hash_password_async(user.password)
+    return await run_in_threadpool(add_user, db, user.username, hashed_pw)
+
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == user_credentials.username).first()
-    if not user or not verify_password(user_credentials.password, user.password_hash):
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user, db, user_credentials.username)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    valid, new_hash = await verify_and_update_async(user_credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
-    token = create_access_token({"user_id": user.user_id})
+    # The bcrypt cost changed since this hash was made, store it at the current cost
+    if new_hash:
+        await run_in_threadpool(update_password_hash, db, user, new_hash)
+
+    token = create_access_token({
+        "user_id": user.user_id,
+        "role_id": user.role_id,
+        "perms": permissions_for_role(user.role_id)
+    })
     return {"access_token": token, "token_type": "bearer"}
 
 
+@router.post("/logout")
+def logout(claims: dict = Depends(get_token_claims), db: Session = Depends(get_db)):
+    revoke_token(claims)
+
+    # Shared with the other workers' staff and admin checks; rows past their token's
+    # expiry are no longer needed
+    now = datetime.utcnow()
+    db.query(RevokedToken).filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+    if claims.get("jti"):
+        db.merge(RevokedToken(jti=claims["jti"], expires_at=datetime.utcfromtimestamp(claims.get("exp", 0))))
+    db.commit()
+    return {"message": "Logged out"}
+
+
 @router.get("/me")
 def get_profile(current_user: User = Depends(get_current_user)):
     return {"user_id": current_user.user_id, "username": current_user.username}
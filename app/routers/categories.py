@@ -1,14 +1,22 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, Body, Path
+from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.mongodb.models.category import (
     Category,
     CategoryAttribute,
     CreateCategoryRequest,
     UpdateCategoryRequest,
+    MoveCategoryRequest,
     CategoryTree
 )
 from app.mongodb.repositories.category_repository import CategoryRepository
 from app.utils.dependencies import get_current_user
+from app.utils.category_thresholds import (
+    sync_category_thresholds,
+    try_sync_category_thresholds,
+    try_remove_category_threshold,
+)
+from app.database import get_db
 from app.models.user import User
 
 router = APIRouter(
@@ -16,6 +24,8 @@ router = APIRouter(
     tags=["Product Categories"]
 )
 
+THRESHOLD_FIELDS = {"min_stock_threshold", "default_reorder_level"}
+
 # Create a new category
 # Get all categories
 @router.get("/")
@@ -30,13 +40,19 @@ async def get_all_categories(
 @router.post("/", response_model=dict)
 async def create_category(
     data: CreateCategoryRequest,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
         category_id = await CategoryRepository.create(data, current_user.user_id)
+        
+        # Mirror the (possibly inherited) thresholds for SQL-side alert checks
+        sync = await try_sync_category_thresholds(db, data.code)
+        
         return {
             "message": "Category created successfully",
-            "category_id": category_id
+            "category_id": category_id,
+            **sync
         }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -46,6 +62,7 @@ async def create_category(
 async def update_category(
     category_id: str = Path(..., description="The ID of the category to update"),
     data: UpdateCategoryRequest = Body(...),
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -59,14 +76,41 @@ async def update_category(
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update category")
         
-        return {"message": "Category updated successfully"}
+        # Threshold changes cascade to every descendant that inherits them
+        sync = {}
+        if data.model_fields_set & THRESHOLD_FIELDS:
+            sync = await try_sync_category_thresholds(db, category["code"])
+        
+        return {"message": "Category updated successfully", **sync}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Move a category and its subtree under a new parent
+@router.put("/{category_id}/move", response_model=dict)
+async def move_category(
+    category_id: str = Path(..., description="The ID of the category to move"),
+    data: MoveCategoryRequest = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        moved = await CategoryRepository.move(category_id, data.new_parent_id, current_user.user_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    # Inherited thresholds depend on the ancestors, so refresh the moved subtree
+    sync = {}
+    if moved:
+        category = await CategoryRepository.get_by_id(category_id)
+        sync = await try_sync_category_thresholds(db, category["code"])
+    
+    return {"message": "Category moved successfully", "categories_updated": moved, **sync}
 
 # Delete a category
 @router.delete("/{category_id}", response_model=dict)
 async def delete_category(
     category_id: str = Path(..., description="The ID of the category to delete"),
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -80,10 +124,24 @@ async def delete_category(
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete category")
         
-        return {"message": "Category deleted successfully"}
+        sync = try_remove_category_threshold(db, category["code"])
+        
+        return {"message": "Category deleted successfully", **sync}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Rebuild the SQL mirror of category thresholds
+@router.post("/thresholds/sync", response_model=dict)
+async def sync_thresholds(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    result = await sync_category_thresholds(db)
+    return {
+        "message": f"Category thresholds synced ({result['synced']} categories, {result['removed']} removed)",
+        **result
+    }
+
 # Get a category by ID
 @router.get("/{category_id}")
 async def get_category(
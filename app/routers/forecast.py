@@ -0,0 +1,39 @@
+# app/routers/forecast.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.models.demand_forecast import DemandForecast
+from app.schemas.forecast import DemandForecastOut
+from app.utils.forecasting import refresh_forecasts
+from app.utils.permissions import require_staff
+from app.utils.responses import list_response
+
+router = APIRouter(
+    prefix="/forecasts",
+    tags=["Forecasts"]
+)
+
+@router.get("/", response_model=List[DemandForecastOut])
+def get_forecasts(
+    product_id: Optional[int] = None,
+    warehouse_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Stored daily demand forecasts; they are refreshed in the background as days close"""
+    criteria = []
+    if product_id is not None:
+        criteria.append(DemandForecast.product_id == product_id)
+    if warehouse_id is not None:
+        criteria.append(DemandForecast.warehouse_id == warehouse_id)
+    return list_response(db, DemandForecast, DemandForecastOut, *criteria)
+
+@router.post("/refresh")
+def refresh(full: bool = False, db: Session = Depends(get_db), claims: dict = Depends(require_staff)):
+    """Fold in newly closed days now, or refit every series from history with full=true"""
+    try:
+        return refresh_forecasts(db, full=full)
+    except Exception as e:
+        db.rollback()
+        print(f"Error refreshing demand forecasts: {e}")
+        raise HTTPException(status_code=500, detail="Failed to refresh demand forecasts")
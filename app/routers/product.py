@@ -31,16 +31,14 @@ async def get_all_products(
     # Apply category filter if provided
     if category_code:
         # Optional validation - check if category exists
-        try:
-            from app.mongodb.database import db as mongo_db
+        from app.mongodb.database import db as mongo_db
+        # If MongoDB not available, just continue with filtering
+        if mongo_db is not None:
             category = await mongo_db.categories.find_one({"code": category_code})
             if not category:
                 # If category doesn't exist, return empty list instead of error
                 # to maintain backward compatibility
                 return []
-        except ImportError:
-            # If MongoDB not available, just continue with filtering
-            pass
         
         # Filter products by category_code
         query = query.filter(Product.category_code == category_code)
@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from app.schemas.purchase_order import PurchaseOrderCreate, PurchaseOrderOut
-from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem
-from app.models.stock import Stock
+import sqlalchemy
+from app.schemas.purchase_order import PurchaseOrderCreate, PurchaseOrderOut, ReceiveRequest, StatusTransitionRequest
+from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem, POStatusHistory
 from app.database import get_db
+from app.utils.receiving import receive_po_lines, RECEIVABLE_STATUSES
+from app.utils.permissions import require_staff
+from app.utils.dependencies import get_token_claims
+from app.utils.purchase_orders import (
+    po_header, po_item_rows, create_purchase_orders, record_status_changes,
+    transition_purchase_orders, allowed_transitions
+)
+from collections import defaultdict
 from datetime import date
 from typing import Optional, List
 
@@ -12,33 +21,31 @@ router = APIRouter()
 @router.post("/", response_model=PurchaseOrderOut)
 def create_po(po_data: PurchaseOrderCreate, db: Session = Depends(get_db)):
     """Create a new purchase order"""
-    # Create the main purchase order
-    po = PurchaseOrder(
-        supplier_id=po_data.supplier_id,
-        ordered_by=po_data.ordered_by if hasattr(po_data, 'ordered_by') and po_data.ordered_by else 1,  # Default to user ID 1 if not provided
-        expected_delivery=po_data.expected_delivery,
-        notes=po_data.notes,
-        order_date=date.today(),
-        status="pending"  # Ensure status is set
-    )
+    # Header and items go in one transaction, so a PO never exists without its items
+    po = PurchaseOrder(**po_header(po_data))
     db.add(po)
-    db.commit()
-    db.refresh(po)
-
-    # Add purchase order items
-    for item in po_data.items:
-        po_item = PurchaseOrderItem(
-            po_id=po.po_id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_cost=item.unit_cost,
-            warehouse_id=item.warehouse_id if hasattr(item, 'warehouse_id') and item.warehouse_id else 1  # Default warehouse
-        )
-        db.add(po_item)
+    db.flush()
+
+    # Add purchase order items in one executemany. An empty parameter list would make
+    # SQLAlchemy run a single INSERT with no values.
+    item_rows = po_item_rows(po.po_id, po_data)
+    if item_rows:
+        db.execute(insert(PurchaseOrderItem), item_rows)
+    record_status_changes(db, [(po.po_id, None, po.status)], po.ordered_by, "Purchase order created")
 
     db.commit()
     return po
 
+@router.post("/batch", response_model=List[PurchaseOrderOut])
+def create_po_batch(orders: List[PurchaseOrderCreate], db: Session = Depends(get_db)):
+    """
+    Create many purchase orders in one transaction: one multi-row INSERT for the headers
+    and one executemany for all their items, however many orders there are.
+    """
+    created = create_purchase_orders(db, orders)
+    db.commit()
+    return created
+
 @router.get("/", response_model=List[PurchaseOrderOut])
 def get_purchase_orders(
     limit: Optional[int] = None,
@@ -74,32 +81,46 @@ def get_purchase_order(po_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Purchase order not found")
     return po
 
+@router.put("/status")
+def update_po_statuses(
+    transition: StatusTransitionRequest,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(require_staff)
+):
+    """
+    Move any number of purchase orders to a new status in one conditional UPDATE.
+    POs that don't exist or can't make the transition are returned as rejected.
+    """
+    result = transition_purchase_orders(
+        db, transition.po_ids, transition.new_status, claims.get("user_id"), transition.notes
+    )
+    db.commit()
+    return result
+
 @router.put("/{po_id}/status")
 def update_po_status(
     po_id: int, 
     new_status: str,
     notes: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    claims: dict = Depends(get_token_claims)
 ):
     """Update purchase order status"""
     po = db.query(PurchaseOrder).filter(PurchaseOrder.po_id == po_id).first()
     if not po:
         raise HTTPException(status_code=404, detail="Purchase order not found")
     
-    # Valid statuses
-    valid_statuses = ["pending", "approved", "shipped", "received", "cancelled"]
-    if new_status not in valid_statuses:
+    old_status = po.status
+    result = transition_purchase_orders(db, [po_id], new_status, claims.get("user_id"), notes)
+    if result["rejected"]:
+        old_status = result["rejected"][0]["status"]
+        allowed = allowed_transitions(old_status)
         raise HTTPException(
-            status_code=400, 
-            detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
+            status_code=400,
+            detail=f"Cannot change status from {old_status} to {new_status}. "
+                   + (f"Allowed: {', '.join(allowed)}" if allowed else f"'{old_status}' is final")
         )
-    
-    old_status = po.status
-    po.status = new_status
-    
-    # Add to history (if you implement history tracking)
-    # This would require creating a POStatusHistory table
-    
+
     db.commit()
     return {
         "message": f"Purchase order status updated from {old_status} to {new_status}",
@@ -108,47 +129,40 @@ def update_po_status(
         "new_status": new_status
     }
 
+@router.post("/receive")
+def receive_lines(receipt: ReceiveRequest, db: Session = Depends(get_db), claims: dict = Depends(get_token_claims)):
+    """Receive partial or complete quantities for lines of any number of purchase orders"""
+    quantities = defaultdict(int)
+    for line in receipt.lines:
+        quantities[line.po_item_id] += line.quantity
+
+    return receive_po_lines(db, quantities, created_by=receipt.received_by or claims.get("user_id"))
+
 @router.post("/{po_id}/receive")
-def receive_po(po_id: int, db: Session = Depends(get_db)):
-    """Receive a purchase order and update inventory"""
+def receive_po(po_id: int, db: Session = Depends(get_db), claims: dict = Depends(get_token_claims)):
+    """Receive everything still outstanding on a purchase order and update inventory"""
     po = db.query(PurchaseOrder).filter(PurchaseOrder.po_id == po_id).first()
     if not po:
         raise HTTPException(status_code=404, detail="Purchase order not found")
     
-    if po.status != "pending":
+    if po.status not in RECEIVABLE_STATUSES:
         raise HTTPException(
             status_code=400, 
-            detail=f"Cannot receive PO with status '{po.status}'. Only pending orders can be received."
+            detail=f"Cannot receive PO with status '{po.status}'. Only open orders can be received."
         )
 
-    # Get all items for this PO
-    items = db.query(PurchaseOrderItem).filter(PurchaseOrderItem.po_id == po_id).all()
+    # Get the outstanding quantity of every line
+    items = db.query(
+        PurchaseOrderItem.po_item_id,
+        PurchaseOrderItem.quantity - PurchaseOrderItem.received_quantity
+    ).filter(PurchaseOrderItem.po_id == po_id).all()
     
     if not items:
         raise HTTPException(status_code=400, detail="No items found for this purchase order")
     
-    # Update inventory for each item
-    for item in items:
-        stock = db.query(Stock).filter(
-            Stock.product_id == item.product_id,
-            Stock.warehouse_id == item.warehouse_id
-        ).first()
-
-        if not stock:
-            # Create new stock entry if it doesn't exist
-            stock = Stock(
-                product_id=item.product_id, 
-                warehouse_id=item.warehouse_id, 
-                quantity=0
-            )
-            db.add(stock)
-
-        # Add received quantity to existing stock
-        stock.quantity += item.quantity
-
-    # Update PO status to received
-    po.status = "received"
-    db.commit()
+    # The PO row is locked and its status re-checked inside receive_po_lines
+    receive_po_lines(db, {po_item_id: outstanding for po_item_id, outstanding in items},
+                     created_by=claims.get("user_id"))
     
     return {
         "message": f"Purchase order #{po_id} received and inventory updated.",
@@ -158,61 +172,34 @@ def receive_po(po_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/{po_id}/history")
-def get_po_history(po_id: int, db: Session = Depends(get_db)):
-    """Get the status change history for a purchase order"""
-    try:
-        # Check if PO exists first
-        po = db.query(PurchaseOrder).filter(PurchaseOrder.po_id == po_id).first()
-        if not po:
-            raise HTTPException(status_code=404, detail="Purchase order not found")
-        
-        # Try to get the history from po_status_history table if it exists
-        try:
-            query = """
-                SELECT 
-                    h.*,
-                    u.username as changed_by_name
-                FROM 
-                    po_status_history h
-                LEFT JOIN
-                    users u ON h.changed_by = u.user_id
-                WHERE 
-                    h.po_id = :po_id
-                ORDER BY 
-                    h.changed_at
-            """
-            
-            history = db.execute(query, {"po_id": po_id}).mappings().all()
-            
-            if history:
-                return list(history)
-                
-        except Exception as e:
-            # If history table doesn't exist or query fails, continue to fallback
-            print(f"History table query failed: {e}")
-        
-        # Fallback: Return initial state if no history table exists
-        return [{
-            "history_id": 0,
-            "po_id": po_id,
-            "old_status": None,
-            "new_status": po.status,
-            "changed_by": None,
-            "changed_by_name": "System",
-            "changed_at": po.order_date.isoformat() if hasattr(po, 'order_date') and po.order_date else None,
-            "notes": "Initial state - History tracking not yet implemented"
-        }]
-        
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        # Handle any other unexpected errors
-        print(f"Error in get_po_history: {e}")
-        raise HTTPException(
-            status_code=500, 
-            detail="Internal server error while retrieving purchase order history"
-        )
+def get_po_history(
+    po_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Get the status change history for a purchase order, oldest first"""
+    if not db.query(PurchaseOrder.po_id).filter(PurchaseOrder.po_id == po_id).first():
+        raise HTTPException(status_code=404, detail="Purchase order not found")
+
+    # Walks ix_po_status_history_po_id_history_id; history_id follows the order of changes
+    history = db.execute(sqlalchemy.text("""
+        SELECT
+            h.history_id,
+            h.po_id,
+            h.old_status,
+            h.new_status,
+            h.changed_by,
+            u.username AS changed_by_name,
+            h.changed_at,
+            h.notes
+        FROM po_status_history h
+        LEFT JOIN users u ON u.user_id = h.changed_by
+        WHERE h.po_id = :po_id
+        ORDER BY h.history_id
+        LIMIT :limit OFFSET :skip
+    """), {"po_id": po_id, "limit": limit, "skip": skip}).mappings().all()
+    return list(history)
 
 @router.delete("/{po_id}")
 def delete_purchase_order(po_id: int, db: Session = Depends(get_db)):
@@ -227,8 +214,9 @@ def delete_purchase_order(po_id: int, db: Session = Depends(get_db)):
             detail=f"Cannot delete PO with status '{po.status}'. Only pending orders can be deleted."
         )
     
-    # Delete associated items first
+    # Delete associated items and history first
     db.query(PurchaseOrderItem).filter(PurchaseOrderItem.po_id == po_id).delete()
+    db.query(POStatusHistory).filter(POStatusHistory.po_id == po_id).delete()
     
     # Delete the purchase order
     db.delete(po)
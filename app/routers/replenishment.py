@@ -0,0 +1,53 @@
+# app/routers/replenishment.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.utils.permissions import require_staff
+from app.utils.replenishment import build_plan, commit_plan
+
+router = APIRouter(
+    prefix="/replenishment",
+    tags=["Replenishment"]
+)
+
+@router.get("/plan")
+def get_replenishment_plan(
+    supplier_id: Optional[int] = None,
+    warehouse_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(require_staff)
+):
+    """Dry run: the purchase orders the planner would create right now, nothing is written"""
+    try:
+        return build_plan(db, supplier_id=supplier_id, warehouse_id=warehouse_id)
+    except Exception as e:
+        print(f"Error building replenishment plan: {e}")
+        raise HTTPException(status_code=500, detail="Failed to build replenishment plan")
+
+@router.post("/commit")
+def commit_replenishment_plan(
+    supplier_id: Optional[int] = None,
+    warehouse_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(require_staff)
+):
+    """
+    Build the plan again and create its purchase orders in one transaction. The plan is
+    recomputed rather than taken from the client, so it reflects stock and open POs as
+    they are now.
+    """
+    try:
+        plan = build_plan(db, supplier_id=supplier_id, warehouse_id=warehouse_id)
+        created = commit_plan(db, plan, ordered_by=claims.get("user_id"))
+    except Exception as e:
+        db.rollback()
+        print(f"Error committing replenishment plan: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create replenishment purchase orders")
+
+    return {
+        "generated_at": plan["generated_at"],
+        "lines": plan["lines"],
+        "unassigned_lines": plan["unassigned_lines"],
+        "purchase_orders": created,
+    }
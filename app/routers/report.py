@@ -1,9 +1,12 @@
 # app/routers/report.py
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from datetime import date
+from datetime import date, datetime
 from typing import Optional, List
 from app.database import get_db
+from app.utils.responses import dumps
+from app.utils.stock_ledger import stock_as_of
 
 router = APIRouter()
 
@@ -220,4 +223,21 @@ def daily_flow(db: Session = Depends(get_db)):
         return list(result)
     except Exception as e:
         print(f"Error in daily flow: {e}")
-        return []
\ No newline at end of file
+        return []
+
+@router.get("/stock-as-of")
+def stock_as_of_report(
+    ts: datetime = Query(..., description="Point in time to report balances for"),
+    product_id: Optional[List[int]] = Query(None, description="Limit to these products (repeatable)"),
+    warehouse_id: Optional[List[int]] = Query(None, description="Limit to these warehouses (repeatable)"),
+    db: Session = Depends(get_db)
+):
+    """Stock on hand per product and warehouse at an arbitrary point in time"""
+    try:
+        rows = stock_as_of(db, ts, product_ids=product_id, warehouse_ids=warehouse_id)
+    except Exception as e:
+        print(f"Error in stock as-of report: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute stock balances")
+
+    # Reports can cover 100k+ keys, so encode the rows directly rather than via a response model
+    return Response(content=dumps(rows), media_type="application/json")
@@ -1,17 +1,22 @@
 # app/routers/stock.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
-import requests
+from typing import List, Optional
+from datetime import datetime
 
 from app.database import get_db
 from app.models.stock import Stock
 from app.schemas.stock import StockCreate, StockOut
+from app.utils.responses import list_response
+from app.utils.stock_ledger import movement, record_movements, take_snapshots, stock_as_of
 
 router = APIRouter()
 
 def check_stock_alerts():
     """Helper function to trigger stock alert check"""
+    # Only needed on this path; importing requests costs ~70 ms of worker startup
+    import requests
+
     try:
         print("Triggering stock alert check...")
         # Make a request to our own API endpoint to check stock levels
@@ -78,6 +83,10 @@ def add_stock(stock: StockCreate, db: Session = Depends(get_db)):
     
     db_stock = Stock(**stock.dict())
     db.add(db_stock)
+    db.flush()
+    if stock.quantity:
+        record_movements(db, [movement(stock.product_id, stock.warehouse_id, stock.quantity, "opening",
+                                       reference_id=db_stock.stock_id)])
     db.commit()
     db.refresh(db_stock)
     
@@ -92,16 +101,28 @@ def add_stock(stock: StockCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[StockOut])
 def get_all_stock(db: Session = Depends(get_db)):
-    return db.query(Stock).all()
+    return list_response(db, Stock, StockOut)
 
 @router.put("/{stock_id}", response_model=StockOut)
 def update_stock_quantity(stock_id: int, update: StockCreate, db: Session = Depends(get_db)):
-    stock = db.query(Stock).filter(Stock.stock_id == stock_id).first()
+    stock = db.query(Stock).filter(Stock.stock_id == stock_id).with_for_update().first()
     if not stock:
         raise HTTPException(status_code=404, detail="Stock record not found")
     
     print(f"Updating stock ID {stock_id} from quantity {stock.quantity} to {update.quantity}")
     
+    # Record the change as ledger adjustments; moving the row to another product or
+    # warehouse takes the old balance out of one key and puts the new one into the other
+    if (stock.product_id, stock.warehouse_id) == (update.product_id, update.warehouse_id):
+        entries = [movement(stock.product_id, stock.warehouse_id, update.quantity - stock.quantity,
+                            "adjust", reference_id=stock_id)]
+    else:
+        entries = [
+            movement(stock.product_id, stock.warehouse_id, -stock.quantity, "adjust", reference_id=stock_id),
+            movement(update.product_id, update.warehouse_id, update.quantity, "adjust", reference_id=stock_id),
+        ]
+    record_movements(db, [entry for entry in entries if entry["delta"]])
+    
     for key, value in update.dict().items():
         setattr(stock, key, value)
 
@@ -117,6 +138,25 @@ def update_stock_quantity(stock_id: int, update: StockCreate, db: Session = Depe
     
     return stock
 
+@router.get("/as-of")
+def get_stock_as_of(
+    ts: datetime,
+    product_id: Optional[int] = None,
+    warehouse_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Stock balances at a point in time, rebuilt from the latest snapshot plus later ledger entries"""
+    return stock_as_of(
+        db, ts,
+        product_ids=[product_id] if product_id is not None else None,
+        warehouse_ids=[warehouse_id] if warehouse_id is not None else None
+    )
+
+@router.post("/snapshots")
+def create_stock_snapshots(db: Session = Depends(get_db)):
+    """Fold new ledger entries into snapshots now instead of waiting for the background task"""
+    return take_snapshots(db)
+
 @router.get("/debug-stock-status")
 def api_debug_stock_status(db: Session = Depends(get_db)):
     """Endpoint to debug current stock status"""
@@ -176,9 +216,9 @@ def force_check_alerts(db: Session = Depends(get_db)):
 
 @router.get("/product/{product_id}", response_model=List[StockOut])
 def get_stock_by_product(product_id: int, db: Session = Depends(get_db)):
-    return db.query(Stock).filter(Stock.product_id == product_id).all()
+    return list_response(db, Stock, StockOut, Stock.product_id == product_id)
 
 @router.get("/warehouse/{warehouse_id}", response_model=List[StockOut])
 def get_stock_by_warehouse(warehouse_id: int, db: Session = Depends(get_db)):
-    return db.query(Stock).filter(Stock.warehouse_id == warehouse_id).all()
+    return list_response(db, Stock, StockOut, Stock.warehouse_id == warehouse_id)
     
\ No newline at end of file
@@ -0,0 +1,54 @@
+# app/routers/stock_policy.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.models.stock_policy import StockPolicy, StockPolicyChange
+from app.schemas.stock_policy import StockPolicyOut, StockPolicyChangeOut
+from app.utils.permissions import require_staff
+from app.utils.responses import list_response
+from app.utils.stock_policies import calculate_policies
+
+router = APIRouter(
+    prefix="/stock-policies",
+    tags=["Stock Policies"]
+)
+
+@router.get("/", response_model=List[StockPolicyOut])
+def get_stock_policies(
+    product_id: Optional[int] = None,
+    warehouse_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Calculated safety stock and reorder points"""
+    criteria = []
+    if product_id is not None:
+        criteria.append(StockPolicy.product_id == product_id)
+    if warehouse_id is not None:
+        criteria.append(StockPolicy.warehouse_id == warehouse_id)
+    return list_response(db, StockPolicy, StockPolicyOut, *criteria)
+
+@router.get("/changes", response_model=List[StockPolicyChangeOut])
+def get_stock_policy_changes(
+    product_id: Optional[int] = None,
+    warehouse_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Before and after values of every change the recalculation job made, newest first"""
+    criteria = []
+    if product_id is not None:
+        criteria.append(StockPolicyChange.product_id == product_id)
+    if warehouse_id is not None:
+        criteria.append(StockPolicyChange.warehouse_id == warehouse_id)
+    return list_response(db, StockPolicyChange, StockPolicyChangeOut, *criteria,
+                         order_by=StockPolicyChange.change_id.desc())
+
+@router.post("/recalculate")
+def recalculate_stock_policies(db: Session = Depends(get_db), claims: dict = Depends(require_staff)):
+    """Run the recalculation now instead of waiting for the scheduled job"""
+    try:
+        return calculate_policies(db)
+    except Exception as e:
+        db.rollback()
+        print(f"Error recalculating stock policies: {e}")
+        raise HTTPException(status_code=500, detail="Failed to recalculate stock policies")
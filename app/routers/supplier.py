@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.supplier import Supplier
 from app.schemas.supplier import SupplierCreate, SupplierOut, SupplierUpdate
-from typing import List
+from app.utils.permissions import require_staff
+from app.utils.supplier_performance import (
+    METRICS_SQL, get_supplier_performance, rank_suppliers, rebuild_supplier_performance
+)
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/suppliers",
@@ -25,6 +29,39 @@ def get_suppliers(db: Session = Depends(get_db)):
     suppliers = db.query(Supplier).all()
     return suppliers
 
+# ✅ Rank suppliers by delivery performance (declared before /{supplier_id})
+@router.get("/performance")
+def get_supplier_rankings(
+    sort: str = Query("on_time_rate", description=f"One of: {', '.join(METRICS_SQL)}"),
+    min_orders: int = Query(1, ge=0, description="Only suppliers with at least this many received POs"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Suppliers best first by on-time rate, fill rate, average lead time or price variance"""
+    if sort not in METRICS_SQL:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort. Must be one of: {', '.join(METRICS_SQL)}"
+        )
+    return rank_suppliers(db, sort, min_orders, limit)
+
+# ✅ Rebuild performance totals from purchase order history
+@router.post("/performance/rebuild")
+def rebuild_performance(
+    supplier_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(require_staff)
+):
+    """Recompute the running totals from all closed POs, e.g. to backfill them"""
+    try:
+        rebuild_supplier_performance(db, supplier_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding supplier performance: {e}")
+        raise HTTPException(status_code=500, detail="Failed to rebuild supplier performance")
+    return {"message": "Supplier performance rebuilt", "supplier_id": supplier_id}
+
 # ✅ Get one supplier
 @router.get("/{supplier_id}", response_model=SupplierOut)
 def get_supplier(supplier_id: int, db: Session = Depends(get_db)):
@@ -33,6 +70,17 @@ def get_supplier(supplier_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Supplier not found")
     return supplier
 
+# ✅ Get one supplier's delivery performance
+@router.get("/{supplier_id}/performance")
+def get_performance(supplier_id: int, db: Session = Depends(get_db)):
+    """Lead time distribution, on-time rate, fill rate and price variance over closed POs"""
+    performance = get_supplier_performance(db, supplier_id)
+    if performance is None:
+        if not db.query(Supplier).filter(Supplier.supplier_id == supplier_id).first():
+            raise HTTPException(status_code=404, detail="Supplier not found")
+        raise HTTPException(status_code=404, detail="No closed purchase orders for this supplier yet")
+    return performance
+
 # ✅ Update supplier
 @router.put("/{supplier_id}", response_model=SupplierOut)
 def update_supplier(supplier_id: int, update_data: SupplierUpdate, db: Session = Depends(get_db)):
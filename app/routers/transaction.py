@@ -1,32 +1,48 @@
 # app/routers/transaction.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.models.transaction import Transaction
 from app.models.stock import Stock
 from app.schemas.transaction import TransactionCreate, TransactionOut, TransferRequest
 from app.database import get_db
+from app.utils.responses import list_response
+from app.utils.stock_ledger import (
+    add_stock_quantity, remove_stock_quantity, stock_exists, movement, record_movements
+)
+from app.utils.stock_coalescer import stock_coalescer
 from typing import List
 
 router = APIRouter()
 
 @router.post("/", response_model=TransactionOut)
-def create_transaction(txn: TransactionCreate, db: Session = Depends(get_db)):
-    stock = db.query(Stock).filter(
-        Stock.product_id == txn.product_id,
-        Stock.warehouse_id == txn.warehouse_id
-    ).first()
-
-    if not stock:
-        raise HTTPException(status_code=404, detail="Stock entry not found")
-
-    # Adjust quantity based on transaction type
+async def create_transaction(txn: TransactionCreate, db: Session = Depends(get_db)):
+    # Hot SKUs: merge concurrent in/out movements per stock row when coalescing is enabled
+    if stock_coalescer.enabled and txn.transaction_type in ("in", "out"):
+        return await stock_coalescer.submit(txn)
+    return await run_in_threadpool(apply_transaction, txn, db)
+
+def apply_transaction(txn: TransactionCreate, db: Session):
+    # Adjust quantity based on transaction type. In/out are single conditional UPDATEs
+    # rather than a read-modify-write of the stock row.
     if txn.transaction_type == "in":
-        stock.quantity += txn.quantity
+        if not add_stock_quantity(db, txn.product_id, txn.warehouse_id, txn.quantity):
+            raise HTTPException(status_code=404, detail="Stock entry not found")
+        delta = txn.quantity
     elif txn.transaction_type == "out":
-        if stock.quantity < txn.quantity:
+        if not remove_stock_quantity(db, txn.product_id, txn.warehouse_id, txn.quantity):
+            if not stock_exists(db, txn.product_id, txn.warehouse_id):
+                raise HTTPException(status_code=404, detail="Stock entry not found")
             raise HTTPException(status_code=400, detail="Not enough stock")
-        stock.quantity -= txn.quantity
+        delta = -txn.quantity
     elif txn.transaction_type == "adjust":
+        stock = db.query(Stock).filter(
+            Stock.product_id == txn.product_id,
+            Stock.warehouse_id == txn.warehouse_id
+        ).with_for_update().first()
+        if not stock:
+            raise HTTPException(status_code=404, detail="Stock entry not found")
+        delta = txn.quantity - stock.quantity
         stock.quantity = txn.quantity
     elif txn.transaction_type == "transfer":
         raise HTTPException(status_code=501, detail="Use transfer endpoint (future)")
@@ -35,43 +51,31 @@ def create_transaction(txn: TransactionCreate, db: Session = Depends(get_db)):
 
     db_transaction = Transaction(**txn.dict())
     db.add(db_transaction)
+    db.flush()
+    record_movements(db, [movement(
+        txn.product_id, txn.warehouse_id, delta, "transaction",
+        reference_id=db_transaction.transaction_id, created_by=txn.created_by
+    )])
     db.commit()
     db.refresh(db_transaction)
-    db.commit()
     return db_transaction
 
 @router.get("/", response_model=List[TransactionOut])
 def list_transactions(db: Session = Depends(get_db)):
-    return db.query(Transaction).order_by(Transaction.created_at.desc()).all()
+    return list_response(db, Transaction, TransactionOut, order_by=Transaction.created_at.desc())
 
 ###### transfer
 
 @router.post("/transfer", response_model=List[TransactionOut])
 def transfer_stock(txn: TransferRequest, db: Session = Depends(get_db)):
-    # Step 1: Get source stock
-    from_stock = db.query(Stock).filter(
-        Stock.product_id == txn.product_id,
-        Stock.warehouse_id == txn.from_warehouse_id
-    ).first()
-
-    if not from_stock or from_stock.quantity < txn.quantity:
+    # Step 1: Take the quantity out of the source, only if enough is on hand
+    if not remove_stock_quantity(db, txn.product_id, txn.from_warehouse_id, txn.quantity):
         raise HTTPException(status_code=400, detail="Insufficient stock in source warehouse")
 
-    # Step 2: Get or create destination stock
-    to_stock = db.query(Stock).filter(
-        Stock.product_id == txn.product_id,
-        Stock.warehouse_id == txn.to_warehouse_id
-    ).first()
-
-    if not to_stock:
-        to_stock = Stock(product_id=txn.product_id, warehouse_id=txn.to_warehouse_id, quantity=0)
-        db.add(to_stock)
-
-    # Step 3: Perform the transfer
-    from_stock.quantity -= txn.quantity
-    to_stock.quantity += txn.quantity
+    # Step 2: Add it to the destination, creating the stock row if needed
+    add_stock_quantity(db, txn.product_id, txn.to_warehouse_id, txn.quantity, create=True)
 
-    # Step 4: Log both movements
+    # Step 3: Log both movements
     transfer_out = Transaction(
         product_id=txn.product_id,
         warehouse_id=txn.from_warehouse_id,
@@ -91,6 +95,13 @@ def transfer_stock(txn: TransferRequest, db: Session = Depends(get_db)):
     )
 
     db.add_all([transfer_out, transfer_in])
+    db.flush()
+    record_movements(db, [
+        movement(txn.product_id, txn.from_warehouse_id, -txn.quantity, "transfer",
+                 reference_id=transfer_out.transaction_id, created_by=txn.created_by),
+        movement(txn.product_id, txn.to_warehouse_id, txn.quantity, "transfer",
+                 reference_id=transfer_in.transaction_id, created_by=txn.created_by),
+    ])
     db.commit()
     db.refresh(transfer_out)
     db.refresh(transfer_in)
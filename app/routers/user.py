@@ -0,0 +1,45 @@
+# app/routers/user.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_db
+from app.models.user import User
+from app.schemas.user import UserOut, UserRoleUpdate
+from app.utils.permissions import ROLE_ADMIN, ROLE_PERMISSIONS, require_admin
+
+router = APIRouter(
+    prefix="/users",
+    tags=["Users"]
+)
+
+@router.get("/", response_model=List[UserOut])
+def get_users(db: Session = Depends(get_db), claims: dict = Depends(require_admin)):
+    return db.query(User).order_by(User.user_id).all()
+
+@router.put("/{user_id}/role", response_model=UserOut)
+def set_user_role(
+    user_id: int,
+    update: UserRoleUpdate,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(require_admin)
+):
+    """
+    Assign a role (1 = admin, 2 = staff) or remove it with null. The user's existing
+    tokens are revoked, so the new permissions apply from their next login.
+    """
+    if update.role_id is not None and update.role_id not in ROLE_PERMISSIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown role_id {update.role_id}")
+
+    user = db.query(User).filter(User.user_id == user_id).with_for_update().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if user.role_id == ROLE_ADMIN and update.role_id != ROLE_ADMIN:
+        admins = db.query(User).filter(User.role_id == ROLE_ADMIN).count()
+        if admins <= 1:
+            raise HTTPException(status_code=400, detail="Cannot remove the last admin")
+
+    user.role_id = update.role_id
+    db.commit()
+    db.refresh(user)
+    return user
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.product import Product
 from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem
+from app.utils.purchase_orders import record_status_changes
 from app.models.supplier import Supplier
 from app.models.warehouse import Warehouse
-from app.utils.xml_exports import generate_products_xml, generate_categories_xml, generate_purchase_orders_xml
-from app.utils.xml_imports import parse_products_xml, parse_purchase_orders_xml
-from app.utils.xml_schemas import validate_products_xml, validate_purchase_orders_xml
+from app.utils.xml_exports import generate_products_xml, stream_categories_xml, generate_purchase_orders_xml
+from app.utils.xml_imports import parse_products_xml, parse_purchase_orders_xml, parse_categories_xml
+from app.utils.xml_schemas import validate_products_xml, validate_purchase_orders_xml, validate_categories_xml
 from app.utils.dependencies import get_current_user
 from app.models.user import User
 from app.schemas.product import ProductCreate
@@ -139,17 +142,56 @@ async def import_products_xml(
 async def export_categories_xml(
     current_user: User = Depends(get_current_user)
 ):
-    """Export product categories as XML"""
+    """Export product categories as XML, streamed straight from the MongoDB cursor"""
     from app.mongodb.repositories.category_repository import CategoryRepository
     
-    categories = await CategoryRepository.get_all()
-    xml_content = await generate_categories_xml(categories)
+    count = await CategoryRepository.count()
+    cursor = CategoryRepository.export_cursor()
     
-    return Response(
-        content=xml_content,
+    return StreamingResponse(
+        stream_categories_xml(cursor, count),
         media_type="application/xml"
     )
 
+# Categories XML import endpoint
+@router.post("/categories/import")
+async def import_categories_xml(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Import product categories from XML file (parents may appear in any order)"""
+    from app.mongodb.repositories.category_repository import CategoryRepository
+    from app.utils.category_thresholds import try_sync_category_thresholds
+    
+    # Check file extension
+    if not file.filename.endswith('.xml'):
+        raise HTTPException(status_code=400, detail="File must be XML format")
+    
+    # Read the file
+    contents = await file.read()
+    xml_content = contents.decode('utf-8')
+    
+    try:
+        # Large taxonomies take seconds to validate and parse, so keep that off the event loop
+        await run_in_threadpool(validate_categories_xml, xml_content)
+        
+        # Parse XML to category dictionaries
+        categories = await run_in_threadpool(parse_categories_xml, xml_content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await CategoryRepository.bulk_import(categories, current_user.user_id)
+    
+    # Keep the SQL threshold mirror in step with the new taxonomy
+    sync = await try_sync_category_thresholds(db)
+    
+    return {
+        "message": f"Import complete. {result['created']} categories created, {result['updated']} updated, {len(result['skipped'])} skipped.",
+        **result,
+        **sync
+    }
+
 # Purchase Orders XML export endpoint
 @router.get("/purchase-orders", 
     response_class=Response,
@@ -216,6 +258,7 @@ async def import_purchase_orders_xml(
                     po_item = PurchaseOrderItem(**item_data)
                     db.add(po_item)
                 
+                record_status_changes(db, [(po.po_id, None, po.status)], po.ordered_by, "Imported from XML")
                 created_pos.append(po.po_id)
             except Exception as e:
                 skipped_pos.append(f"PO for supplier {po_data.get('supplier_id')} (Error: {str(e)})")
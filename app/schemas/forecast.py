@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import date
+
+class DemandForecastOut(BaseModel):
+    product_id: int
+    warehouse_id: int
+    model: str
+    alpha: float
+    forecast: float  # expected units per day
+    error_variance: float
+    fitted_through: date
+
+    class Config:
+        orm_mode = True
@@ -24,4 +24,17 @@ class PurchaseOrderOut(BaseModel):
     notes: Optional[str]
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class ReceiptLine(BaseModel):
+    po_item_id: int
+    quantity: int
+
+class ReceiveRequest(BaseModel):
+    lines: List[ReceiptLine]
+    received_by: Optional[int] = None
+
+class StatusTransitionRequest(BaseModel):
+    po_ids: List[int]
+    new_status: str
+    notes: Optional[str] = None
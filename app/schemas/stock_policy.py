@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class StockPolicyOut(BaseModel):
+    product_id: int
+    warehouse_id: int
+    safety_stock: int
+    reorder_point: int
+    demand_per_day: float
+    demand_std: float
+    lead_time_days: float
+    lead_time_std: float
+    calculated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class StockPolicyChangeOut(BaseModel):
+    change_id: int
+    product_id: int
+    warehouse_id: int
+    old_safety_stock: Optional[int]
+    new_safety_stock: int
+    old_reorder_point: Optional[int]
+    new_reorder_point: int
+    changed_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -1,4 +1,5 @@
 # app/schemas/user.py
+from typing import Optional
 from pydantic import BaseModel
 
 class UserCreate(BaseModel):
@@ -9,6 +10,7 @@ class UserCreate(BaseModel):
 class UserOut(BaseModel):
     user_id: int
     username: str
+    role_id: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -20,3 +22,6 @@ class Token(BaseModel):
 class UserLogin(BaseModel):
     username: str
     password: str
+
+class UserRoleUpdate(BaseModel):
+    role_id: Optional[int] = None  # None removes the user's role
@@ -0,0 +1,28 @@
+# app/utils/arrays.py
+import numpy as np
+from sqlalchemy.orm import Session
+
+def fetch_columns(db: Session, statement, params: dict, dtype=np.int64) -> np.ndarray:
+    """Run a query and return its rows as a 2-D array, one column per selected column"""
+    result = db.execute(statement, params)
+    # Every value is a number, so read plain tuples off the DBAPI cursor; building a
+    # Row per tuple costs more than the query itself at 500k rows
+    rows = result.cursor.fetchall()
+    width = len(result.keys())
+    result.close()
+    return np.array(rows, dtype=dtype).reshape(len(rows), width)
+
+def pair_keys(product_ids: np.ndarray, warehouse_ids: np.ndarray) -> np.ndarray:
+    """One int64 per (product, warehouse), ordered by product then warehouse"""
+    return (product_ids.astype(np.int64) << 32) | warehouse_ids.astype(np.int64)
+
+def attach(ids: np.ndarray, values: np.ndarray, wanted: np.ndarray, default) -> np.ndarray:
+    """The value belonging to each of wanted, where values[i] belongs to ids[i] (ids unique)"""
+    result = np.full(len(wanted), default, dtype=np.result_type(values, type(default)))
+    if len(ids) and len(wanted):
+        order = np.argsort(ids)
+        ids, values = ids[order], values[order]
+        positions = np.minimum(np.searchsorted(ids, wanted), len(ids) - 1)
+        found = ids[positions] == wanted
+        result[found] = values[positions[found]]
+    return result
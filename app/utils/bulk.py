@@ -0,0 +1,21 @@
+# app/utils/bulk.py
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+def insert_returning_ids(db: Session, model, rows: List[dict]) -> List[int]:
+    """Insert rows in one statement and return their primary keys in the order given"""
+    if not rows:
+        return []
+    primary_key = model.__mapper__.primary_key[0]
+
+    if db.bind.dialect.insert_returning:
+        return list(db.execute(
+            insert(model).returning(primary_key, sort_by_parameter_order=True),
+            rows
+        ).scalars())
+
+    # MySQL: a single multi-row INSERT gets consecutive ids starting at LAST_INSERT_ID()
+    first_id = db.execute(insert(model).values(rows)).lastrowid
+    return list(range(first_id, first_id + len(rows)))
@@ -0,0 +1,80 @@
+# app/utils/category_thresholds.py
+import logging
+from typing import Optional
+from sqlalchemy.orm import Session
+import sqlalchemy
+
+from app.mongodb.repositories.category_repository import CategoryRepository
+
+logger = logging.getLogger(__name__)
+
+async def sync_category_thresholds(db: Session, root_code: Optional[str] = None) -> dict:
+    """
+    Mirror resolved category thresholds from MongoDB into the category_thresholds table.
+    With root_code only that subtree is refreshed, otherwise the whole table is rebuilt.
+    """
+    rows = await CategoryRepository.get_effective_thresholds(root_code)
+
+    version = db.execute(sqlalchemy.text(
+        "SELECT COALESCE(MAX(version), 0) + 1 FROM category_thresholds"
+    )).scalar()
+
+    if rows:
+        db.execute(sqlalchemy.text("""
+            INSERT INTO category_thresholds
+                (category_code, min_stock_threshold, reorder_level, version, synced_at)
+            VALUES
+                (:category_code, :min_stock_threshold, :reorder_level, :version, CURRENT_TIMESTAMP)
+            ON DUPLICATE KEY UPDATE
+                min_stock_threshold = VALUES(min_stock_threshold),
+                reorder_level = VALUES(reorder_level),
+                version = VALUES(version),
+                synced_at = VALUES(synced_at)
+        """), [{**row, "version": version} for row in rows])
+
+    removed = 0
+    if root_code is None:
+        # Anything not touched by a full rebuild no longer exists in MongoDB
+        removed = db.execute(sqlalchemy.text(
+            "DELETE FROM category_thresholds WHERE version < :version"
+        ), {"version": version}).rowcount
+
+    db.commit()
+    return {"version": version, "synced": len(rows), "removed": removed}
+
+def remove_category_threshold(db: Session, category_code: str) -> None:
+    """Drop the mirrored thresholds of a deleted category"""
+    db.execute(sqlalchemy.text(
+        "DELETE FROM category_thresholds WHERE category_code = :category_code"
+    ), {"category_code": category_code})
+    db.commit()
+
+def _sync_failed(db: Session, action: str) -> dict:
+    db.rollback()
+    logger.exception("Category threshold %s failed", action)
+    return {
+        "thresholds_synced": False,
+        "threshold_sync_error": (
+            f"Category threshold {action} failed; SQL stock alerts may use stale thresholds "
+            "until POST /categories/thresholds/sync succeeds"
+        ),
+    }
+
+async def try_sync_category_thresholds(db: Session, root_code: Optional[str] = None) -> dict:
+    """
+    sync_category_thresholds for callers whose MongoDB change has already been saved: a
+    failure is logged and returned for the response instead of failing the request.
+    """
+    try:
+        await sync_category_thresholds(db, root_code)
+    except Exception:
+        return _sync_failed(db, "sync")
+    return {"thresholds_synced": True}
+
+def try_remove_category_threshold(db: Session, category_code: str) -> dict:
+    """remove_category_threshold, reporting a failure like try_sync_category_thresholds"""
+    try:
+        remove_category_threshold(db, category_code)
+    except Exception:
+        return _sync_failed(db, "removal")
+    return {"thresholds_synced": True}
@@ -1,20 +1,76 @@
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
-from app.utils.token import verify_token
+from sqlalchemy import event, inspect
+from app.utils.token import verify_token, is_revoked, revoke_user_tokens
+from app.utils.cache import TTLCache
 from app.database import get_db
 from app.models.user import User
 from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+import os
+import time
+
+load_dotenv()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Verified tokens and user principals are kept per worker so authenticated reads skip
+# the JWT decode and the users query. Entries expire after AUTH_CACHE_TTL_SECONDS, which
+# bounds how long another worker's user changes can go unnoticed.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Lightweight authenticated principal returned by get_current_user"""
+    user_id: int
+    username: str
+
+def verify_token_cached(token: str):
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
     payload = verify_token(token)
-    if not payload:
+    if payload:
+        # Never cache a token past its own expiry
+        remaining = payload.get("exp", 0) - time.time()
+        token_cache.set(token, payload, ttl=remaining)
+    return payload
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a cached principal, e.g. after the user row changed"""
+    user_cache.pop(user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_change(mapper, connection, target):
+    invalidate_user(target.user_id)
+
+    # Tokens carry the role, so a role change (or deletion) must retire the old ones
+    if inspect(target).deleted or inspect(target).attrs.role_id.history.has_changes():
+        revoke_user_tokens(target.user_id)
+
+def get_token_claims(token: str = Depends(oauth2_scheme)):
+    """Verified, unrevoked token claims; no database access"""
+    payload = verify_token_cached(token)
+    if not payload or is_revoked(payload):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
-    user = db.query(User).filter(User.user_id == payload.get("user_id")).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
+    return payload
+
+def get_current_user(payload: dict = Depends(get_token_claims), db: Session = Depends(get_db)):
+    user_id = payload.get("user_id")
+    user = user_cache.get(user_id)
+    if user is None:
+        row = db.query(User.user_id, User.username).filter(User.user_id == user_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="User not found")
+        user = CurrentUser(user_id=row.user_id, username=row.username)
+        user_cache.set(user_id, user)
+
     return user
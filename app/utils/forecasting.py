@@ -0,0 +1,326 @@
+# app/utils/forecasting.py
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+import sqlalchemy
+
+from app.database import SessionLocal
+from app.models.demand_forecast import DemandForecast
+from app.utils.arrays import fetch_columns, pair_keys
+from app.utils.job_lock import single_runner
+
+load_dotenv()
+
+# Days of outbound history a full fit looks at
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "182"))
+# Smoothing constants and model choice are refitted from history this often; in between,
+# each run only folds the newly closed days into the stored state
+FORECAST_REFIT_DAYS = int(os.getenv("FORECAST_REFIT_DAYS", "28"))
+# How often a background task in each API worker checks for closed days. Off by default:
+# forecasting is an offline job, run `python jobs.py forecasts` from cron after midnight UTC.
+FORECAST_INTERVAL_SECONDS = float(os.getenv("FORECAST_INTERVAL_SECONDS", "0"))
+# Full fits are split into chunks of series and spread over a process pool
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 1)))
+FORECAST_CHUNK_SIZE = int(os.getenv("FORECAST_CHUNK_SIZE", "5000"))
+
+# Smoothing constants tried for every series; the lowest one-day-ahead squared error wins
+ALPHAS = np.array([0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5])
+# Syntetos-Boylan cut-off: series averaging more days than this between demands are
+# intermittent and use Croston's method instead of simple exponential smoothing
+CROSTON_MIN_INTERVAL = 1.32
+# Weight of each new squared error in error_variance, about a 20-day memory
+VARIANCE_WEIGHT = 0.05
+
+def _ses(demand, alpha, level, variance):
+    """
+    Simple exponential smoothing over demand [series, days], all series at once. State
+    arrays are [series, k] with alpha broadcast against them, so k alphas can be tried
+    side by side. Returns the new level and variance and the sum of squared errors.
+    """
+    sse = np.zeros(np.broadcast(level, alpha).shape)
+    for t in range(demand.shape[1]):
+        error = demand[:, t, None] - level
+        sse += error * error
+        variance = variance + VARIANCE_WEIGHT * (error * error - variance)
+        level = level + alpha * error
+    return level, variance, sse
+
+def _croston_forecast(alpha, size, interval):
+    # Syntetos-Boylan bias correction of Croston's size / interval
+    return (1 - alpha / 2) * size / interval
+
+def _croston(demand, alpha, size, interval, since, variance):
+    """
+    Croston's method for intermittent demand, shaped like _ses: demand sizes and the
+    days between demands are smoothed separately, and only on days with demand.
+    """
+    sse = np.zeros(np.broadcast(size, alpha).shape)
+    for t in range(demand.shape[1]):
+        y = demand[:, t, None]
+        since = since + 1
+        error = y - _croston_forecast(alpha, size, interval)
+        sse += error * error
+        variance = variance + VARIANCE_WEIGHT * (error * error - variance)
+        hit = y > 0
+        size = np.where(hit, size + alpha * (y - size), size)
+        interval = np.where(hit, interval + alpha * (since - interval), interval)
+        since = np.where(hit, 0, since)
+    return size, interval, since, variance, sse
+
+def fit_series(rows: np.ndarray, days: np.ndarray, quantities: np.ndarray, n: int, t: int) -> dict:
+    """
+    Fit n series from scratch over t days of history, given as sparse (row, day, quantity)
+    triples. Picks Croston or SES per series from its demand pattern, then the alpha with
+    the lowest in-sample error. Runs in the forecast process pool.
+    """
+    demand = np.zeros((n, t))
+    demand[rows, days] = quantities
+
+    demand_days = np.count_nonzero(demand, axis=1)
+    croston = demand_days > 0
+    croston[croston] = t / demand_days[croston] > CROSTON_MIN_INTERVAL
+
+    state = {
+        "croston": croston,
+        "alpha": np.full(n, ALPHAS[0]),
+        "level": np.zeros(n),
+        "interval": np.ones(n),
+        "since": np.zeros(n),
+        "variance": demand.var(axis=1),
+    }
+    picked_rows = np.arange(n)
+
+    smooth = np.flatnonzero(~croston)
+    if len(smooth):
+        y = demand[smooth]
+        start = y[:, :7].mean(axis=1, keepdims=True)
+        level, variance, sse = _ses(y, ALPHAS, np.repeat(start, len(ALPHAS), axis=1),
+                                    np.repeat(state["variance"][smooth, None], len(ALPHAS), axis=1))
+        best = sse.argmin(axis=1)
+        picked = picked_rows[:len(smooth)], best
+        state["alpha"][smooth] = ALPHAS[best]
+        state["level"][smooth] = level[picked]
+        state["variance"][smooth] = variance[picked]
+
+    sparse = np.flatnonzero(croston)
+    if len(sparse):
+        y = demand[sparse]
+        counts = demand_days[sparse, None]
+        width = (len(sparse), len(ALPHAS))
+        size, interval, since, variance, sse = _croston(
+            y, ALPHAS,
+            np.broadcast_to(y.sum(axis=1, keepdims=True) / counts, width),
+            np.broadcast_to(t / counts, width),
+            np.zeros(width),
+            np.repeat(state["variance"][sparse, None], len(ALPHAS), axis=1),
+        )
+        best = sse.argmin(axis=1)
+        picked = picked_rows[:len(sparse)], best
+        state["alpha"][sparse] = ALPHAS[best]
+        state["level"][sparse] = size[picked]
+        state["interval"][sparse] = interval[picked]
+        state["since"][sparse] = since[picked]
+        state["variance"][sparse] = variance[picked]
+
+    return state
+
+def update_series(demand: np.ndarray, state: dict) -> dict:
+    """Fold newly closed days [series, days] into fitted state, keeping each series' alpha and model"""
+    state = {name: values.copy() for name, values in state.items()}
+    alpha = state["alpha"][:, None]
+
+    smooth = np.flatnonzero(~state["croston"])
+    if len(smooth):
+        level, variance, _ = _ses(demand[smooth], alpha[smooth],
+                                  state["level"][smooth, None], state["variance"][smooth, None])
+        state["level"][smooth] = level[:, 0]
+        state["variance"][smooth] = variance[:, 0]
+
+    sparse = np.flatnonzero(state["croston"])
+    if len(sparse):
+        size, interval, since, variance, _ = _croston(
+            demand[sparse], alpha[sparse], state["level"][sparse, None],
+            state["interval"][sparse, None], state["since"][sparse, None], state["variance"][sparse, None]
+        )
+        state["level"][sparse] = size[:, 0]
+        state["interval"][sparse] = interval[:, 0]
+        state["since"][sparse] = since[:, 0]
+        state["variance"][sparse] = variance[:, 0]
+
+    return state
+
+def _daily_outbound(db: Session, start: date, end: date) -> tuple:
+    """Daily "out" quantity per (product, warehouse) over [start, end], as (keys, day index, quantity)"""
+    result = db.execute(sqlalchemy.text("""
+        SELECT product_id, warehouse_id, DATE(created_at), SUM(quantity)
+        FROM transactions
+        WHERE transaction_type = 'out' AND created_at >= :start AND created_at < :end
+        GROUP BY product_id, warehouse_id, DATE(created_at)
+    """), {
+        "start": datetime.combine(start, datetime.min.time()),
+        "end": datetime.combine(end + timedelta(days=1), datetime.min.time()),
+    })
+    rows = result.cursor.fetchall()
+    result.close()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    product_ids, warehouse_ids, days, quantities = zip(*rows)
+    keys = pair_keys(np.array(product_ids, dtype=np.int64), np.array(warehouse_ids, dtype=np.int64))
+    day_index = (np.array(days, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+    return keys, day_index, np.array(quantities, dtype=np.float64)
+
+def _select(series_keys: np.ndarray, keys: np.ndarray, day_index: np.ndarray, quantities: np.ndarray) -> tuple:
+    """Keep the triples that belong to series_keys (sorted), mapped to their row, ordered by row"""
+    rows = np.minimum(np.searchsorted(series_keys, keys), max(len(series_keys) - 1, 0))
+    found = series_keys[rows] == keys if len(series_keys) else np.zeros(len(keys), dtype=bool)
+    order = np.argsort(rows[found], kind="stable")
+    return rows[found][order], day_index[found][order], quantities[found][order]
+
+def _fit_in_pool(n: int, t: int, rows: np.ndarray, days: np.ndarray, quantities: np.ndarray) -> dict:
+    """fit_series over n series in chunks, spread over FORECAST_WORKERS processes"""
+    chunks = []
+    for first in range(0, n, FORECAST_CHUNK_SIZE):
+        size = min(FORECAST_CHUNK_SIZE, n - first)
+        lo, hi = np.searchsorted(rows, [first, first + size])
+        chunks.append((rows[lo:hi] - first, days[lo:hi], quantities[lo:hi], size, t))
+
+    if FORECAST_WORKERS > 1 and len(chunks) > 1:
+        # spawn rather than fork: the app process has threads and open connections
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=FORECAST_WORKERS, mp_context=context) as pool:
+            results = list(pool.map(fit_series, *zip(*chunks)))
+    else:
+        results = [fit_series(*chunk) for chunk in chunks]
+
+    if not results:
+        return fit_series(rows, days, quantities, 0, t)
+    return {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+
+def refresh_forecasts(db: Session, full: bool = False, today: Optional[date] = None) -> dict:
+    """
+    Bring demand forecasts up to the last closed day (yesterday, UTC) for every stocked
+    (product, warehouse), and store them in demand_forecasts, which is what readers use.
+
+    Series already fitted only have the days since fitted_through folded into their stored
+    state, which is cheap. New series, and every series once the last full fit is
+    FORECAST_REFIT_DAYS old (or with full=True), are fitted from FORECAST_HISTORY_DAYS of
+    history in the process pool.
+
+    Runs in one process at a time, so cron, POST /forecasts/refresh and any worker loops
+    never fit the same series concurrently.
+    """
+    with single_runner(db, "demand_forecasts") as acquired:
+        if not acquired:
+            return {"skipped": "forecasts are being refreshed by another process"}
+        return _refresh_forecasts(db, full, today)
+
+def _refresh_forecasts(db: Session, full: bool, today: Optional[date]) -> dict:
+    through = (today or datetime.utcnow().date()) - timedelta(days=1)
+    now = datetime.utcnow()
+
+    stock_keys = fetch_columns(db, sqlalchemy.text("SELECT product_id, warehouse_id FROM stock"), {})
+    keys = np.unique(pair_keys(stock_keys[:, 0], stock_keys[:, 1]))
+
+    fitted_through, fitted_at = db.execute(
+        select(func.min(DemandForecast.fitted_through), func.min(DemandForecast.fitted_at))
+    ).one()
+    refit_all = full or fitted_at is None or now - fitted_at >= timedelta(days=FORECAST_REFIT_DAYS)
+
+    stored = fetch_columns(db, sqlalchemy.text("""
+        SELECT product_id, warehouse_id, CASE WHEN model = 'croston' THEN 1 ELSE 0 END,
+               alpha, level, demand_interval, days_since_demand, error_variance
+        FROM demand_forecasts
+    """), {}, dtype=np.float64)
+    stored_keys = pair_keys(stored[:, 0].astype(np.int64), stored[:, 1].astype(np.int64))
+    order = np.argsort(stored_keys)
+    stored, stored_keys = stored[order], stored_keys[order]
+
+    if refit_all:
+        fit_keys, update_keys = keys, keys[:0]
+    else:
+        has_state = np.isin(keys, stored_keys)
+        fit_keys, update_keys = keys[~has_state], keys[has_state]
+    new_days = 0 if refit_all else max((through - fitted_through).days, 0)
+    if not len(fit_keys) and not new_days:
+        return {"fitted": 0, "updated": 0, "fitted_through": fitted_through}
+
+    parts = []
+    if len(fit_keys):
+        t = FORECAST_HISTORY_DAYS
+        history = _daily_outbound(db, through - timedelta(days=t - 1), through)
+        state = _fit_in_pool(len(fit_keys), t, *_select(fit_keys, *history))
+        parts.append((fit_keys, state, now if refit_all else fitted_at))
+
+    if len(update_keys):
+        # Series that are already up to date go through with no new days, unchanged
+        demand = np.zeros((len(update_keys), new_days))
+        if new_days:
+            new = _daily_outbound(db, fitted_through + timedelta(days=1), through)
+            rows, days, quantities = _select(update_keys, *new)
+            demand[rows, days] = quantities
+        previous = stored[np.searchsorted(stored_keys, update_keys)]
+        state = update_series(demand, {
+            "croston": previous[:, 2] == 1,
+            "alpha": previous[:, 3],
+            "level": previous[:, 4],
+            "interval": previous[:, 5],
+            "since": previous[:, 6],
+            "variance": previous[:, 7],
+        })
+        parts.append((update_keys, state, fitted_at))
+
+    forecasts = []
+    for part_keys, state, part_fitted_at in parts:
+        forecast = np.where(
+            state["croston"],
+            _croston_forecast(state["alpha"], state["level"], state["interval"]),
+            state["level"]
+        )
+        columns = {
+            "product_id": (part_keys >> 32).tolist(),
+            "warehouse_id": (part_keys & 0xFFFFFFFF).tolist(),
+            "model": np.where(state["croston"], "croston", "ses").tolist(),
+            "alpha": state["alpha"].tolist(),
+            "level": state["level"].tolist(),
+            "demand_interval": state["interval"].tolist(),
+            "days_since_demand": state["since"].astype(np.int64).tolist(),
+            "forecast": np.maximum(forecast, 0).tolist(),
+            "error_variance": state["variance"].tolist(),
+        }
+        forecasts.extend(
+            dict(zip(columns, values), fitted_through=through, fitted_at=part_fitted_at)
+            for values in zip(*columns.values())
+        )
+
+    # Replace the whole table in one transaction; readers keep seeing the previous
+    # forecasts until it commits. Pairs no longer stocked drop out.
+    db.query(DemandForecast).delete(synchronize_session=False)
+    if forecasts:
+        db.execute(insert(DemandForecast), forecasts)
+    db.commit()
+    return {"fitted": len(fit_keys), "updated": len(update_keys) if new_days else 0, "fitted_through": through}
+
+async def run_forecast_loop() -> None:
+    """Refresh forecasts every FORECAST_INTERVAL_SECONDS; a run is a no-op until a new day closes"""
+    while True:
+        await asyncio.sleep(FORECAST_INTERVAL_SECONDS)
+        db = SessionLocal()
+        try:
+            result = await run_in_threadpool(refresh_forecasts, db)
+            if result.get("fitted") or result.get("updated"):
+                print(f"Demand forecasts refreshed: {result}")
+        except Exception as e:
+            print(f"Error refreshing demand forecasts: {e}")
+            db.rollback()
+        finally:
+            db.close()
@@ -0,0 +1,276 @@
+# app/utils/idempotency.py
+import asyncio
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.cache import TTLCache
+from app.utils.token import verify_token
+
+load_dotenv()
+
+# How long a stored response is replayed for; rows past it are pruned in the background
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_PRUNE_INTERVAL_SECONDS = float(os.getenv("IDEMPOTENCY_PRUNE_INTERVAL_SECONDS", "3600"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# How long a reservation holds its key while the request runs. Keep it a little above the
+# longest a request can take (the proxy or gunicorn timeout): past it, the request is
+# taken to have died without storing a response, and a retry runs it again.
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "90"))
+
+@dataclass(frozen=True)
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    content_type: Optional[str]
+    body: bytes
+
+# Completed responses, so a retry is answered from memory without a database round trip
+response_cache = TTLCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL_SECONDS)
+
+def _digest(*parts: bytes) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def new_lease() -> datetime:
+    # Whole seconds, so the value compares equal after a round trip through DATETIME
+    return datetime.utcnow().replace(microsecond=0) + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)
+
+def reserve_key(key_hash: str, request_hash: str, lease: datetime):
+    """
+    Claim a key before running the request, holding it until lease. Returns None if it was
+    free, or its previous holder's lease has passed without a response being stored;
+    otherwise the existing row's outcome: a StoredResponse, or "in_progress" while the
+    first request runs.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+        db.add(IdempotencyKey(
+            key_hash=key_hash,
+            request_hash=request_hash,
+            reserved_until=lease,
+            expires_at=expires_at
+        ))
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+
+        existing = db.query(IdempotencyKey).filter(IdempotencyKey.key_hash == key_hash).first()
+        if existing is None or existing.expires_at <= now:
+            # Expired (or pruned in between): start over with a fresh reservation
+            db.query(IdempotencyKey).filter(IdempotencyKey.key_hash == key_hash).delete()
+            db.commit()
+            return reserve_key(key_hash, request_hash, lease)
+        if existing.status_code is None:
+            if existing.reserved_until is not None and existing.reserved_until > now:
+                return "in_progress"
+            # The holder died without storing or releasing; take the key over, unless
+            # another retry got there first
+            taken = db.query(IdempotencyKey).filter(
+                IdempotencyKey.key_hash == key_hash,
+                IdempotencyKey.status_code.is_(None),
+                IdempotencyKey.reserved_until == existing.reserved_until
+            ).update({
+                IdempotencyKey.request_hash: request_hash,
+                IdempotencyKey.reserved_until: lease,
+                IdempotencyKey.expires_at: expires_at,
+            }, synchronize_session=False)
+            db.commit()
+            return None if taken else "in_progress"
+        return StoredResponse(existing.request_hash, existing.status_code,
+                              existing.content_type, existing.response_body)
+    finally:
+        db.close()
+
+def complete_key(key_hash: str, lease: datetime, response: StoredResponse) -> bool:
+    """Store the response, unless the reservation outlived its lease and was taken over"""
+    db = SessionLocal()
+    try:
+        stored = db.query(IdempotencyKey).filter(
+            IdempotencyKey.key_hash == key_hash,
+            IdempotencyKey.reserved_until == lease
+        ).update({
+            IdempotencyKey.status_code: response.status_code,
+            IdempotencyKey.content_type: response.content_type,
+            IdempotencyKey.response_body: response.body,
+            IdempotencyKey.reserved_until: None,
+        }, synchronize_session=False)
+        db.commit()
+        return stored > 0
+    finally:
+        db.close()
+
+def release_key(key_hash: str, lease: datetime) -> None:
+    """Forget a reservation whose request failed, so the client can retry it"""
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.key_hash == key_hash,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.reserved_until == lease
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def prune_expired_keys() -> int:
+    db = SessionLocal()
+    try:
+        pruned = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return pruned
+    finally:
+        db.close()
+
+async def run_prune_loop() -> None:
+    """Delete expired keys every IDEMPOTENCY_PRUNE_INTERVAL_SECONDS for the life of the app"""
+    while True:
+        await asyncio.sleep(IDEMPOTENCY_PRUNE_INTERVAL_SECONDS)
+        try:
+            pruned = await run_in_threadpool(prune_expired_keys)
+            if pruned:
+                print(f"Pruned {pruned} expired idempotency keys")
+        except Exception as e:
+            print(f"Error pruning idempotency keys: {e}")
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response for POST requests that repeat an Idempotency-Key header,
+    instead of running the mutation again. Only the configured paths are covered, and
+    requests without the header pass straight through.
+
+    - A retry of a completed request gets the original status and body back, with an
+      Idempotent-Replayed header.
+    - A retry while the first attempt is still running gets 409, until the attempt's
+      lease (IDEMPOTENCY_LEASE_SECONDS) runs out; after that the retry runs instead.
+    - Reusing a key with a different body gets 422.
+    - Only 2xx responses are stored. Anything else (a 401 from an expired token, a 422,
+      a 5xx) releases the key, so the request can be retried once the cause is fixed.
+    - Keys are scoped to the caller's token user, so one user's key never replays
+      another user's response.
+    """
+
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = [re.compile(path) for path in paths]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+
+        key = None
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"idempotency-key":
+                key = value
+            elif name == b"authorization":
+                authorization = value
+        if key is None or not any(path.fullmatch(scope["path"]) for path in self.paths):
+            return await self.app(scope, receive, send)
+
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return await self._send(send, 400, b'{"detail":"Invalid Idempotency-Key header"}')
+
+        body = await self._read_body(receive)
+        key_hash = _digest(b"POST", scope["path"].encode(), self._principal(authorization), key)
+        request_hash = _digest(body)
+
+        lease = new_lease()
+        stored = response_cache.get(key_hash)
+        if stored is None:
+            stored = await run_in_threadpool(reserve_key, key_hash, request_hash, lease)
+            if stored == "in_progress":
+                return await self._send(send, 409, b'{"detail":"A request with this Idempotency-Key is still in progress"}')
+            if stored is not None:
+                response_cache.set(key_hash, stored)
+
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                return await self._send(send, 422, b'{"detail":"Idempotency-Key was already used with a different request"}')
+            return await self._send(send, stored.status_code, stored.body, stored.content_type, replayed=True)
+
+        await self._run_and_store(scope, receive, send, body, key_hash, request_hash, lease)
+
+    @staticmethod
+    def _principal(authorization: Optional[bytes]) -> bytes:
+        """The token's user, or nothing for requests the endpoint will reject anyway"""
+        if not authorization or not authorization.lower().startswith(b"bearer "):
+            return b""
+        payload = verify_token(authorization[7:].strip().decode("latin-1"))
+        if not payload:
+            return b""
+        return str(payload.get("user_id", payload.get("sub", ""))).encode()
+
+    async def _run_and_store(self, scope, receive, send, body, key_hash, request_hash, lease):
+        status_code = 500
+        content_type = None
+        chunks = []
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture_send(message):
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", []):
+                    if name == b"content-type":
+                        content_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        finally:
+            if 200 <= status_code < 300:
+                stored = StoredResponse(request_hash, status_code, content_type, b"".join(chunks))
+                if await run_in_threadpool(complete_key, key_hash, lease, stored):
+                    response_cache.set(key_hash, stored)
+            else:
+                await run_in_threadpool(release_key, key_hash, lease)
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _send(send, status_code: int, body: bytes, content_type: Optional[str] = "application/json",
+                    replayed: bool = False) -> None:
+        headers = [(b"content-length", str(len(body)).encode())]
+        if content_type:
+            headers.append((b"content-type", content_type.encode("latin-1")))
+        if replayed:
+            headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
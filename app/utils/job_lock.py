@@ -0,0 +1,29 @@
+# app/utils/job_lock.py
+from contextlib import contextmanager
+
+import sqlalchemy
+from sqlalchemy.orm import Session
+
+@contextmanager
+def single_runner(db: Session, name: str):
+    """
+    Yields True if this process holds the named MySQL lock (GET_LOCK with no wait), False
+    if another worker, cron run or request already has it. The lock lives on its own
+    connection from db's engine, so it is held across the job's commits and released if
+    the process dies.
+
+    Other databases (SQLite in the benchmarks) run in a single process and always get it.
+    """
+    bind = db.get_bind()
+    engine = getattr(bind, "engine", bind)
+    with engine.connect() as conn:
+        if conn.dialect.name != "mysql":
+            yield True
+            return
+
+        acquired = conn.execute(sqlalchemy.text("SELECT GET_LOCK(:name, 0)"), {"name": name}).scalar() == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(sqlalchemy.text("SELECT RELEASE_LOCK(:name)"), {"name": name})
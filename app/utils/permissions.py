@@ -1,12 +1,48 @@
 from fastapi import Depends, HTTPException
-from app.utils.dependencies import get_current_user
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.utils.dependencies import get_token_claims
 
-def require_admin(user = Depends(get_current_user)):
-    if user.role_id != 1:
+ROLE_ADMIN = 1
+ROLE_STAFF = 2
+
+# Permissions granted by each role. They are embedded in the access token at login for
+# clients to read, but the staff and admin checks below go by the user's current role, so
+# a demotion applies at once. A user without a role (role_id NULL, e.g. just registered)
+# can use every endpoint that only needs a login; admins assign roles with
+# PUT /users/{user_id}/role.
+ROLE_PERMISSIONS = {
+    ROLE_ADMIN: ["admin", "staff"],
+    ROLE_STAFF: ["staff"],
+}
+
+def permissions_for_role(role_id):
+    return ROLE_PERMISSIONS.get(role_id, [])
+
+def get_privileged_claims(claims: dict = Depends(get_token_claims), db: Session = Depends(get_db)):
+    """
+    Token claims with perms from the user's current role, after checking the token against
+    the shared logout list. The revocation cache behind get_token_claims lives in each
+    worker, so without this a logout or role change made through one worker would not reach
+    the others until the token expired. One primary-key query per staff or admin request.
+    """
+    row = db.query(
+        User.role_id,
+        exists().where(RevokedToken.jti == claims.get("jti")).label("revoked")
+    ).filter(User.user_id == claims.get("user_id")).first()
+    if row is None or row.revoked:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return {**claims, "role_id": row.role_id, "perms": permissions_for_role(row.role_id)}
+
+def require_admin(claims: dict = Depends(get_privileged_claims)):
+    if "admin" not in claims.get("perms", []):
         raise HTTPException(status_code=403, detail="Admins only")
-    return user
+    return claims
 
-def require_staff(user = Depends(get_current_user)):
-    if user.role_id not in [1, 2]:
+def require_staff(claims: dict = Depends(get_privileged_claims)):
+    if "staff" not in claims.get("perms", []):
         raise HTTPException(status_code=403, detail="Admin or staff only")
-    return user
+    return claims
@@ -0,0 +1,147 @@
+# app/utils/purchase_orders.py
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem, POStatusHistory
+from app.schemas.purchase_order import PurchaseOrderCreate
+from app.utils.bulk import insert_returning_ids
+from app.utils.supplier_performance import CLOSED_STATUSES, record_closed_orders
+
+# Status transitions a PO may make; received and cancelled are terminal. Goods can arrive
+# before a PO was marked approved or shipped, so every open state can become received.
+PO_TRANSITIONS = {
+    "pending": ("approved", "received", "cancelled"),
+    "approved": ("shipped", "received", "cancelled"),
+    "shipped": ("received", "cancelled"),
+    "received": (),
+    "cancelled": (),
+}
+
+# A PO only becomes received by receiving its lines (app/utils/receiving.py), which books
+# the stock, the ledger and received_quantity; the status endpoints can't set it
+RECEIVED_STATUS = "received"
+
+# Orders in these states can still take deliveries
+RECEIVABLE_STATUSES = tuple(status for status, targets in PO_TRANSITIONS.items() if RECEIVED_STATUS in targets)
+
+def allowed_transitions(status: str) -> tuple:
+    """Statuses the status endpoints may move a PO in this status to"""
+    return tuple(target for target in PO_TRANSITIONS.get(status, ()) if target != RECEIVED_STATUS)
+
+def po_header(po_data: PurchaseOrderCreate) -> dict:
+    return {
+        "supplier_id": po_data.supplier_id,
+        "ordered_by": po_data.ordered_by or 1,  # Default to user ID 1 if not provided
+        "expected_delivery": po_data.expected_delivery,
+        "notes": po_data.notes,
+        "order_date": date.today(),
+        "status": "pending"  # Ensure status is set
+    }
+
+def po_item_rows(po_id: int, po_data: PurchaseOrderCreate) -> List[dict]:
+    return [
+        {
+            "po_id": po_id,
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "unit_cost": item.unit_cost,
+            "warehouse_id": item.warehouse_id or 1  # Default warehouse
+        }
+        for item in po_data.items
+    ]
+
+def record_status_changes(db: Session, changes: Iterable[Tuple[int, Optional[str], str]],
+                          changed_by: Optional[int], notes: Optional[str] = None) -> None:
+    """
+    Write po_status_history rows for (po_id, old_status, new_status) transitions with one
+    executemany. Call it in the transaction that changes the statuses; the caller commits.
+    """
+    rows = [
+        {"po_id": po_id, "old_status": old_status, "new_status": new_status,
+         "changed_by": changed_by, "notes": notes}
+        for po_id, old_status, new_status in changes
+        if old_status != new_status
+    ]
+    if rows:
+        db.execute(insert(POStatusHistory), rows)
+
+def create_purchase_orders(db: Session, orders: List[PurchaseOrderCreate]) -> List[dict]:
+    """
+    Insert many purchase orders: one multi-row INSERT for the headers and one executemany
+    for all their items, however many orders there are. The caller commits.
+    Returns the header rows with their po_id.
+    """
+    if not orders:
+        return []
+
+    headers = [po_header(po_data) for po_data in orders]
+    po_ids = insert_returning_ids(db, PurchaseOrder, headers)
+
+    item_rows = [row for po_id, po_data in zip(po_ids, orders) for row in po_item_rows(po_id, po_data)]
+    if item_rows:
+        db.execute(insert(PurchaseOrderItem), item_rows)
+
+    # Each PO's history starts with its creation
+    db.execute(insert(POStatusHistory), [
+        {"po_id": po_id, "old_status": None, "new_status": header["status"],
+         "changed_by": header["ordered_by"], "notes": "Purchase order created"}
+        for po_id, header in zip(po_ids, headers)
+    ])
+
+    return [{**header, "po_id": po_id} for po_id, header in zip(po_ids, headers)]
+
+def transition_purchase_orders(db: Session, po_ids: List[int], new_status: str,
+                               changed_by: Optional[int], notes: Optional[str] = None) -> dict:
+    """
+    Move POs to new_status where PO_TRANSITIONS allows it, however many there are, with
+    one conditional UPDATE ... WHERE status IN (...). POs that are missing or can't make the
+    transition are left alone and reported as rejected with their current status. History
+    rows and supplier performance totals are written in the same transaction; the caller
+    commits.
+    """
+    if new_status == RECEIVED_STATUS:
+        raise HTTPException(
+            status_code=400,
+            detail="Purchase orders become received by receiving them: "
+                   "POST /purchase-orders/receive or /purchase-orders/{po_id}/receive"
+        )
+    if new_status not in PO_TRANSITIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status. Must be one of: {', '.join(PO_TRANSITIONS)}"
+        )
+    sources = [status for status, targets in PO_TRANSITIONS.items() if new_status in targets]
+    po_ids = sorted(set(po_ids))
+
+    # Lock the movable POs in id order, as receiving does, so the history gets the status
+    # each one actually left
+    movable = db.query(PurchaseOrder.po_id, PurchaseOrder.status).filter(
+        PurchaseOrder.po_id.in_(po_ids), PurchaseOrder.status.in_(sources)
+    ).order_by(PurchaseOrder.po_id).with_for_update().all()
+    moved = [po.po_id for po in movable]
+
+    if moved:
+        db.execute(
+            update(PurchaseOrder)
+            .where(PurchaseOrder.po_id.in_(moved), PurchaseOrder.status.in_(sources))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        record_status_changes(db, [(po.po_id, po.status, new_status) for po in movable], changed_by, notes)
+        if new_status in CLOSED_STATUSES:
+            record_closed_orders(db, moved)
+
+    rejected_ids = sorted(set(po_ids) - set(moved))
+    current = dict(db.query(PurchaseOrder.po_id, PurchaseOrder.status).filter(
+        PurchaseOrder.po_id.in_(rejected_ids)
+    ).all()) if rejected_ids else {}
+
+    return {
+        "new_status": new_status,
+        "moved": moved,
+        "rejected": [{"po_id": po_id, "status": current.get(po_id)} for po_id in rejected_ids],
+    }
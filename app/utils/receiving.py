@@ -0,0 +1,144 @@
+# app/utils/receiving.py
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, insert, update
+from sqlalchemy.orm import Session
+import sqlalchemy
+
+from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem
+from app.models.transaction import Transaction
+from app.utils.stock_ledger import movement, record_movements
+from app.utils.purchase_orders import record_status_changes, RECEIVABLE_STATUSES, RECEIVED_STATUS
+from app.utils.supplier_performance import record_closed_orders
+
+def receive_into_stock(db: Session, lines: Iterable[Tuple[int, int, int, int]],
+                       created_by: Optional[int] = None) -> int:
+    """
+    Book received goods into stock, set-based. lines are (po_id, product_id, warehouse_id,
+    quantity) and may repeat keys; the caller holds the PO locks and commits.
+
+    Quantities are summed per (product, warehouse) and applied with one
+    INSERT ... ON DUPLICATE KEY UPDATE on the unique (product_id, warehouse_id) index,
+    which also creates missing stock rows. Each (PO, product, warehouse) gets one "in"
+    transaction and one ledger entry, both written as multi-row INSERTs, so the number
+    of round trips doesn't grow with the number of lines.
+    """
+    per_po = defaultdict(int)
+    for po_id, product_id, warehouse_id, quantity in lines:
+        if quantity:
+            per_po[(po_id, product_id, warehouse_id)] += quantity
+    if not per_po:
+        return 0
+
+    per_stock = defaultdict(int)
+    for (_, product_id, warehouse_id), quantity in per_po.items():
+        per_stock[(product_id, warehouse_id)] += quantity
+
+    db.execute(sqlalchemy.text("""
+        INSERT INTO stock (product_id, warehouse_id, quantity)
+        VALUES (:product_id, :warehouse_id, :quantity)
+        ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)
+    """), [
+        {"product_id": product_id, "warehouse_id": warehouse_id, "quantity": quantity}
+        for (product_id, warehouse_id), quantity in per_stock.items()
+    ])
+
+    db.execute(insert(Transaction), [
+        {
+            "product_id": product_id,
+            "warehouse_id": warehouse_id,
+            "transaction_type": "in",
+            "quantity": quantity,
+            "note": f"Received on PO #{po_id}",
+            "created_by": created_by,
+        }
+        for (po_id, product_id, warehouse_id), quantity in per_po.items()
+    ])
+
+    record_movements(db, [
+        movement(product_id, warehouse_id, quantity, "receipt", reference_id=po_id, created_by=created_by)
+        for (po_id, product_id, warehouse_id), quantity in per_po.items()
+    ])
+    return len(per_stock)
+
+def receive_po_lines(db: Session, quantities: Dict[int, int], created_by: Optional[int] = None) -> dict:
+    """
+    Receive quantities against PO lines ({po_item_id: quantity}), possibly across many POs,
+    in one transaction. Received-to-date is tracked per line, and a PO becomes "received"
+    once every line is complete. Rejects the whole request if any line is unknown, belongs
+    to a PO that can't take deliveries, or would be received beyond the ordered quantity.
+    """
+    quantities = {po_item_id: quantity for po_item_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        raise HTTPException(status_code=400, detail="No quantities to receive")
+    if any(quantity < 0 for quantity in quantities.values()):
+        raise HTTPException(status_code=400, detail="Received quantities must be positive")
+
+    items = db.query(
+        PurchaseOrderItem.po_item_id,
+        PurchaseOrderItem.po_id,
+        PurchaseOrderItem.product_id,
+        PurchaseOrderItem.warehouse_id,
+        PurchaseOrderItem.quantity,
+        PurchaseOrderItem.received_quantity
+    ).filter(PurchaseOrderItem.po_item_id.in_(list(quantities))).all()
+
+    missing = set(quantities) - {item.po_item_id for item in items}
+    if missing:
+        raise HTTPException(status_code=404, detail=f"PO lines not found: {sorted(missing)}")
+
+    # Lock the POs in id order (so concurrent batches can't deadlock), then re-read the
+    # lines under the lock in case another receipt got there first
+    po_ids = sorted({item.po_id for item in items})
+    pos = db.query(PurchaseOrder.po_id, PurchaseOrder.status).filter(
+        PurchaseOrder.po_id.in_(po_ids)
+    ).order_by(PurchaseOrder.po_id).with_for_update().all()
+
+    closed = [po.po_id for po in pos if po.status not in RECEIVABLE_STATUSES]
+    if closed:
+        raise HTTPException(status_code=400, detail=f"Purchase orders can't be received: {closed}")
+
+    received = dict(db.query(PurchaseOrderItem.po_item_id, PurchaseOrderItem.received_quantity).filter(
+        PurchaseOrderItem.po_item_id.in_(list(quantities))
+    ).all())
+    over = [item.po_item_id for item in items
+            if received[item.po_item_id] + quantities[item.po_item_id] > item.quantity]
+    if over:
+        raise HTTPException(status_code=400, detail=f"Received quantity exceeds ordered quantity on PO lines: {over}")
+
+    db.execute(
+        update(PurchaseOrderItem)
+        .where(PurchaseOrderItem.po_item_id.in_(list(quantities)))
+        .values(received_quantity=PurchaseOrderItem.received_quantity + case(
+            quantities, value=PurchaseOrderItem.po_item_id
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
+    receive_into_stock(db, [
+        (item.po_id, item.product_id, item.warehouse_id, quantities[item.po_item_id]) for item in items
+    ], created_by=created_by)
+
+    # POs whose lines are now all complete
+    completed = [row.po_id for row in db.query(PurchaseOrderItem.po_id).filter(
+        PurchaseOrderItem.po_id.in_(po_ids)
+    ).group_by(PurchaseOrderItem.po_id).having(
+        func.sum(case((PurchaseOrderItem.received_quantity < PurchaseOrderItem.quantity, 1), else_=0)) == 0
+    ).all()]
+    if completed:
+        db.query(PurchaseOrder).filter(PurchaseOrder.po_id.in_(completed)).update(
+            {PurchaseOrder.status: RECEIVED_STATUS}, synchronize_session=False
+        )
+        old_status = {po.po_id: po.status for po in pos}
+        record_status_changes(db, [(po_id, old_status[po_id], RECEIVED_STATUS) for po_id in completed],
+                              created_by, "All lines received")
+        record_closed_orders(db, completed)
+
+    db.commit()
+    return {
+        "lines_received": len(quantities),
+        "purchase_orders": po_ids,
+        "completed": completed,
+    }
@@ -0,0 +1,194 @@
+# app/utils/replenishment.py
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+import sqlalchemy
+
+from app.schemas.purchase_order import POItemCreate, PurchaseOrderCreate
+from app.utils.arrays import attach, fetch_columns, pair_keys
+from app.utils.purchase_orders import create_purchase_orders
+from app.utils.receiving import RECEIVABLE_STATUSES
+
+load_dotenv()
+
+# Outbound velocity is the average daily "out" quantity over this many days
+REPLENISHMENT_VELOCITY_DAYS = int(os.getenv("REPLENISHMENT_VELOCITY_DAYS", "28"))
+# Lead time for suppliers without recent POs to learn it from
+REPLENISHMENT_LEAD_TIME_DAYS = int(os.getenv("REPLENISHMENT_LEAD_TIME_DAYS", "7"))
+# How far back supplier POs are used to estimate their lead time
+REPLENISHMENT_LEAD_TIME_HISTORY_DAYS = int(os.getenv("REPLENISHMENT_LEAD_TIME_HISTORY_DAYS", "180"))
+# An order covers demand until the next planning run, on top of the lead time
+REPLENISHMENT_REVIEW_DAYS = int(os.getenv("REPLENISHMENT_REVIEW_DAYS", "7"))
+
+def supplier_lead_times(db: Session, as_of: date) -> tuple:
+    """
+    Average promised lead time (expected_delivery - order_date) per supplier, in days,
+    from POs placed in the last REPLENISHMENT_LEAD_TIME_HISTORY_DAYS.
+    Returns (supplier_ids, lead_days) arrays.
+    """
+    since = as_of - timedelta(days=REPLENISHMENT_LEAD_TIME_HISTORY_DAYS)
+    rows = db.execute(sqlalchemy.text("""
+        SELECT supplier_id, order_date, expected_delivery
+        FROM purchase_orders
+        WHERE supplier_id IS NOT NULL
+          AND order_date >= :since
+          AND expected_delivery IS NOT NULL
+          AND status <> 'cancelled'
+    """), {"since": since}).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    suppliers, ordered, expected = zip(*rows)
+    suppliers = np.array(suppliers, dtype=np.int64)
+    days = (np.array(expected, dtype="datetime64[D]") - np.array(ordered, dtype="datetime64[D]")).astype(np.float64)
+    supplier_ids, group = np.unique(suppliers, return_inverse=True)
+    lead_days = np.bincount(group, weights=np.maximum(days, 0)) / np.bincount(group)
+    return supplier_ids, lead_days
+
+def build_plan(db: Session, supplier_id: Optional[int] = None, warehouse_id: Optional[int] = None,
+               as_of: Optional[datetime] = None) -> dict:
+    """
+    Propose purchase orders for every stocked (product, warehouse) pair, grouped by supplier.
+
+    Each input is loaded with one set-based query and the plan is array arithmetic over
+    all pairs at once:
+        projected  = on_hand + on_order - velocity * lead_time
+        order when projected <= reorder_level, for
+        quantity   = reorder_level + velocity * (lead_time + review_days) - on_hand - on_order
+    so a pair that is short orders enough to end the next review period at its reorder level.
+    on_order is what is still outstanding on open PO lines, so running the plan again after
+    committing it proposes nothing new.
+    """
+    as_of = as_of or datetime.utcnow()
+
+    # Stock rows are the pairs being planned
+    product_ids, warehouse_ids, on_hand = fetch_columns(db, sqlalchemy.text("""
+        SELECT product_id, warehouse_id, quantity
+        FROM stock
+        WHERE (:warehouse_id IS NULL OR warehouse_id = :warehouse_id)
+    """), {"warehouse_id": warehouse_id}).T
+    keys = pair_keys(product_ids, warehouse_ids)
+    order = np.argsort(keys)
+    keys, product_ids, warehouse_ids, on_hand = keys[order], product_ids[order], warehouse_ids[order], on_hand[order]
+
+    # Outstanding quantity on open purchase order lines
+    po_products, po_warehouses, po_open = fetch_columns(db, sqlalchemy.text("""
+        SELECT i.product_id, i.warehouse_id, SUM(i.quantity - i.received_quantity)
+        FROM purchase_order_items i
+        JOIN purchase_orders po ON po.po_id = i.po_id
+        WHERE po.status IN :status_list
+        GROUP BY i.product_id, i.warehouse_id
+    """).bindparams(bindparam("status_list", expanding=True)),
+        {"status_list": list(RECEIVABLE_STATUSES)}).T
+    on_order = np.maximum(attach(pair_keys(po_products, po_warehouses), po_open, keys, 0), 0)
+
+    # Average daily outbound quantity
+    out_products, out_warehouses, out_quantity = fetch_columns(db, sqlalchemy.text("""
+        SELECT product_id, warehouse_id, SUM(quantity)
+        FROM transactions
+        WHERE transaction_type = 'out' AND created_at >= :since
+        GROUP BY product_id, warehouse_id
+    """), {"since": as_of - timedelta(days=REPLENISHMENT_VELOCITY_DAYS)}).T
+    velocity = attach(pair_keys(out_products, out_warehouses), out_quantity, keys, 0) / REPLENISHMENT_VELOCITY_DAYS
+
+    # Per-product attributes, broadcast onto the pairs
+    catalogue = fetch_columns(db, sqlalchemy.text("""
+        SELECT product_id, COALESCE(supplier_id, 0), COALESCE(reorder_level, 0), COALESCE(unit_cost, 0)
+        FROM products
+    """), {}, dtype=np.float64)
+    catalogue_ids, suppliers, reorder_levels = catalogue[:, :3].astype(np.int64).T
+    unit_costs = catalogue[:, 3]
+    pair_suppliers = attach(catalogue_ids, suppliers, product_ids, 0)
+    reorder_level = attach(catalogue_ids, reorder_levels, product_ids, 0)
+    unit_cost = attach(catalogue_ids, unit_costs, product_ids, 0.0)
+
+    # Where the policy job has calculated a safety stock for the pair, it replaces the
+    # product's static reorder level (see app/utils/stock_policies.py)
+    policies = fetch_columns(db, sqlalchemy.text(
+        "SELECT product_id, warehouse_id, safety_stock FROM stock_policies"
+    ), {})
+    policy_keys = pair_keys(policies[:, 0], policies[:, 1])
+    has_policy = np.isin(keys, policy_keys)
+    reorder_level[has_policy] = attach(policy_keys, policies[:, 2], keys[has_policy], 0)
+
+    lead_supplier_ids, lead_days = supplier_lead_times(db, as_of.date())
+    lead_time = attach(lead_supplier_ids, lead_days, pair_suppliers, float(REPLENISHMENT_LEAD_TIME_DAYS))
+
+    projected = on_hand + on_order - velocity * lead_time
+    quantity = np.ceil(reorder_level + velocity * (lead_time + REPLENISHMENT_REVIEW_DAYS) - on_hand - on_order)
+    short = (projected <= reorder_level) & (quantity > 0)
+
+    unassigned = int(np.count_nonzero(short & (pair_suppliers == 0)))
+    short &= pair_suppliers != 0
+    if supplier_id is not None:
+        short &= pair_suppliers == supplier_id
+
+    # Order lines by supplier, then split into one PO per supplier
+    lines = np.flatnonzero(short)
+    lines = lines[np.argsort(pair_suppliers[lines], kind="stable")]
+    line_suppliers = pair_suppliers[lines]
+    boundaries = np.flatnonzero(np.diff(line_suppliers)) + 1
+    starts = np.concatenate(([0], boundaries)) if len(lines) else np.empty(0, dtype=np.int64)
+    ends = np.concatenate((boundaries, [len(lines)])) if len(lines) else np.empty(0, dtype=np.int64)
+
+    columns = {
+        "product_id": product_ids[lines].tolist(),
+        "warehouse_id": warehouse_ids[lines].tolist(),
+        "quantity": quantity[lines].astype(np.int64).tolist(),
+        "unit_cost": unit_cost[lines].tolist(),
+        "on_hand": on_hand[lines].tolist(),
+        "on_order": on_order[lines].tolist(),
+        "daily_velocity": np.round(velocity[lines], 3).tolist(),
+        "projected_on_hand": np.round(projected[lines], 3).tolist(),
+        "reorder_level": reorder_level[lines].tolist(),
+    }
+    items = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    line_costs = quantity[lines] * unit_cost[lines]
+
+    purchase_orders = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        supplier_lead_time = float(lead_time[lines[start]])
+        purchase_orders.append({
+            "supplier_id": int(line_suppliers[start]),
+            "lead_time_days": round(supplier_lead_time, 1),
+            "expected_delivery": (as_of + timedelta(days=supplier_lead_time)).date(),
+            "total_cost": round(float(line_costs[start:end].sum()), 2),
+            "items": items[start:end],
+        })
+
+    return {
+        "generated_at": as_of,
+        "pairs_evaluated": len(keys),
+        "lines": len(lines),
+        "unassigned_lines": unassigned,  # short, but the product has no supplier
+        "purchase_orders": purchase_orders,
+    }
+
+def commit_plan(db: Session, plan: dict, ordered_by: Optional[int] = None) -> list:
+    """Create the plan's purchase orders in one transaction with the batch PO insert"""
+    orders = [
+        PurchaseOrderCreate(
+            supplier_id=proposal["supplier_id"],
+            ordered_by=ordered_by,
+            expected_delivery=proposal["expected_delivery"],
+            notes=f"Replenishment plan {plan['generated_at']:%Y-%m-%d %H:%M}",
+            items=[
+                POItemCreate(
+                    product_id=item["product_id"],
+                    warehouse_id=item["warehouse_id"],
+                    quantity=item["quantity"],
+                    unit_cost=item["unit_cost"],
+                )
+                for item in proposal["items"]
+            ],
+        )
+        for proposal in plan["purchase_orders"]
+    ]
+    created = create_purchase_orders(db, orders)
+    db.commit()
+    return created
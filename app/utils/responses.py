@@ -0,0 +1,59 @@
+# app/utils/responses.py
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.engine import Row, RowMapping
+from sqlalchemy.orm import Session
+
+def _default(obj: Any):
+    """Fallback for types orjson doesn't handle natively (datetime/date/UUID are native)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        # Same rule as FastAPI's jsonable_encoder: whole numbers stay ints
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    if isinstance(obj, Row):
+        return obj._asdict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes in a single pass"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson, understanding ObjectId, Decimal and SQLAlchemy rows"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+@lru_cache(maxsize=None)
+def _schema_columns(model, schema: Type[BaseModel]) -> tuple:
+    """Field names of an output schema and the matching model columns, resolved once per pair"""
+    keys = tuple(schema.model_fields)
+    return keys, tuple(getattr(model, key) for key in keys)
+
+def list_response(db: Session, model, schema: Type[BaseModel], *criteria, order_by=None) -> Response:
+    """
+    Fast path for large list endpoints.
+    Selects only the schema's columns as plain tuples and encodes them straight to JSON,
+    skipping ORM objects and per-row Pydantic validation. Keep response_model on the route
+    so the OpenAPI schema is unchanged; FastAPI passes a returned Response through as-is.
+    """
+    keys, columns = _schema_columns(model, schema)
+    statement = select(*columns).where(*criteria)
+    if order_by is not None:
+        statement = statement.order_by(order_by)
+
+    rows = db.execute(statement).all()
+    return Response(
+        content=dumps([dict(zip(keys, row)) for row in rows]),
+        media_type="application/json"
+    )
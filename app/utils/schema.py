@@ -0,0 +1,68 @@
+# app/utils/schema.py
+import ast
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.engine import Engine
+import sqlalchemy
+
+load_dotenv()
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "migrations", "versions"
+)
+
+# Refuse to start when the database isn't at the migration head this code expects.
+# Set to 0 to only log the mismatch, e.g. while a rolling deploy is running migrations.
+SCHEMA_CHECK_STRICT = os.getenv("SCHEMA_CHECK_STRICT", "1") == "1"
+
+def expected_revision() -> str:
+    """
+    Head revision of migrations/versions, read from the files on disk. Alembic's
+    ScriptDirectory does the same, but importing alembic adds ~170 ms to worker startup.
+    """
+    revisions, parents = set(), set()
+    for name in os.listdir(MIGRATIONS_DIR):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+            module = ast.parse(f.read())
+        for node in module.body:
+            target = node.targets[0] if isinstance(node, ast.Assign) else None
+            if not isinstance(target, ast.Name) or target.id not in ("revision", "down_revision"):
+                continue
+            value = ast.literal_eval(node.value)
+            if target.id == "revision":
+                revisions.add(value)
+            elif value:
+                parents.update([value] if isinstance(value, str) else value)
+
+    heads = revisions - parents
+    if len(heads) != 1:
+        raise RuntimeError(f"Expected one migration head in {MIGRATIONS_DIR}, found {sorted(heads)}")
+    return heads.pop()
+
+def current_revision(engine: Engine) -> Optional[str]:
+    """Revision recorded by `alembic upgrade`, or None if migrations were never run"""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(sqlalchemy.text("SELECT version_num FROM alembic_version")).scalar()
+        except sqlalchemy.exc.DBAPIError:
+            return None
+
+def check_schema_revision(engine: Engine) -> None:
+    """
+    One query per worker instead of creating and altering tables at startup. Migrations
+    are applied out of band with `alembic upgrade head`, before the new code starts.
+    """
+    expected = expected_revision()
+    current = current_revision(engine)
+    if current == expected:
+        return
+
+    message = (f"Database schema is at revision {current or '(none)'}, this code expects {expected}. "
+               f"Run `alembic upgrade head`.")
+    if SCHEMA_CHECK_STRICT:
+        raise RuntimeError(message)
+    print(f"WARNING: {message}")
@@ -0,0 +1,136 @@
+# app/utils/stock_coalescer.py
+import asyncio
+import os
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models.stock import Stock
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionCreate
+from app.utils.bulk import insert_returning_ids
+from app.utils.stock_ledger import (
+    add_stock_quantity, remove_stock_quantity, stock_exists, movement, record_movements
+)
+
+load_dotenv()
+
+# Optional write coalescing for "in"/"out" transactions. Movements for the same
+# (product, warehouse) that arrive within the window are applied together, so a hot SKU
+# takes one stock row lock per batch instead of one per request. 0 disables it.
+STOCK_COALESCE_WINDOW_MS = float(os.getenv("STOCK_COALESCE_WINDOW_MS", "0"))
+STOCK_COALESCE_MAX_BATCH = int(os.getenv("STOCK_COALESCE_MAX_BATCH", "200"))
+
+def _delta(txn: TransactionCreate) -> int:
+    return txn.quantity if txn.transaction_type == "in" else -txn.quantity
+
+def apply_batch(txns: List[TransactionCreate]) -> list:
+    """
+    Apply in/out movements for one (product, warehouse) in a single database transaction.
+    Returns, per movement, either the created transaction or the HTTPException it failed with.
+
+    The whole batch normally costs one conditional UPDATE of the stock row plus one
+    multi-row INSERT into transactions (and one into the ledger). Only when the net
+    movement would take stock below zero is the row locked and read, to admit movements
+    one by one: receipts first, then issues in arrival order while stock lasts.
+    """
+    product_id, warehouse_id = txns[0].product_id, txns[0].warehouse_id
+    db = SessionLocal()
+    try:
+        net = sum(_delta(txn) for txn in txns)
+        if net >= 0:
+            applied = add_stock_quantity(db, product_id, warehouse_id, net)
+        else:
+            applied = remove_stock_quantity(db, product_id, warehouse_id, -net)
+
+        results = [None] * len(txns)
+        if not applied:
+            if not stock_exists(db, product_id, warehouse_id):
+                return [HTTPException(status_code=404, detail="Stock entry not found")] * len(txns)
+
+            stock = db.query(Stock).filter(
+                Stock.product_id == product_id,
+                Stock.warehouse_id == warehouse_id
+            ).with_for_update().first()
+            quantity = stock.quantity
+            order = sorted(range(len(txns)), key=lambda i: txns[i].transaction_type != "in")
+            for i in order:
+                if quantity + _delta(txns[i]) < 0:
+                    results[i] = HTTPException(status_code=400, detail="Not enough stock")
+                else:
+                    quantity += _delta(txns[i])
+            stock.quantity = quantity
+            db.flush()
+
+        accepted = [i for i in range(len(txns)) if results[i] is None]
+        if accepted:
+            rows = [txns[i].dict() for i in accepted]
+            ids = insert_returning_ids(db, Transaction, rows)
+            record_movements(db, [
+                movement(product_id, warehouse_id, _delta(txns[i]), "transaction",
+                         reference_id=transaction_id, created_by=txns[i].created_by)
+                for i, transaction_id in zip(accepted, ids)
+            ])
+            for i, row, transaction_id in zip(accepted, rows, ids):
+                results[i] = {**row, "transaction_id": transaction_id}
+
+        db.commit()
+        return results
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+class StockWriteCoalescer:
+    """Groups concurrent in/out transactions per (product, warehouse) into short batches"""
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self._pending: Dict[Tuple[int, int], list] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0
+
+    async def submit(self, txn: TransactionCreate) -> dict:
+        """Queue a movement and wait for the batch it joins; raises its HTTPException on failure"""
+        loop = asyncio.get_running_loop()
+        key = (txn.product_id, txn.warehouse_id)
+        future = loop.create_future()
+
+        batch = self._pending.get(key)
+        if batch is None:
+            # First movement for this key opens the window; it closes after window_ms
+            batch = self._pending[key] = []
+            loop.call_later(self.window_ms / 1000, self._close, key, batch)
+        batch.append((txn, future))
+        if len(batch) >= self.max_batch:
+            self._close(key, batch)
+
+        result = await future
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _close(self, key, batch) -> None:
+        if self._pending.get(key) is not batch:
+            return  # already flushed because it filled up
+        del self._pending[key]
+        asyncio.ensure_future(self._flush(batch))
+
+    async def _flush(self, batch) -> None:
+        try:
+            results = await run_in_threadpool(apply_batch, [txn for txn, _ in batch])
+        except Exception as e:
+            print(f"Error applying coalesced stock movements: {e}")
+            results = [HTTPException(status_code=500, detail="Failed to apply stock movement")] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+stock_coalescer = StockWriteCoalescer(STOCK_COALESCE_WINDOW_MS, STOCK_COALESCE_MAX_BATCH)
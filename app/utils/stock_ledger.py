@@ -0,0 +1,260 @@
+# app/utils/stock_ledger.py
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+import sqlalchemy
+
+from app.database import SessionLocal
+from app.models.stock import Stock
+from app.models.stock_ledger import StockLedger, StockSnapshot
+from app.utils.job_lock import single_runner
+
+load_dotenv()
+
+# How often the background task folds new ledger entries into per-(product, warehouse)
+# snapshots. 0 disables it; POST /stock/snapshots can then be driven from cron instead.
+STOCK_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("STOCK_SNAPSHOT_INTERVAL_SECONDS", "300"))
+
+# Entry ids are assigned at insert but become visible at commit, so a missing id below the
+# newest entry may be a transaction that hasn't committed yet, and snapshots stop short of
+# it. On MySQL a gap is held only while a transaction that could own it is still open.
+# Where that can't be checked, a gap this old is taken to be a rolled-back insert and
+# passed over; keep it above the longest transaction that writes ledger entries.
+STOCK_SNAPSHOT_SETTLE_SECONDS = float(os.getenv("STOCK_SNAPSHOT_SETTLE_SECONDS", "600"))
+
+def movement(product_id: int, warehouse_id: int, delta: int, source: str,
+             reference_id: Optional[int] = None, created_by: Optional[int] = None) -> dict:
+    """One ledger entry, ready for record_movements"""
+    return {
+        "product_id": product_id,
+        "warehouse_id": warehouse_id,
+        "delta": delta,
+        "source": source,
+        "reference_id": reference_id,
+        "created_by": created_by,
+    }
+
+def record_movements(db: Session, entries: List[dict]) -> None:
+    """Append ledger entries in one multi-row INSERT; the caller commits"""
+    if entries:
+        db.execute(insert(StockLedger), entries)
+
+def add_stock_quantity(db: Session, product_id: int, warehouse_id: int, quantity: int,
+                       create: bool = False) -> bool:
+    """
+    Add to the stock balance in a single UPDATE, without reading the row first.
+    With create=True a missing stock row is inserted; otherwise returns False for it.
+    """
+    updated = db.query(Stock).filter(
+        Stock.product_id == product_id,
+        Stock.warehouse_id == warehouse_id
+    ).update({Stock.quantity: Stock.quantity + quantity}, synchronize_session=False)
+
+    if updated == 0 and create:
+        db.add(Stock(product_id=product_id, warehouse_id=warehouse_id, quantity=quantity))
+        db.flush()
+        return True
+    return updated > 0
+
+def remove_stock_quantity(db: Session, product_id: int, warehouse_id: int, quantity: int) -> bool:
+    """Subtract from the stock balance only if enough is on hand, in a single conditional UPDATE"""
+    updated = db.query(Stock).filter(
+        Stock.product_id == product_id,
+        Stock.warehouse_id == warehouse_id,
+        Stock.quantity >= quantity
+    ).update({Stock.quantity: Stock.quantity - quantity}, synchronize_session=False)
+    return updated > 0
+
+def stock_exists(db: Session, product_id: int, warehouse_id: int) -> bool:
+    return db.query(Stock.stock_id).filter(
+        Stock.product_id == product_id,
+        Stock.warehouse_id == warehouse_id
+    ).first() is not None
+
+def _open_transactions_before(db: Session, entry_id: int) -> Optional[int]:
+    """
+    Other MySQL transactions still open that started no later than entry_id was inserted,
+    so could hold an uncommitted entry below it. None where this can't be checked.
+    trx_started is in the server time zone, as created_at is under the default session one.
+    """
+    if db.get_bind().dialect.name != "mysql":
+        return None
+    try:
+        return db.execute(sqlalchemy.text("""
+            SELECT COUNT(*) FROM information_schema.innodb_trx
+            WHERE trx_mysql_thread_id <> CONNECTION_ID()
+              AND trx_started <= (
+                  SELECT created_at + INTERVAL 1 SECOND FROM stock_ledger WHERE entry_id = :entry_id
+              )
+        """), {"entry_id": entry_id}).scalar()
+    except sqlalchemy.exc.DBAPIError as e:
+        # Reading innodb_trx needs the PROCESS privilege
+        print(f"Cannot check open transactions for stock snapshots, using the settle time: {e}")
+        return None
+
+def committed_through(db: Session, low: int, high: int) -> int:
+    """
+    The highest entry id in (low, high] below which no entry can still commit. A gap in
+    the ids is passed over once no transaction that could own it is open (MySQL) or,
+    elsewhere, once it is older than STOCK_SNAPSHOT_SETTLE_SECONDS. A gap's age is that
+    of the first entry after it, which was inserted after the missing one.
+    """
+    gaps = list(db.execute(sqlalchemy.text("""
+        SELECT l.entry_id AS before_gap,
+               (SELECT MIN(n.entry_id) FROM stock_ledger n WHERE n.entry_id > l.entry_id) AS after_gap
+        FROM stock_ledger l
+        WHERE l.entry_id >= :low AND l.entry_id < :high
+          AND NOT EXISTS (SELECT 1 FROM stock_ledger n WHERE n.entry_id = l.entry_id + 1)
+        ORDER BY l.entry_id
+    """), {"low": low, "high": high}).mappings())
+
+    # Before the first run there is no entry at low to find a gap after
+    if low == 0:
+        first = db.query(func.min(StockLedger.entry_id)).scalar()
+        if first > 1:
+            gaps.insert(0, {"before_gap": 0, "after_gap": first})
+
+    if not gaps:
+        return high
+
+    now = db.query(sqlalchemy.type_coerce(func.now(), sqlalchemy.DateTime)).scalar()
+    settled = now - timedelta(seconds=STOCK_SNAPSHOT_SETTLE_SECONDS)
+    for gap in gaps:
+        open_before = _open_transactions_before(db, gap["after_gap"])
+        if open_before is None:
+            after = db.query(StockLedger.created_at).filter(StockLedger.entry_id == gap["after_gap"]).scalar()
+            if after > settled:
+                return gap["before_gap"]
+        elif open_before:
+            return gap["before_gap"]
+    return high
+
+def take_snapshots(db: Session) -> dict:
+    """
+    Fold ledger entries appended since the previous run into new snapshots, one per
+    (product, warehouse) that moved. Each snapshot carries the previous one forward,
+    so only the new range of the ledger is read.
+
+    Runs in one process at a time: the background task in every worker, POST
+    /stock/snapshots and cron would otherwise fold the same range twice.
+    """
+    with single_runner(db, "stock_snapshots") as acquired:
+        if not acquired:
+            return {"snapshots": 0, "skipped": "snapshots are being taken by another process"}
+
+        low = db.query(func.coalesce(func.max(StockSnapshot.last_entry_id), 0)).scalar()
+
+        newest = db.query(func.max(StockLedger.entry_id)).filter(StockLedger.entry_id > low).scalar()
+        if newest is None:
+            return {"snapshots": 0, "last_entry_id": low}
+
+        # Only up to the first entry that may still commit; folding past it would leave
+        # it out of this snapshot and, since runs start from the last one, of every later one
+        high = committed_through(db, low, newest)
+        if high <= low:
+            return {"snapshots": 0, "last_entry_id": low}
+
+        created = db.execute(sqlalchemy.text("""
+            INSERT INTO stock_snapshots (product_id, warehouse_id, quantity, last_entry_id, as_of)
+            SELECT d.product_id, d.warehouse_id,
+                   COALESCE((
+                       SELECT s.quantity FROM stock_snapshots s
+                       WHERE s.product_id = d.product_id AND s.warehouse_id = d.warehouse_id
+                       ORDER BY s.snapshot_id DESC
+                       LIMIT 1
+                   ), 0) + d.delta,
+                   d.last_entry_id, d.as_of
+            FROM (
+                SELECT product_id, warehouse_id, SUM(delta) AS delta,
+                       MAX(entry_id) AS last_entry_id, MAX(created_at) AS as_of
+                FROM stock_ledger
+                WHERE entry_id > :low AND entry_id <= :high
+                GROUP BY product_id, warehouse_id
+            ) d
+        """), {"low": low, "high": high}).rowcount
+        db.commit()
+        return {"snapshots": created, "last_entry_id": high}
+
+def stock_as_of(db: Session, ts: datetime, product_ids: Optional[List[int]] = None,
+                warehouse_ids: Optional[List[int]] = None) -> list:
+    """
+    Balances at a point in time for every (product, warehouse) that had stock by then,
+    optionally limited to some products and/or warehouses.
+
+    Keys are every (product, warehouse) in the ledger, so balances whose stock row has
+    since been deleted are still reported; keys with no entry by ts drop out at the end.
+    Listing them only needs the leading columns of ix_stock_ledger_covering, which MySQL
+    reads as a loose index scan. Each key starts from its latest snapshot taken at or
+    before ts (the checkpoint), found through ix_stock_snapshots_key_as_of, and adds the
+    ledger entries after it up to ts, a range read of ix_stock_ledger_covering from the
+    checkpoint's entry id. Cost follows the number of keys and the activity since each
+    checkpoint, not the length of the history.
+    """
+    params = {"ts": ts}
+    key_filter = ""
+    if product_ids:
+        key_filter += " AND product_id IN :product_ids"
+        params["product_ids"] = list(product_ids)
+    if warehouse_ids:
+        key_filter += " AND warehouse_id IN :warehouse_ids"
+        params["warehouse_ids"] = list(warehouse_ids)
+
+    statement = sqlalchemy.text(f"""
+        SELECT c.product_id, c.warehouse_id,
+               COALESCE(c.snapshot_quantity, 0) + COALESCE(c.delta, 0) AS quantity
+        FROM (
+            SELECT h.product_id, h.warehouse_id, s.quantity AS snapshot_quantity,
+                   (
+                       SELECT SUM(l.delta) FROM stock_ledger l
+                       WHERE l.product_id = h.product_id
+                         AND l.warehouse_id = h.warehouse_id
+                         AND l.entry_id > COALESCE(s.last_entry_id, 0)
+                         AND l.created_at <= :ts
+                   ) AS delta
+            FROM (
+                SELECT k.product_id, k.warehouse_id,
+                       (
+                           SELECT sn.snapshot_id FROM stock_snapshots sn
+                           WHERE sn.product_id = k.product_id
+                             AND sn.warehouse_id = k.warehouse_id
+                             AND sn.as_of <= :ts
+                           ORDER BY sn.as_of DESC, sn.snapshot_id DESC
+                           LIMIT 1
+                       ) AS snapshot_id
+                FROM (
+                    SELECT DISTINCT product_id, warehouse_id FROM stock_ledger
+                    WHERE 1=1{key_filter}
+                ) k
+            ) h
+            LEFT JOIN stock_snapshots s ON s.snapshot_id = h.snapshot_id
+        ) c
+        WHERE c.snapshot_quantity IS NOT NULL OR c.delta IS NOT NULL
+        ORDER BY c.product_id, c.warehouse_id
+    """)
+    if product_ids:
+        statement = statement.bindparams(sqlalchemy.bindparam("product_ids", expanding=True))
+    if warehouse_ids:
+        statement = statement.bindparams(sqlalchemy.bindparam("warehouse_ids", expanding=True))
+
+    return list(db.execute(statement, params).mappings().all())
+
+async def run_snapshot_loop() -> None:
+    """Take snapshots every STOCK_SNAPSHOT_INTERVAL_SECONDS for the life of the app"""
+    while True:
+        await asyncio.sleep(STOCK_SNAPSHOT_INTERVAL_SECONDS)
+        db = SessionLocal()
+        try:
+            result = await run_in_threadpool(take_snapshots, db)
+            if result["snapshots"]:
+                print(f"Stock snapshots taken: {result}")
+        except Exception as e:
+            print(f"Error taking stock snapshots: {e}")
+            db.rollback()
+        finally:
+            db.close()
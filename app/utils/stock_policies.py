@@ -0,0 +1,193 @@
+# app/utils/stock_policies.py
+import asyncio
+import os
+from datetime import date, datetime, timedelta
+from statistics import NormalDist
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+import sqlalchemy
+
+from app.database import SessionLocal
+from app.models.stock_policy import StockPolicyChange
+from app.utils.arrays import attach, fetch_columns, pair_keys
+from app.utils.job_lock import single_runner
+from app.utils.replenishment import REPLENISHMENT_LEAD_TIME_DAYS, supplier_lead_times
+
+load_dotenv()
+
+# Probability of not running out during a replenishment lead time
+STOCK_POLICY_SERVICE_LEVEL = float(os.getenv("STOCK_POLICY_SERVICE_LEVEL", "0.95"))
+# Receipts this recent are used to measure supplier lead times
+STOCK_POLICY_LEAD_TIME_HISTORY_DAYS = int(os.getenv("STOCK_POLICY_LEAD_TIME_HISTORY_DAYS", "365"))
+# How often the background job recalculates policies. 0 disables it; POST
+# /stock-policies/recalculate can then be driven from cron instead.
+STOCK_POLICY_INTERVAL_SECONDS = float(os.getenv("STOCK_POLICY_INTERVAL_SECONDS", str(24 * 3600)))
+
+def supplier_receipt_lead_times(db: Session, as_of: date) -> tuple:
+    """
+    Actual lead time per supplier, from PO order_date to the day goods were booked in,
+    weighted by the quantity received. Partial receipts each count with their own date.
+    Returns (supplier_ids, mean_days, std_days) arrays.
+    """
+    result = db.execute(sqlalchemy.text("""
+        SELECT po.supplier_id, po.order_date, l.created_at, l.delta
+        FROM stock_ledger l
+        JOIN purchase_orders po ON po.po_id = l.reference_id
+        WHERE l.source = 'receipt'
+          AND l.created_at >= :since
+          AND po.supplier_id IS NOT NULL
+          AND po.order_date IS NOT NULL
+    """), {"since": as_of - timedelta(days=STOCK_POLICY_LEAD_TIME_HISTORY_DAYS)})
+    rows = result.cursor.fetchall()
+    result.close()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+
+    suppliers, ordered, received, quantities = zip(*rows)
+    days = (np.array(received, dtype="datetime64[D]") - np.array(ordered, dtype="datetime64[D]")).astype(np.float64)
+    days = np.maximum(days, 0)
+    weights = np.maximum(np.array(quantities, dtype=np.float64), 1)
+
+    supplier_ids, group = np.unique(np.array(suppliers, dtype=np.int64), return_inverse=True)
+    total = np.bincount(group, weights=weights)
+    mean = np.bincount(group, weights=weights * days) / total
+    variance = np.bincount(group, weights=weights * (days - mean[group]) ** 2) / total
+    return supplier_ids, mean, np.sqrt(variance)
+
+def calculate_policies(db: Session, now: Optional[datetime] = None) -> dict:
+    """
+    Recalculate safety stock and reorder point for every forecast (product, warehouse):
+
+        safety_stock  = z * sqrt(L * sd_d^2 + d^2 * sd_L^2)
+        reorder_point = d * L + safety_stock
+
+    d and sd_d are the forecast daily demand and the spread of its one-day errors (see
+    app/utils/forecasting.py). L and sd_L are the supplier's measured lead time from
+    receipts; suppliers without receipts fall back to their promised lead time and then
+    to REPLENISHMENT_LEAD_TIME_DAYS, with no lead time spread. z comes from
+    STOCK_POLICY_SERVICE_LEVEL.
+
+    Everything is computed as arrays over all pairs. Only pairs whose values changed are
+    written, with one bulk upsert, and each change is logged with its before and after
+    values in stock_policy_changes.
+
+    Runs in one process at a time; workers, POST /stock-policies/recalculate and cron
+    would otherwise each log the same changes.
+    """
+    with single_runner(db, "stock_policies") as acquired:
+        if not acquired:
+            return {"skipped": "stock policies are being recalculated by another process"}
+        return _calculate_policies(db, now or datetime.utcnow())
+
+def _calculate_policies(db: Session, now: datetime) -> dict:
+    forecasts = fetch_columns(db, sqlalchemy.text("""
+        SELECT product_id, warehouse_id, forecast, error_variance
+        FROM demand_forecasts
+    """), {}, dtype=np.float64)
+    product_ids = forecasts[:, 0].astype(np.int64)
+    warehouse_ids = forecasts[:, 1].astype(np.int64)
+    demand = np.maximum(forecasts[:, 2], 0)
+    demand_std = np.sqrt(np.maximum(forecasts[:, 3], 0))
+    keys = pair_keys(product_ids, warehouse_ids)
+
+    catalogue = fetch_columns(db, sqlalchemy.text(
+        "SELECT product_id, COALESCE(supplier_id, 0) FROM products"
+    ), {})
+    suppliers = attach(catalogue[:, 0], catalogue[:, 1], product_ids, 0)
+
+    promised_ids, promised_days = supplier_lead_times(db, now.date())
+    measured_ids, measured_days, measured_std = supplier_receipt_lead_times(db, now.date())
+    lead_time = attach(promised_ids, promised_days, suppliers, float(REPLENISHMENT_LEAD_TIME_DAYS))
+    measured = np.isin(suppliers, measured_ids)
+    lead_time[measured] = attach(measured_ids, measured_days, suppliers[measured], 0.0)
+    lead_time_std = attach(measured_ids, measured_std, suppliers, 0.0)
+
+    z = NormalDist().inv_cdf(STOCK_POLICY_SERVICE_LEVEL)
+    safety = z * np.sqrt(lead_time * demand_std ** 2 + demand ** 2 * lead_time_std ** 2)
+    safety_stock = np.ceil(safety).astype(np.int64)
+    reorder_point = np.ceil(demand * lead_time + safety).astype(np.int64)
+
+    current = fetch_columns(db, sqlalchemy.text(
+        "SELECT product_id, warehouse_id, safety_stock, reorder_point FROM stock_policies"
+    ), {})
+    current_keys = pair_keys(current[:, 0], current[:, 1])
+    exists = np.isin(keys, current_keys)
+    old_safety = attach(current_keys, current[:, 2], keys, -1)
+    old_reorder = attach(current_keys, current[:, 3], keys, -1)
+    changed = np.flatnonzero(~exists | (old_safety != safety_stock) | (old_reorder != reorder_point))
+
+    if len(changed):
+        columns = {
+            "product_id": product_ids[changed].tolist(),
+            "warehouse_id": warehouse_ids[changed].tolist(),
+            "safety_stock": safety_stock[changed].tolist(),
+            "reorder_point": reorder_point[changed].tolist(),
+            "demand_per_day": demand[changed].tolist(),
+            "demand_std": demand_std[changed].tolist(),
+            "lead_time_days": lead_time[changed].tolist(),
+            "lead_time_std": lead_time_std[changed].tolist(),
+        }
+        policies = [dict(zip(columns, values), calculated_at=now) for values in zip(*columns.values())]
+        db.execute(sqlalchemy.text("""
+            INSERT INTO stock_policies
+                (product_id, warehouse_id, safety_stock, reorder_point, demand_per_day,
+                 demand_std, lead_time_days, lead_time_std, calculated_at)
+            VALUES
+                (:product_id, :warehouse_id, :safety_stock, :reorder_point, :demand_per_day,
+                 :demand_std, :lead_time_days, :lead_time_std, :calculated_at)
+            ON DUPLICATE KEY UPDATE
+                safety_stock = VALUES(safety_stock),
+                reorder_point = VALUES(reorder_point),
+                demand_per_day = VALUES(demand_per_day),
+                demand_std = VALUES(demand_std),
+                lead_time_days = VALUES(lead_time_days),
+                lead_time_std = VALUES(lead_time_std),
+                calculated_at = VALUES(calculated_at)
+        """), policies)
+
+        was_set = exists[changed]
+        db.execute(insert(StockPolicyChange), [
+            {
+                "product_id": product_id,
+                "warehouse_id": warehouse_id,
+                "old_safety_stock": old_ss if existed else None,
+                "new_safety_stock": new_ss,
+                "old_reorder_point": old_rp if existed else None,
+                "new_reorder_point": new_rp,
+                "changed_at": now,
+            }
+            for product_id, warehouse_id, existed, old_ss, new_ss, old_rp, new_rp in zip(
+                columns["product_id"], columns["warehouse_id"], was_set.tolist(),
+                old_safety[changed].tolist(), columns["safety_stock"],
+                old_reorder[changed].tolist(), columns["reorder_point"],
+            )
+        ])
+
+    db.commit()
+    return {
+        "evaluated": len(keys),
+        "changed": len(changed),
+        "created": int(np.count_nonzero(~exists)),
+        "service_level": STOCK_POLICY_SERVICE_LEVEL,
+        "calculated_at": now,
+    }
+
+async def run_policy_loop() -> None:
+    """Recalculate stock policies every STOCK_POLICY_INTERVAL_SECONDS for the life of the app"""
+    while True:
+        await asyncio.sleep(STOCK_POLICY_INTERVAL_SECONDS)
+        db = SessionLocal()
+        try:
+            result = await run_in_threadpool(calculate_policies, db)
+            if "skipped" not in result:
+                print(f"Stock policies recalculated: {result}")
+        except Exception as e:
+            print(f"Error recalculating stock policies: {e}")
+            db.rollback()
+        finally:
+            db.close()
@@ -0,0 +1,185 @@
+# app/utils/supplier_performance.py
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+import sqlalchemy
+
+# Statuses that close a purchase order; its figures are final from then on
+CLOSED_STATUSES = ("received", "cancelled")
+
+# Adds the figures of a set of closed POs to their suppliers' running totals.
+# {received_on} is the SQL for the day a PO was received, {where} picks the POs.
+_FOLD_SQL = """
+    INSERT INTO supplier_performance
+        (supplier_id, orders_received, orders_cancelled, due_orders, on_time_orders,
+         lead_time_orders, lead_time_days_sum, lead_time_days_sq_sum,
+         lead_le_7, lead_le_14, lead_le_30, lead_gt_30,
+         quantity_ordered, quantity_received, standard_cost, cost_variance, updated_at)
+    SELECT
+        supplier_id,
+        SUM(CASE WHEN status = 'received' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN received_on IS NOT NULL AND expected_delivery IS NOT NULL THEN 1 ELSE 0 END),
+        SUM(CASE WHEN received_on <= expected_delivery THEN 1 ELSE 0 END),
+        COUNT(lead_days),
+        COALESCE(SUM(lead_days), 0),
+        COALESCE(SUM(lead_days * lead_days), 0),
+        SUM(CASE WHEN lead_days <= 7 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN lead_days > 7 AND lead_days <= 14 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN lead_days > 14 AND lead_days <= 30 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN lead_days > 30 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN received > 0 THEN ordered ELSE 0 END),
+        SUM(received),
+        SUM(standard_cost),
+        SUM(cost_variance),
+        CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            po.supplier_id,
+            po.status,
+            po.expected_delivery,
+            po.received_on,
+            DATEDIFF(po.received_on, po.order_date) AS lead_days,
+            COALESCE(SUM(i.quantity), 0) AS ordered,
+            COALESCE(SUM(i.received_quantity), 0) AS received,
+            COALESCE(SUM(i.received_quantity * p.unit_cost), 0) AS standard_cost,
+            COALESCE(SUM(i.received_quantity * (i.unit_cost - p.unit_cost)), 0) AS cost_variance
+        FROM (
+            SELECT po.*, CASE WHEN po.status = 'received' THEN {received_on} END AS received_on
+            FROM purchase_orders po
+            WHERE po.supplier_id IS NOT NULL AND po.status IN ('received', 'cancelled') AND {where}
+        ) po
+        LEFT JOIN purchase_order_items i ON i.po_id = po.po_id
+        LEFT JOIN products p ON p.product_id = i.product_id
+        GROUP BY po.po_id, po.supplier_id, po.status, po.expected_delivery, po.received_on, po.order_date
+    ) closed
+    GROUP BY supplier_id
+    ON DUPLICATE KEY UPDATE
+        orders_received = orders_received + VALUES(orders_received),
+        orders_cancelled = orders_cancelled + VALUES(orders_cancelled),
+        due_orders = due_orders + VALUES(due_orders),
+        on_time_orders = on_time_orders + VALUES(on_time_orders),
+        lead_time_orders = lead_time_orders + VALUES(lead_time_orders),
+        lead_time_days_sum = lead_time_days_sum + VALUES(lead_time_days_sum),
+        lead_time_days_sq_sum = lead_time_days_sq_sum + VALUES(lead_time_days_sq_sum),
+        lead_le_7 = lead_le_7 + VALUES(lead_le_7),
+        lead_le_14 = lead_le_14 + VALUES(lead_le_14),
+        lead_le_30 = lead_le_30 + VALUES(lead_le_30),
+        lead_gt_30 = lead_gt_30 + VALUES(lead_gt_30),
+        quantity_ordered = quantity_ordered + VALUES(quantity_ordered),
+        quantity_received = quantity_received + VALUES(quantity_received),
+        standard_cost = standard_cost + VALUES(standard_cost),
+        cost_variance = cost_variance + VALUES(cost_variance),
+        updated_at = VALUES(updated_at)
+"""
+
+# When a PO was received, for rebuilding from history
+_HISTORY_RECEIVED_ON = """(
+    SELECT DATE(MAX(h.changed_at)) FROM po_status_history h
+    WHERE h.po_id = po.po_id AND h.new_status = 'received'
+)"""
+
+def record_closed_orders(db: Session, po_ids: List[int], closed_on: Optional[date] = None) -> None:
+    """
+    Fold POs that have just been received or cancelled into their suppliers' totals, in one
+    statement however many there are. Call it in the transaction that closes them; POs in
+    any other status are ignored. The caller commits.
+    """
+    if not po_ids:
+        return
+    db.execute(
+        sqlalchemy.text(_FOLD_SQL.format(received_on=":closed_on", where="po.po_id IN :po_ids"))
+        .bindparams(bindparam("po_ids", expanding=True)),
+        {"po_ids": list(po_ids), "closed_on": closed_on or date.today()}
+    )
+
+def rebuild_supplier_performance(db: Session, supplier_id: Optional[int] = None) -> None:
+    """
+    Recompute totals from all closed POs, taking receipt dates from po_status_history.
+    Used to backfill, or to correct totals after POs were edited outside the application.
+    The caller commits.
+    """
+    params = {"supplier_id": supplier_id}
+    db.execute(sqlalchemy.text(
+        "DELETE FROM supplier_performance WHERE (:supplier_id IS NULL OR supplier_id = :supplier_id)"
+    ), params)
+    db.execute(sqlalchemy.text(_FOLD_SQL.format(
+        received_on=_HISTORY_RECEIVED_ON,
+        where="(:supplier_id IS NULL OR po.supplier_id = :supplier_id)"
+    )), params)
+
+# Metrics derived from the totals; also what the ranked list can sort by
+METRICS_SQL = {
+    "on_time_rate": "1.0 * sp.on_time_orders / NULLIF(sp.due_orders, 0)",
+    "fill_rate": "1.0 * sp.quantity_received / NULLIF(sp.quantity_ordered, 0)",
+    "avg_lead_time_days": "1.0 * sp.lead_time_days_sum / NULLIF(sp.lead_time_orders, 0)",
+    "price_variance": "1.0 * sp.cost_variance / NULLIF(sp.standard_cost, 0)",
+}
+
+# Best first for each sort key
+_SORT_DIRECTION = {
+    "on_time_rate": "DESC",
+    "fill_rate": "DESC",
+    "avg_lead_time_days": "ASC",
+    "price_variance": "ASC",
+}
+
+def _performance_row(row) -> dict:
+    lead_time_orders = row["lead_time_orders"]
+    mean = row["avg_lead_time_days"]
+    std = None
+    if lead_time_orders:
+        variance = row["lead_time_days_sq_sum"] / lead_time_orders - float(mean) ** 2
+        std = round(max(variance, 0) ** 0.5, 2)
+    return {
+        "supplier_id": row["supplier_id"],
+        "supplier_name": row["supplier_name"],
+        "orders_received": row["orders_received"],
+        "orders_cancelled": row["orders_cancelled"],
+        "on_time_rate": row["on_time_rate"],
+        "fill_rate": row["fill_rate"],
+        "price_variance": row["price_variance"],
+        "lead_time": {
+            "orders": lead_time_orders,
+            "avg_days": mean,
+            "std_days": std,
+            "distribution": {
+                "0-7": row["lead_le_7"],
+                "8-14": row["lead_le_14"],
+                "15-30": row["lead_le_30"],
+                "31+": row["lead_gt_30"],
+            },
+        },
+        "updated_at": row["updated_at"],
+    }
+
+def _performance_query(where: str, order_by: str = "sp.supplier_id") -> str:
+    metrics = ",\n            ".join(f"{sql} AS {name}" for name, sql in METRICS_SQL.items())
+    return f"""
+        SELECT
+            sp.*,
+            s.name AS supplier_name,
+            {metrics}
+        FROM supplier_performance sp
+        JOIN suppliers s ON s.supplier_id = sp.supplier_id
+        WHERE {where}
+        ORDER BY {order_by}
+    """
+
+def get_supplier_performance(db: Session, supplier_id: int) -> Optional[dict]:
+    row = db.execute(
+        sqlalchemy.text(_performance_query("sp.supplier_id = :supplier_id")),
+        {"supplier_id": supplier_id}
+    ).mappings().first()
+    return _performance_row(row) if row else None
+
+def rank_suppliers(db: Session, sort: str, min_orders: int = 1, limit: int = 50) -> List[dict]:
+    """Suppliers with at least min_orders received POs, best first by the given metric"""
+    order_by = f"{METRICS_SQL[sort]} IS NULL, {METRICS_SQL[sort]} {_SORT_DIRECTION[sort]}, sp.supplier_id"
+    rows = db.execute(
+        sqlalchemy.text(_performance_query("sp.orders_received >= :min_orders", order_by) + " LIMIT :limit"),
+        {"min_orders": min_orders, "limit": limit}
+    ).mappings().all()
+    return [_performance_row(row) for row in rows]
@@ -1,7 +1,10 @@
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from app.utils.cache import TTLCache
 import os
+import time
+import uuid
 
 load_dotenv()
 
@@ -19,12 +22,43 @@ if token_expire_str and token_expire_str.strip():
 else:
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# In-memory revocation list. Entries only need to live as long as the tokens they revoke,
+# which is at most ACCESS_TOKEN_EXPIRE_MINUTES, so the list stays small. It is per worker:
+# staff and admin endpoints also check the shared revoked_tokens table and the user's
+# current role (app/utils/permissions.py), but on endpoints that only need a login, other
+# workers accept a revoked token until it expires.
+_revoked_tokens = TTLCache(maxsize=100000, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_revoked_users = TTLCache(maxsize=100000, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def revoke_token(payload: dict):
+    """
+    Revoke a single token (e.g. on logout) in this worker until it would have expired
+    anyway; the logout endpoint also records it in revoked_tokens for the others
+    """
+    if payload.get("jti"):
+        _revoked_tokens.set(payload["jti"], True, ttl=payload.get("exp", 0) - time.time())
+
+def revoke_user_tokens(user_id: int):
+    """
+    Revoke every token issued to a user up to now (e.g. after a role change), in this
+    worker only. Other workers keep accepting the tokens on login-only endpoints until
+    they expire; staff and admin checks read the current role, so they are not affected.
+    """
+    _revoked_users.set(user_id, time.time())
+
+def is_revoked(payload: dict) -> bool:
+    if payload.get("jti") and _revoked_tokens.get(payload["jti"]):
+        return True
+    revoked_before = _revoked_users.get(payload.get("user_id"))
+    return revoked_before is not None and payload.get("iat", 0) < revoked_before
+
 def verify_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -1,7 +1,9 @@
 import xml.etree.ElementTree as ET
+import json
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from xml.dom import minidom
+from xml.sax.saxutils import escape, quoteattr
 
 def generate_products_xml(products: List[Dict[str, Any]]) -> str:
     """
@@ -44,47 +46,63 @@ def generate_products_xml(products: List[Dict[str, Any]]) -> str:
     
     return pretty_xml
 
-async def generate_categories_xml(categories: List[Dict[str, Any]]) -> str:
+async def stream_categories_xml(cursor, count: int, chunk_size: int = 65536):
     """
-    Generate XML string from a list of category dictionaries
+    Stream categories XML from an async MongoDB cursor.
+    Categories are written as they arrive and yielded in chunks of roughly chunk_size
+    characters, so the whole taxonomy is never held in memory.
     """
-    # Create root element
-    root = ET.Element("categories")
-    root.set("generated_at", datetime.now().isoformat())
-    root.set("count", str(len(categories)))
-    
-    # Add categories
-    for category in categories:
-        category_elem = ET.SubElement(root, "category")
-        category_elem.set("code", category["code"])
-        
-        # Add basic category fields
-        name_elem = ET.SubElement(category_elem, "name")
-        name_elem.text = category["name"]
-        
-        if "description" in category and category["description"]:
-            desc_elem = ET.SubElement(category_elem, "description")
-            desc_elem.text = category["description"]
-        
-        if "parent_id" in category and category["parent_id"]:
-            parent_elem = ET.SubElement(category_elem, "parent_id")
-            parent_elem.text = str(category["parent_id"])
-        
-        if "level" in category and category["level"] is not None:
-            level_elem = ET.SubElement(category_elem, "level")
-            level_elem.text = str(category["level"])
-        
-        if "path" in category and category["path"]:
-            path_elem = ET.SubElement(category_elem, "path")
-            path_elem.text = category["path"]
+    buffer = [
+        '<?xml version="1.0" ?>\n',
+        f'<categories generated_at={quoteattr(datetime.now().isoformat())} count="{count}">\n'
+    ]
+    size = 0
     
-    # Convert to string
-    xml_string = ET.tostring(root, encoding='unicode')
+    async for category in cursor:
+        parts = [f'  <category code={quoteattr(category["code"])}>\n']
+        parts.append(f'    <name>{escape(category["name"])}</name>\n')
+        
+        if category.get("description"):
+            parts.append(f'    <description>{escape(category["description"])}</description>\n')
+        
+        path = category.get("path") or []
+        if len(path) > 1:
+            # Parents are referenced by code so the export can be imported into another database
+            parts.append(f'    <parent_code>{escape(path[-2])}</parent_code>\n')
+        
+        if category.get("parent_id"):
+            parts.append(f'    <parent_id>{escape(str(category["parent_id"]))}</parent_id>\n')
+        
+        if category.get("level") is not None:
+            parts.append(f'    <level>{category["level"]}</level>\n')
+        
+        if path:
+            parts.append(f'    <path>{escape("/".join(path))}</path>\n')
+        
+        for field in ["icon", "display_order", "visible", "min_stock_threshold", "default_reorder_level"]:
+            if category.get(field) is not None:
+                value = category[field]
+                if isinstance(value, bool):
+                    value = "true" if value else "false"
+                parts.append(f'    <{field}>{escape(str(value))}</{field}>\n')
+        
+        # Free-form structures are carried as JSON so they survive the round trip as-is
+        for field in ["attributes", "storage_requirements"]:
+            if category.get(field):
+                parts.append(f'    <{field}>{escape(json.dumps(category[field], default=str))}</{field}>\n')
+        
+        parts.append('  </category>\n')
+        
+        chunk = "".join(parts)
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
     
-    # Pretty print
-    pretty_xml = minidom.parseString(xml_string).toprettyxml(indent="  ")
-    
-    return pretty_xml
+    buffer.append('</categories>\n')
+    yield "".join(buffer)
 
 def generate_purchase_orders_xml(purchase_orders, db) -> str:
     """
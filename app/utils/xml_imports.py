@@ -1,4 +1,6 @@
 import xml.etree.ElementTree as ET
+import io
+import json
 from typing import List, Dict, Any
 from datetime import datetime
 
@@ -147,4 +149,52 @@ def parse_purchase_orders_xml(xml_content: str) -> List[Dict[str, Any]]:
         if "items" in po_data and po_data["items"]:
             purchase_orders.append(po_data)
     
-    return purchase_orders
\ No newline at end of file
+    return purchase_orders
+
+def parse_categories_xml(xml_content: str) -> List[Dict[str, Any]]:
+    """
+    Parse categories XML and return a list of category dictionaries.
+    Parents are referenced by parent_code; level and path are recomputed on import.
+    """
+    categories = []
+    
+    try:
+        # iterparse lets us drop each element once read, keeping large taxonomies cheap
+        for _, category_elem in ET.iterparse(io.BytesIO(xml_content.encode("utf-8"))):
+            if category_elem.tag != "category":
+                continue
+            
+            category_data = {"code": category_elem.get("code")}
+            
+            for field in ["name", "description", "parent_code", "icon"]:
+                field_elem = category_elem.find(field)
+                if field_elem is not None and field_elem.text:
+                    category_data[field] = field_elem.text.strip()
+            
+            for field in ["display_order", "min_stock_threshold", "default_reorder_level"]:
+                field_elem = category_elem.find(field)
+                if field_elem is not None and field_elem.text:
+                    try:
+                        category_data[field] = int(field_elem.text)
+                    except ValueError:
+                        pass  # Skip invalid numeric values
+            
+            visible_elem = category_elem.find("visible")
+            if visible_elem is not None and visible_elem.text:
+                category_data["visible"] = visible_elem.text.strip().lower() not in ("false", "0", "no")
+            
+            # Written as JSON by stream_categories_xml
+            for field in ["attributes", "storage_requirements"]:
+                field_elem = category_elem.find(field)
+                if field_elem is not None and field_elem.text:
+                    try:
+                        category_data[field] = json.loads(field_elem.text)
+                    except ValueError:
+                        raise ValueError(f"Category '{category_data['code']}' has invalid {field} JSON")
+            
+            categories.append(category_data)
+            category_elem.clear()
+    except ET.ParseError:
+        raise ValueError("Invalid XML format")
+    
+    return categories
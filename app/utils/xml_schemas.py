@@ -1,4 +1,5 @@
 import xml.etree.ElementTree as ET
+import io
 from typing import Dict, Any, Optional
 
 def validate_products_xml(xml_content: str) -> bool:
@@ -90,4 +91,47 @@ def validate_purchase_orders_xml(xml_content: str) -> bool:
     except ET.ParseError as e:
         raise ValueError(f"Invalid XML format: {str(e)}")
     except Exception as e:
-        raise ValueError(f"Error validating XML: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error validating XML: {str(e)}")
+
+def validate_categories_xml(xml_content: str) -> bool:
+    """
+    Basic validation for categories XML
+    Returns True if valid, raises ValueError if not
+    """
+    try:
+        found = 0
+        root = None
+        
+        # Streamed so large taxonomies are never built as a full tree
+        for event, elem in ET.iterparse(io.BytesIO(xml_content.encode("utf-8")), events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                    # Check root element name
+                    if root.tag != "categories":
+                        raise ValueError("Root element must be 'categories'")
+                continue
+            
+            if elem.tag != "category":
+                continue
+            
+            # Validate each category has required attributes/elements
+            if not elem.get("code"):
+                raise ValueError("Category missing 'code' attribute")
+            
+            name = elem.find("name")
+            if name is None or not name.text:
+                raise ValueError(f"Category '{elem.get('code')}' missing 'name' element")
+            
+            found += 1
+            elem.clear()
+        
+        # Check if there are category elements
+        if not found:
+            raise ValueError("No category elements found")
+        
+        return True
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid XML format: {str(e)}")
+    except Exception as e:
+        raise ValueError(f"Error validating XML: {str(e)}")
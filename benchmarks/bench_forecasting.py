@@ -0,0 +1,60 @@
+# benchmarks/bench_forecasting.py
+"""
+Time the demand forecasting engine on 200k (product, warehouse) series with 182 days of
+history: a full fit (model and alpha selection) through the process pool, and the daily
+incremental update that folds one closed day into the stored state.
+
+Demand is generated directly as the sparse (series, day, quantity) triples the database
+query returns, so this measures the fitting itself. 20% of series sell most days, the
+rest are intermittent.
+
+Run from the project root:
+    python -m benchmarks.bench_forecasting
+"""
+import os
+import time
+
+import numpy as np
+
+from app.utils import forecasting
+from app.utils.forecasting import fit_series, update_series
+
+SERIES = 200_000
+DAYS = 182
+SMOOTH_SHARE = 0.2
+
+def demand_triples(rng):
+    """Sparse daily demand, ordered by series"""
+    daily_rate = np.where(rng.random(SERIES) < SMOOTH_SHARE,
+                          rng.uniform(0.8, 1.0, SERIES),    # sells most days
+                          rng.uniform(0.02, 0.3, SERIES))   # intermittent
+    rows, days = np.nonzero(rng.random((SERIES, DAYS), dtype=np.float32) < daily_rate[:, None].astype(np.float32))
+    quantities = rng.integers(1, 20, len(rows)).astype(np.float64)
+    return rows, days, quantities
+
+def main():
+    rng = np.random.default_rng(42)
+    rows, days, quantities = demand_triples(rng)
+    print(f"{SERIES} series x {DAYS} days, {len(rows)} days with demand")
+
+    for workers in sorted({1, os.cpu_count() or 1}):
+        forecasting.FORECAST_WORKERS = workers
+        start = time.perf_counter()
+        state = forecasting._fit_in_pool(SERIES, DAYS, rows, days, quantities)
+        elapsed = time.perf_counter() - start
+        croston = np.count_nonzero(state["croston"])
+        print(f"  full fit, {workers} worker(s): {elapsed:6.1f} s "
+              f"({SERIES / elapsed:,.0f} series/s, {croston} Croston, {SERIES - croston} SES)")
+
+    day = np.where(rng.random((SERIES, 1)) < 0.3, rng.integers(1, 20, (SERIES, 1)), 0).astype(np.float64)
+    start = time.perf_counter()
+    update_series(day, state)
+    print(f"  incremental update, one new day: {time.perf_counter() - start:6.2f} s")
+
+    # Sanity check against a single-series fit
+    first = rows == 0
+    one = fit_series(rows[first], days[first], quantities[first], 1, DAYS)
+    assert one["alpha"][0] == state["alpha"][0] and np.isclose(one["level"][0], state["level"][0])
+
+if __name__ == "__main__":
+    main()
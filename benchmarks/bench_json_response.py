@@ -0,0 +1,68 @@
+# benchmarks/bench_json_response.py
+"""
+Compare the old ObjectId-converting CustomJSONResponse with FastJSONResponse on a
+50k-row /stock/ payload.
+
+Run from the project root:
+    python -m benchmarks.bench_json_response
+"""
+import timeit
+from decimal import Decimal
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+from app.utils.responses import FastJSONResponse
+
+ROWS = 50_000
+REPEAT = 5
+
+class LegacyJSONResponse(JSONResponse):
+    """The response class app/main.py used before FastJSONResponse"""
+    def render(self, content):
+        def convert_objectid(obj):
+            if isinstance(obj, ObjectId):
+                return str(obj)
+            elif isinstance(obj, dict):
+                return {key: convert_objectid(value) for key, value in obj.items()}
+            elif isinstance(obj, list):
+                return [convert_objectid(item) for item in obj]
+            return obj
+
+        return super().render(convert_objectid(content))
+
+def stock_rows():
+    """Rows shaped like StockOut, as FastAPI hands them to the response class"""
+    return [
+        {"product_id": i % 5000, "warehouse_id": i % 12, "quantity": i % 300, "stock_id": i}
+        for i in range(ROWS)
+    ]
+
+def valuation_rows():
+    """Rows with Decimal money values, as returned by the raw SQL report endpoints"""
+    return [
+        {"product_id": i, "name": f"Product {i}", "quantity": i % 300,
+         "unit_cost": Decimal("12.50"), "total_value": Decimal(i % 300) * Decimal("12.50")}
+        for i in range(ROWS)
+    ]
+
+def bench(name, render, payload):
+    best = min(timeit.repeat(lambda: render(payload), number=1, repeat=REPEAT))
+    print(f"  {name:<22} {best * 1000:8.1f} ms  ({best / ROWS * 1e6:.2f} µs/row)")
+    return best
+
+def main():
+    legacy = LegacyJSONResponse.__new__(LegacyJSONResponse)
+    fast = FastJSONResponse.__new__(FastJSONResponse)
+
+    print(f"/stock/ payload, {ROWS} rows")
+    old = bench("CustomJSONResponse", legacy.render, stock_rows())
+    new = bench("FastJSONResponse", fast.render, stock_rows())
+    print(f"  speedup: {old / new:.1f}x\n")
+
+    # The stdlib encoder cannot handle Decimal at all; only the new class is timed here
+    print(f"Valuation payload with Decimals, {ROWS} rows")
+    bench("FastJSONResponse", fast.render, valuation_rows())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_ledger_write.py
+"""
+Cost of recording a stock movement, one committed write at a time:
+
+- read-modify-write: load the stock row, change quantity, commit (the original code)
+- atomic UPDATE: quantity = quantity + n in one statement, commit
+- atomic UPDATE + ledger: the same, plus the stock_ledger append every write path makes
+
+Runs against a throwaway SQLite file so each commit pays for a real sync; against MySQL
+the append adds one more row (and its index entries) to the same redo log flush.
+
+Run from the project root:
+    python -m benchmarks.bench_ledger_write
+"""
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.stock import Stock
+from app.models.stock_ledger import StockLedger
+from app.utils.stock_ledger import add_stock_quantity, movement, record_movements
+
+WRITES = 2000
+KEYS = 100
+
+def read_modify_write(db, i):
+    stock = db.query(Stock).filter(Stock.product_id == i % KEYS + 1, Stock.warehouse_id == 1).first()
+    stock.quantity += 1
+    db.commit()
+
+def atomic_update(db, i):
+    add_stock_quantity(db, i % KEYS + 1, 1, 1)
+    db.commit()
+
+def atomic_update_and_ledger(db, i):
+    add_stock_quantity(db, i % KEYS + 1, 1, 1)
+    record_movements(db, [movement(i % KEYS + 1, 1, 1, "transaction")])
+    db.commit()
+
+def main():
+    path = os.path.join(tempfile.gettempdir(), "bench_ledger_write.db")
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[Stock.__table__, StockLedger.__table__])
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(Stock), [{"product_id": p, "warehouse_id": 1, "quantity": 0} for p in range(1, KEYS + 1)])
+    db.commit()
+
+    print(f"{WRITES} committed stock writes over {KEYS} rows")
+    baseline = None
+    for name, write in (
+        ("read-modify-write", read_modify_write),
+        ("atomic UPDATE", atomic_update),
+        ("atomic UPDATE + ledger", atomic_update_and_ledger),
+    ):
+        start = time.perf_counter()
+        for i in range(WRITES):
+            write(db, i)
+        per_write = (time.perf_counter() - start) / WRITES * 1e6
+        baseline = baseline or per_write
+        print(f"  {name:24} {per_write:8.1f} us/write  ({per_write / baseline:.2f}x)")
+
+    db.close()
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
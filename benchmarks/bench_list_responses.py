@@ -0,0 +1,63 @@
+# benchmarks/bench_list_responses.py
+"""
+Compare the ORM + response_model path of GET /stock/ with the list_response fast path
+on 100k rows, using an in-memory SQLite database.
+
+Run from the project root:
+    python -m benchmarks.bench_list_responses
+"""
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.stock import Stock
+from app.schemas.stock import StockOut
+from app.utils.responses import list_response
+
+ROWS = 100_000
+REPEAT = 5
+
+def orm_path(db):
+    """What FastAPI does for `return db.query(Stock).all()` with response_model=List[StockOut]"""
+    stock = db.query(Stock).all()
+    validated = TypeAdapter(List[StockOut]).validate_python(stock, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+def fast_path(db):
+    return list_response(db, Stock, StockOut).body
+
+def bench(name, fn, session_factory):
+    times = []
+    for _ in range(REPEAT):
+        db = session_factory()
+        start = time.process_time()
+        fn(db)
+        times.append(time.process_time() - start)
+        db.close()
+    best = min(times)
+    print(f"  {name:<14} {best * 1000:8.1f} ms CPU  ({best / ROWS * 1e6:.2f} µs/row)")
+    return best
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Stock.__table__])
+    with engine.begin() as conn:
+        conn.execute(insert(Stock), [
+            {"product_id": i % 5000, "warehouse_id": i % 12, "quantity": i % 300}
+            for i in range(ROWS)
+        ])
+    session_factory = sessionmaker(bind=engine)
+
+    print(f"GET /stock/ with {ROWS} rows")
+    old = bench("ORM + model", orm_path, session_factory)
+    new = bench("list_response", fast_path, session_factory)
+    print(f"  CPU per row: {old / new:.1f}x lower")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/bench_login.py
+"""
+Password verifications per second through the hashing process pool, for pool sizes
+from 1 up to the number of cores. Uses BCRYPT_ROUNDS from the environment (default 12).
+
+Run from the project root:
+    python -m benchmarks.bench_login
+    BCRYPT_ROUNDS=10 python -m benchmarks.bench_login
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.utils.hashing import BCRYPT_ROUNDS, hash_password, verify_and_update
+
+LOGINS_PER_WORKER = 8
+
+def pool_sizes():
+    cores = os.cpu_count() or 1
+    sizes = [1]
+    while sizes[-1] * 2 <= cores:
+        sizes.append(sizes[-1] * 2)
+    if sizes[-1] != cores:
+        sizes.append(cores)
+    return sizes
+
+def main():
+    stored = hash_password("correct horse battery staple")
+
+    print(f"bcrypt cost {BCRYPT_ROUNDS}, {os.cpu_count()} cores")
+    single = None
+    for workers in pool_sizes():
+        logins = LOGINS_PER_WORKER * workers
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Warm the workers so process start-up is not counted
+            list(pool.map(verify_and_update, ["x"] * workers, [stored] * workers))
+
+            start = time.perf_counter()
+            results = list(pool.map(verify_and_update, ["correct horse battery staple"] * logins, [stored] * logins))
+            elapsed = time.perf_counter() - start
+
+        assert all(valid for valid, _ in results)
+        rate = logins / elapsed
+        single = single or rate
+        print(f"  {workers:3d} workers: {rate:7.1f} logins/s  ({rate / single:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_po_transitions.py
+"""
+Time the nightly approval run: 20k pending purchase orders moved to "approved" with one
+batch transition, against the same work done one PO at a time as the per-PO status
+endpoint does it. Uses an in-memory SQLite database.
+
+Run from the project root:
+    python -m benchmarks.bench_po_transitions
+"""
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.purchase_order import PurchaseOrder, POStatusHistory
+from app.models.supplier import Supplier
+from app.utils.purchase_orders import transition_purchase_orders
+
+PURCHASE_ORDERS = 20_000
+ONE_AT_A_TIME = 2_000  # sample for the per-PO timing, extrapolated to the full run
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[
+        Supplier.__table__, PurchaseOrder.__table__, POStatusHistory.__table__,
+    ])
+    db = sessionmaker(bind=engine)()
+
+    db.execute(insert(Supplier), [{"supplier_id": 1, "name": "Supplier 1"}])
+    db.execute(insert(PurchaseOrder), [
+        {"po_id": po_id, "supplier_id": 1, "status": "pending", "order_date": date.today()}
+        for po_id in range(1, PURCHASE_ORDERS + ONE_AT_A_TIME + 1)
+    ])
+    db.commit()
+    po_ids = list(range(1, PURCHASE_ORDERS + 1))
+    print(f"Approving {PURCHASE_ORDERS} pending purchase orders")
+
+    start = time.perf_counter()
+    for po_id in range(PURCHASE_ORDERS + 1, PURCHASE_ORDERS + ONE_AT_A_TIME + 1):
+        transition_purchase_orders(db, [po_id], "approved", changed_by=None)
+        db.commit()
+    per_po = (time.perf_counter() - start) / ONE_AT_A_TIME
+    print(f"  one at a time: {per_po * PURCHASE_ORDERS:6.2f} s (extrapolated from {ONE_AT_A_TIME}, "
+          f"without HTTP overhead)")
+
+    start = time.perf_counter()
+    result = transition_purchase_orders(db, po_ids, "approved", changed_by=None)
+    db.commit()
+    print(f"  batch:         {time.perf_counter() - start:6.2f} s, "
+          f"{len(result['moved'])} moved, {len(result['rejected'])} rejected")
+
+    # Approving again is rejected for every PO and changes nothing
+    start = time.perf_counter()
+    result = transition_purchase_orders(db, po_ids, "approved", changed_by=None)
+    db.commit()
+    assert not result["moved"] and len(result["rejected"]) == PURCHASE_ORDERS
+    print(f"  repeat batch:  {time.perf_counter() - start:6.2f} s, all rejected")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_replenishment.py
+"""
+Time a full replenishment plan over 500k (product, warehouse) pairs: 50k products from
+500 suppliers stocked in 10 warehouses, with four weeks of outbound transactions and a
+set of open purchase orders. Then commit it as purchase orders.
+Uses an in-memory SQLite database.
+
+Run from the project root:
+    python -m benchmarks.bench_replenishment
+"""
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.product import Product
+from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem, POStatusHistory
+from app.models.stock import Stock
+from app.models.stock_policy import StockPolicy
+from app.models.supplier import Supplier
+from app.models.transaction import Transaction
+from app.models.warehouse import Warehouse
+from app.utils.replenishment import build_plan, commit_plan
+
+PRODUCTS = 50_000
+WAREHOUSES = 10
+SUPPLIERS = 500
+OUTBOUND_TRANSACTIONS = 1_000_000
+OPEN_PO_LINES = 50_000
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[
+        Supplier.__table__, Warehouse.__table__, Product.__table__, Stock.__table__,
+        Transaction.__table__, PurchaseOrder.__table__, PurchaseOrderItem.__table__,
+        POStatusHistory.__table__, StockPolicy.__table__,
+    ])
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    db.execute(insert(Supplier), [{"supplier_id": s, "name": f"Supplier {s}"} for s in range(1, SUPPLIERS + 1)])
+    db.execute(insert(Warehouse), [{"warehouse_id": w, "name": f"Warehouse {w}"} for w in range(1, WAREHOUSES + 1)])
+    db.execute(insert(Product), [
+        {
+            "product_id": p,
+            "name": f"Product {p}",
+            "sku": f"SKU-{p}",
+            "supplier_id": rng.randint(1, SUPPLIERS),
+            "reorder_level": rng.randint(0, 50),
+            "unit_cost": rng.randint(100, 10_000) / 100,
+        }
+        for p in range(1, PRODUCTS + 1)
+    ])
+    db.execute(insert(Stock), [
+        {"product_id": p, "warehouse_id": w, "quantity": rng.randint(0, 300)}
+        for p in range(1, PRODUCTS + 1) for w in range(1, WAREHOUSES + 1)
+    ])
+    db.execute(insert(Transaction), [
+        {
+            "product_id": rng.randint(1, PRODUCTS),
+            "warehouse_id": rng.randint(1, WAREHOUSES),
+            "transaction_type": "out",
+            "quantity": rng.randint(1, 10),
+            "created_at": now - timedelta(seconds=rng.randint(0, 28 * 86400)),
+        }
+        for _ in range(OUTBOUND_TRANSACTIONS)
+    ])
+
+    # One open PO per supplier, with lead times learnt from their expected delivery dates
+    today = date.today()
+    db.execute(insert(PurchaseOrder), [
+        {
+            "po_id": s,
+            "supplier_id": s,
+            "status": "pending",
+            "order_date": today,
+            "expected_delivery": today + timedelta(days=rng.randint(2, 30)),
+        }
+        for s in range(1, SUPPLIERS + 1)
+    ])
+    db.execute(insert(PurchaseOrderItem), [
+        {
+            "po_id": rng.randint(1, SUPPLIERS),
+            "product_id": p,
+            "warehouse_id": rng.randint(1, WAREHOUSES),
+            "quantity": 100,
+            "unit_cost": 1,
+        }
+        for p in rng.sample(range(1, PRODUCTS + 1), OPEN_PO_LINES)
+    ])
+    db.commit()
+
+    print(f"Replenishment plan, {PRODUCTS * WAREHOUSES} pairs, {SUPPLIERS} suppliers, "
+          f"{OUTBOUND_TRANSACTIONS} outbound transactions")
+    plan, plan_time = timed(build_plan, db)
+    print(f"  dry run: {plan_time:5.2f} s, {plan['lines']} lines on {len(plan['purchase_orders'])} POs")
+
+    created, commit_time = timed(commit_plan, db, plan)
+    print(f"  commit:  {commit_time:5.2f} s, {len(created)} POs")
+
+    replan, replan_time = timed(build_plan, db)
+    assert replan["lines"] == 0, replan["lines"]
+    print(f"  re-plan after commit: {replan_time:5.2f} s, nothing left to order")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_startup.py
+"""
+Cold start of an API worker: a fresh interpreter imports app.main and runs the startup
+handlers, which is what uvicorn does before it accepts connections. Each configuration
+is timed over several processes, then one more run with `python -X importtime` gives
+the import-time profile: self time per top-level package, and the app modules with
+the largest cumulative import time.
+
+The schema check reads alembic_version from a throwaway SQLite database stamped at
+the head revision, so no MySQL or MongoDB server is needed (the Mongo client only
+connects on first use, and index creation runs in the background).
+
+Run from the project root:
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+from app.utils.schema import expected_revision
+
+RUNS = 5
+
+CONFIGURATIONS = [
+    ("all routes", {}),
+    ("without Mongo categories", {"MONGO_ENABLED": "0"}),
+    ("without Mongo or XML", {"MONGO_ENABLED": "0", "XML_ENABLED": "0"}),
+]
+
+# Runs in the child process; perf_counter starts after the interpreter itself is up
+WORKER = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def lifespan():
+    await app.router.startup()
+    ready = time.perf_counter()
+    await app.router.shutdown()
+    return ready
+
+ready = asyncio.run(lifespan())
+print(json.dumps({"import": imported - start, "ready": ready - start}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+def worker_env(database_path, overrides):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "MONGO_URI": "mongodb://localhost:27017/inventory_system",
+    })
+    env.update(overrides)
+    return env
+
+def run_worker(env, *flags):
+    result = subprocess.run(
+        [sys.executable, *flags, "-c", WORKER], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+def import_profile(stderr):
+    """(self ms per top-level package, cumulative ms per app module)"""
+    packages = defaultdict(float)
+    app_modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        packages[module.split(".")[0]] += int(self_us) / 1000
+        if module.startswith("app."):
+            app_modules[module] = int(cumulative_us) / 1000
+    return packages, app_modules
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, "startup.db")
+        with sqlite3.connect(database_path) as conn:
+            conn.execute("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)")
+            conn.execute("INSERT INTO alembic_version VALUES (?)", (expected_revision(),))
+
+        # Warm-up run so every configuration reads compiled bytecode
+        run_worker(worker_env(database_path, {}))
+
+        print(f"Cold start, median of {RUNS} processes")
+        print(f"  {'configuration':26} {'import':>8} {'ready':>8}")
+        for name, overrides in CONFIGURATIONS:
+            runs = [run_worker(worker_env(database_path, overrides))[0] for _ in range(RUNS)]
+            imported = statistics.median(run["import"] for run in runs)
+            ready = statistics.median(run["ready"] for run in runs)
+            print(f"  {name:26} {imported * 1000:6.0f}ms {ready * 1000:6.0f}ms")
+
+        _, stderr = run_worker(worker_env(database_path, {}), "-X", "importtime")
+
+    packages, app_modules = import_profile(stderr)
+    print("\nImport time by top-level package (self time, all routes)")
+    for package, ms in sorted(packages.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {package:30} {ms:7.1f}ms")
+
+    print("\nSlowest app modules (cumulative, including their first imports of dependencies)")
+    for module, ms in sorted(app_modules.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {module:40} {ms:7.1f}ms")
+
+if __name__ == "__main__":
+    main()
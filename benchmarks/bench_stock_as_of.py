@@ -0,0 +1,95 @@
+# benchmarks/bench_stock_as_of.py
+"""
+Time the point-in-time stock report for 100k (product, warehouse) keys, with daily
+snapshots as checkpoints, against summing the whole ledger up to the same instant.
+Uses an in-memory SQLite database, reporting as the history grows to 90 days.
+
+Run from the project root:
+    python -m benchmarks.bench_stock_as_of
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("STOCK_SNAPSHOT_SETTLE_SECONDS", "0")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+import sqlalchemy
+
+from app.database import Base
+from app.models.stock import Stock
+from app.models.stock_ledger import StockLedger, StockSnapshot
+from app.utils.stock_ledger import stock_as_of, take_snapshots
+
+PRODUCTS = 10_000
+WAREHOUSES = 10
+DAYS = 90
+MOVEMENTS_PER_DAY = 40_000
+REPORT_AFTER_DAYS = (7, 30, 90)
+
+def full_scan(db, ts):
+    """Balances without checkpoints: every ledger entry up to ts"""
+    return db.execute(sqlalchemy.text("""
+        SELECT product_id, warehouse_id, SUM(delta) AS quantity
+        FROM stock_ledger
+        WHERE created_at <= :ts
+        GROUP BY product_id, warehouse_id
+        ORDER BY product_id, warehouse_id
+    """), {"ts": ts}).mappings().all()
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Stock.__table__, StockLedger.__table__, StockSnapshot.__table__])
+    db = sessionmaker(bind=engine)()
+
+    rng = random.Random(42)
+    start = datetime(2025, 3, 1)
+
+    db.execute(insert(Stock), [
+        {"product_id": p, "warehouse_id": w, "quantity": 0}
+        for p in range(1, PRODUCTS + 1) for w in range(1, WAREHOUSES + 1)
+    ])
+
+    # Opening balance for every key, then daily movements with a checkpoint each night
+    db.execute(insert(StockLedger), [
+        {"product_id": p, "warehouse_id": w, "delta": 1000, "source": "opening", "created_at": start}
+        for p in range(1, PRODUCTS + 1) for w in range(1, WAREHOUSES + 1)
+    ])
+    keys = PRODUCTS * WAREHOUSES
+    print(f"Stock as of mid-afternoon, {keys} keys, {MOVEMENTS_PER_DAY} movements/day, nightly snapshots")
+    for day in range(DAYS):
+        day_start = start + timedelta(days=day, hours=8)
+        db.execute(insert(StockLedger), [
+            {
+                "product_id": rng.randint(1, PRODUCTS),
+                "warehouse_id": rng.randint(1, WAREHOUSES),
+                "delta": rng.randint(-20, 20),
+                "source": "transaction",
+                "created_at": day_start + timedelta(seconds=i),
+            }
+            for i in range(MOVEMENTS_PER_DAY)
+        ])
+        db.commit()
+
+        if day + 1 in REPORT_AFTER_DAYS:
+            ts = day_start + timedelta(hours=6)
+            scanned, scan_time = timed(full_scan, db, ts)
+            report, report_time = timed(stock_as_of, db, ts)
+            assert [tuple(r.values()) for r in scanned] == [tuple(r.values()) for r in report]
+            print(f"  {day + 1:3d} days of history: full ledger scan {scan_time:5.2f} s, "
+                  f"snapshot + ledger {report_time:5.2f} s")
+
+        take_snapshots(db)
+
+    one, one_time = timed(stock_as_of, db, ts, product_ids=[42], warehouse_ids=[3])
+    print(f"  single key: {one_time * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# jobs.py
+# Run the periodic jobs once, outside the API workers, e.g. from cron:
+#
+#   15 0 * * *   python jobs.py forecasts         # after the UTC day closes
+#   30 0 * * *   python jobs.py stock-policies    # uses the new forecasts
+#   */5 * * * *  python jobs.py stock-snapshots
+#
+# Each job holds a database lock while it runs, so a run that overlaps another one (from
+# cron, an API request or a worker's background loop) is skipped rather than repeated.
+import argparse
+
+from app.database import SessionLocal
+from app.utils.forecasting import refresh_forecasts
+from app.utils.stock_ledger import take_snapshots
+from app.utils.stock_policies import calculate_policies
+
+JOBS = {
+    "forecasts": lambda db, args: refresh_forecasts(db, full=args.full),
+    "stock-policies": lambda db, args: calculate_policies(db),
+    "stock-snapshots": lambda db, args: take_snapshots(db),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a periodic job once")
+    parser.add_argument("job", choices=sorted(JOBS))
+    parser.add_argument("--full", action="store_true", help="forecasts: refit every series from history")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"{args.job}: {JOBS[args.job](db, args)}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+# The forecast fits use a spawn process pool, which re-imports this module
+if __name__ == "__main__":
+    main()
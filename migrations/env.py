@@ -0,0 +1,28 @@
+# migrations/env.py
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.database import DATABASE_URL, Base
+import app.models  # noqa: F401  registers the models on Base.metadata
+from app.models import alert, purchase_order, return_  # noqa: F401  not re-exported by app.models
+
+target_metadata = Base.metadata
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL instead of running it (alembic upgrade head --sql)"""
+    context.configure(url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    engine = create_engine(DATABASE_URL)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
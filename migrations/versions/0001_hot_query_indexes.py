@@ -0,0 +1,82 @@
+# migrations/versions/0001_hot_query_indexes.py
+"""
+Index plan for the hot query shapes, and drop indexes that duplicate a primary key.
+
+Databases were created either from sqldb.sql, which declares a UNIQUE INDEX on every
+primary key column, or by create_all from models declared with primary_key=True,
+index=True, which adds ix_<table>_<column>. Either way every insert maintains a second
+copy of the primary key. Both variants are dropped here, and each index is only
+created if it is missing, so the revision applies to databases built either way.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from typing import Optional
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (table, index name, columns); see the models for the query each one serves
+INDEXES = [
+    ("transactions", "ix_transactions_product_id_created_at",
+     ["product_id", "created_at", "transaction_type", "quantity"]),
+    ("transactions", "ix_transactions_created_at",
+     ["created_at", "transaction_type", "product_id", "warehouse_id", "quantity"]),
+    ("stock_alerts", "ix_stock_alerts_open", ["is_resolved", "alert_type", "product_id", "warehouse_id"]),
+    ("stock_alerts", "ix_stock_alerts_resolved_created_at", ["is_resolved", "created_at"]),
+    ("purchase_order_items", "ix_purchase_order_items_po_id", ["po_id"]),
+    ("purchase_orders", "ix_purchase_orders_status_order_date", ["status", "order_date"]),
+    ("returns", "ix_returns_product_id", ["product_id"]),
+]
+
+# Tables whose primary key column also has its own single-column index
+PRIMARY_KEYS = {
+    "categories": "category_id",
+    "purchase_orders": "po_id",
+    "users": "user_id",
+    "products": "product_id",
+    "purchase_order_items": "po_item_id",
+    "report_logs": "log_id",
+    "returns": "return_id",
+    "stock": "stock_id",
+    "warehouses": "warehouse_id",
+    "suppliers": "supplier_id",
+    "transactions": "transaction_id",
+}
+
+def _indexes(table: str) -> Optional[dict]:
+    """Index name -> columns, or None if the table doesn't exist"""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {index["name"]: index["column_names"] for index in inspector.get_indexes(table)}
+
+def upgrade() -> None:
+    for table, name, columns in INDEXES:
+        existing = _indexes(table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns)
+
+    for table, column in PRIMARY_KEYS.items():
+        existing = _indexes(table) or {}
+        for name, columns in existing.items():
+            if columns == [column]:
+                op.drop_index(name, table_name=table)
+
+def downgrade() -> None:
+    for table, column in PRIMARY_KEYS.items():
+        existing = _indexes(table)
+        if existing is not None and column not in existing:
+            op.create_index(column, table, [column], unique=True)
+
+    for table, name, columns in reversed(INDEXES):
+        existing = _indexes(table) or {}
+        # ix_purchase_order_items_po_id predates this revision
+        if name in existing and name != "ix_purchase_order_items_po_id":
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,211 @@
+# migrations/versions/0002_startup_schema.py
+"""
+Schema changes that used to be applied by every worker at startup (app/main.py
+create_tables) or on request (POST /alerts/mysql-fix): the stock_alerts table, the
+users.role_id and purchase_order_items.received_quantity columns, the tables added
+since sqldb.sql was first dumped, dropping the old PO status trigger, and the opening
+stock ledger entries for stock rows that predate the ledger.
+
+Like 0001 each step checks the schema first, so it applies both to databases that
+have been through those startup paths and to ones that never were.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+def _create_missing_tables() -> list:
+    """Create each table that doesn't exist yet; returns the names created"""
+    existing = set(_inspector().get_table_names())
+    created = []
+
+    def table(name, *columns_and_indexes):
+        if name in existing:
+            return
+        columns = [item for item in columns_and_indexes if not isinstance(item, tuple)]
+        indexes = [item for item in columns_and_indexes if isinstance(item, tuple)]
+        op.create_table(name, *columns)
+        for index_name, index_columns in indexes:
+            op.create_index(index_name, name, index_columns)
+        created.append(name)
+
+    table(
+        "stock_alerts",
+        sa.Column("alert_id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("product_id", sa.Integer, sa.ForeignKey("products.product_id"), nullable=False),
+        sa.Column("warehouse_id", sa.Integer, sa.ForeignKey("warehouses.warehouse_id"), nullable=False),
+        sa.Column("current_quantity", sa.Integer, nullable=False),
+        sa.Column("threshold", sa.Integer, nullable=False),
+        sa.Column("alert_type", sa.String(50), nullable=False),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+        sa.Column("is_resolved", sa.Boolean, server_default=sa.false(), nullable=False),
+        sa.Column("resolved_at", sa.DateTime, nullable=True),
+        ("ix_stock_alerts_open", ["is_resolved", "alert_type", "product_id", "warehouse_id"]),
+        ("ix_stock_alerts_resolved_created_at", ["is_resolved", "created_at"]),
+    )
+    table(
+        "category_thresholds",
+        sa.Column("category_code", sa.String(50), primary_key=True),
+        sa.Column("min_stock_threshold", sa.Integer, nullable=True),
+        sa.Column("reorder_level", sa.Integer, nullable=True),
+        sa.Column("version", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("synced_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+    )
+    table(
+        "stock_ledger",
+        sa.Column("entry_id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("product_id", sa.Integer, sa.ForeignKey("products.product_id"), nullable=False),
+        sa.Column("warehouse_id", sa.Integer, sa.ForeignKey("warehouses.warehouse_id"), nullable=False),
+        sa.Column("delta", sa.Integer, nullable=False),
+        sa.Column("source", sa.String(20), nullable=False),
+        sa.Column("reference_id", sa.Integer, nullable=True),
+        sa.Column("created_by", sa.Integer, sa.ForeignKey("users.user_id"), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+        ("ix_stock_ledger_covering", ["product_id", "warehouse_id", "entry_id", "created_at", "delta"]),
+    )
+    table(
+        "stock_snapshots",
+        sa.Column("snapshot_id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("product_id", sa.Integer, nullable=False),
+        sa.Column("warehouse_id", sa.Integer, nullable=False),
+        sa.Column("quantity", sa.Integer, nullable=False),
+        sa.Column("last_entry_id", sa.Integer, nullable=False),
+        sa.Column("as_of", sa.TIMESTAMP(timezone=True), nullable=False),
+        ("ix_stock_snapshots_key_as_of", ["product_id", "warehouse_id", "as_of"]),
+    )
+    table(
+        "idempotency_keys",
+        sa.Column("key_hash", sa.String(32), primary_key=True),
+        sa.Column("request_hash", sa.String(32), nullable=False),
+        sa.Column("status_code", sa.Integer, nullable=True),
+        sa.Column("content_type", sa.String(100), nullable=True),
+        sa.Column("response_body", sa.LargeBinary, nullable=True),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+        ("ix_idempotency_keys_expires_at", ["expires_at"]),
+    )
+    table(
+        "demand_forecasts",
+        sa.Column("product_id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("warehouse_id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("model", sa.String(10), nullable=False),
+        sa.Column("alpha", sa.Float, nullable=False),
+        sa.Column("level", sa.Float, nullable=False),
+        sa.Column("demand_interval", sa.Float, nullable=False),
+        sa.Column("days_since_demand", sa.Integer, nullable=False),
+        sa.Column("forecast", sa.Float, nullable=False),
+        sa.Column("error_variance", sa.Float, nullable=False),
+        sa.Column("fitted_through", sa.Date, nullable=False),
+        sa.Column("fitted_at", sa.DateTime, nullable=False),
+    )
+    table(
+        "stock_policies",
+        sa.Column("product_id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("warehouse_id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("safety_stock", sa.Integer, nullable=False),
+        sa.Column("reorder_point", sa.Integer, nullable=False),
+        sa.Column("demand_per_day", sa.Float, nullable=False),
+        sa.Column("demand_std", sa.Float, nullable=False),
+        sa.Column("lead_time_days", sa.Float, nullable=False),
+        sa.Column("lead_time_std", sa.Float, nullable=False),
+        sa.Column("calculated_at", sa.DateTime, nullable=False),
+    )
+    table(
+        "stock_policy_changes",
+        sa.Column("change_id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("product_id", sa.Integer, nullable=False),
+        sa.Column("warehouse_id", sa.Integer, nullable=False),
+        sa.Column("old_safety_stock", sa.Integer, nullable=True),
+        sa.Column("new_safety_stock", sa.Integer, nullable=False),
+        sa.Column("old_reorder_point", sa.Integer, nullable=True),
+        sa.Column("new_reorder_point", sa.Integer, nullable=False),
+        sa.Column("changed_at", sa.DateTime, nullable=False),
+        ("ix_stock_policy_changes_key_changed_at", ["product_id", "warehouse_id", "changed_at"]),
+    )
+    table(
+        "supplier_performance",
+        sa.Column("supplier_id", sa.Integer, primary_key=True, autoincrement=False),
+        *[sa.Column(name, sa.Integer, nullable=False, server_default="0") for name in (
+            "orders_received", "orders_cancelled", "due_orders", "on_time_orders",
+            "lead_time_orders", "lead_time_days_sum", "lead_time_days_sq_sum",
+            "lead_le_7", "lead_le_14", "lead_le_30", "lead_gt_30",
+            "quantity_ordered", "quantity_received",
+        )],
+        sa.Column("standard_cost", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("cost_variance", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+    )
+    table(
+        "po_status_history",
+        sa.Column("history_id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("po_id", sa.Integer, sa.ForeignKey("purchase_orders.po_id"), nullable=False),
+        sa.Column("old_status", sa.String(20), nullable=True),
+        sa.Column("new_status", sa.String(20), nullable=False),
+        sa.Column("changed_by", sa.Integer, sa.ForeignKey("users.user_id"), nullable=True),
+        sa.Column("changed_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("notes", sa.Text, nullable=True),
+        ("ix_po_status_history_po_id_history_id", ["po_id", "history_id"]),
+    )
+    return created
+
+def upgrade() -> None:
+    created = _create_missing_tables()
+    inspector = _inspector()
+
+    # Roles are embedded in access tokens at login, so users need a role_id column
+    if "role_id" not in {column["name"] for column in inspector.get_columns("users")}:
+        op.add_column("users", sa.Column("role_id", sa.Integer, nullable=True))
+
+    # Partial receiving tracks the quantity received so far on each PO line; lines of POs
+    # that were already received in full start out complete
+    if "received_quantity" not in {column["name"] for column in inspector.get_columns("purchase_order_items")}:
+        op.add_column("purchase_order_items", sa.Column(
+            "received_quantity", sa.Integer, nullable=False, server_default="0"
+        ))
+        op.execute("""
+            UPDATE purchase_order_items SET received_quantity = quantity
+            WHERE po_id IN (SELECT po_id FROM purchase_orders WHERE status = 'received')
+        """)
+
+    # Indexes that startup used to add to tables that already existed
+    for table, name, columns in (
+        ("stock_ledger", "ix_stock_ledger_covering", ["product_id", "warehouse_id", "entry_id", "created_at", "delta"]),
+        ("po_status_history", "ix_po_status_history_po_id_history_id", ["po_id", "history_id"]),
+    ):
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+    # PO status history is written by the application; the old trigger would log every
+    # change twice, attributed to the PO's creator
+    if op.get_bind().dialect.name == "mysql":
+        op.execute("DROP TRIGGER IF EXISTS after_po_status_change")
+
+    # Stock rows that predate the ledger get an opening entry so balances can be rebuilt
+    # from it. Every stock change since writes its own ledger entry.
+    op.execute("""
+        INSERT INTO stock_ledger (product_id, warehouse_id, delta, source)
+        SELECT s.product_id, s.warehouse_id, s.quantity, 'opening'
+        FROM stock s
+        WHERE s.quantity <> 0
+          AND NOT EXISTS (
+              SELECT 1 FROM stock_ledger l
+              WHERE l.product_id = s.product_id AND l.warehouse_id = s.warehouse_id
+          )
+    """)
+
+    if created:
+        print(f"Created tables: {', '.join(created)}")
+
+def downgrade() -> None:
+    # The tables and columns hold data the application can't rebuild, and the startup
+    # code that used to create them is gone, so there is nothing safe to undo here
+    pass
@@ -0,0 +1,45 @@
+# migrations/versions/0003_assign_user_roles.py
+"""
+Give users that predate roles a role. Tokens carry the permissions of users.role_id
+(app/utils/permissions.py), and the column was added without ever being filled, so
+every existing user was locked out of the staff and admin endpoints.
+
+Existing users become staff. If that leaves no admin, the user named "admin" (created
+by seed_data.py) or else the first registered user becomes one, so roles can be
+managed through PUT /users/{user_id}/role from then on. Users registered after this
+revision start without a role until an admin assigns one.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+ROLE_ADMIN = 1
+ROLE_STAFF = 2
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    conn.execute(sa.text("UPDATE users SET role_id = :staff WHERE role_id IS NULL"), {"staff": ROLE_STAFF})
+
+    if conn.execute(sa.text("SELECT COUNT(*) FROM users WHERE role_id = :admin"), {"admin": ROLE_ADMIN}).scalar():
+        return
+
+    admin_id = conn.execute(sa.text("SELECT user_id FROM users WHERE username = 'admin'")).scalar()
+    if admin_id is None:
+        admin_id = conn.execute(sa.text("SELECT MIN(user_id) FROM users")).scalar()
+    if admin_id is not None:
+        conn.execute(
+            sa.text("UPDATE users SET role_id = :admin WHERE user_id = :user_id"),
+            {"admin": ROLE_ADMIN, "user_id": admin_id}
+        )
+
+def downgrade() -> None:
+    # The roles assigned here can't be told apart from ones set by an admin since
+    pass
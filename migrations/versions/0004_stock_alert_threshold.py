@@ -0,0 +1,84 @@
+# migrations/versions/0004_stock_alert_threshold.py
+"""
+Recreate the stock alert triggers with the threshold rule POST /alerts/check-stock-levels
+uses (EFFECTIVE_THRESHOLD in app/routers/alert.py): the stock policy's reorder point, then
+the product's reorder level (0 means unset), then its category's mirrored minimum and
+reorder level, else 5, with stock low strictly below it. The triggers used to ignore
+stock policies and category minimums, default to 0 and alert at the threshold itself, so
+the two alert paths disagreed about the same product.
+
+MySQL only; other databases have no triggers.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+THRESHOLD_SELECT = """
+    SELECT COALESCE(sp.reorder_point, NULLIF(p.reorder_level, 0), ct.min_stock_threshold, ct.reorder_level, 5)
+    INTO threshold
+    FROM products p
+    LEFT JOIN category_thresholds ct ON ct.category_code = p.category_code
+    LEFT JOIN stock_policies sp ON sp.product_id = NEW.product_id AND sp.warehouse_id = NEW.warehouse_id
+    WHERE p.product_id = NEW.product_id;
+"""
+
+AFTER_INSERT = f"""
+CREATE TRIGGER after_stock_insert
+AFTER INSERT ON stock
+FOR EACH ROW
+BEGIN
+    DECLARE threshold INT;
+    {THRESHOLD_SELECT}
+    IF NEW.quantity < threshold AND NEW.quantity > 0 THEN
+        INSERT INTO stock_alerts
+            (product_id, warehouse_id, current_quantity, threshold, alert_type)
+        VALUES
+            (NEW.product_id, NEW.warehouse_id, NEW.quantity, threshold, 'low_stock');
+    ELSEIF NEW.quantity = 0 THEN
+        INSERT INTO stock_alerts
+            (product_id, warehouse_id, current_quantity, threshold, alert_type)
+        VALUES
+            (NEW.product_id, NEW.warehouse_id, 0, threshold, 'out_of_stock');
+    END IF;
+END
+"""
+
+AFTER_UPDATE = f"""
+CREATE TRIGGER after_stock_update
+AFTER UPDATE ON stock
+FOR EACH ROW
+BEGIN
+    DECLARE threshold INT;
+    {THRESHOLD_SELECT}
+    IF NEW.quantity < threshold AND NEW.quantity > 0 AND (OLD.quantity >= threshold OR OLD.quantity IS NULL) THEN
+        INSERT INTO stock_alerts
+            (product_id, warehouse_id, current_quantity, threshold, alert_type)
+        VALUES
+            (NEW.product_id, NEW.warehouse_id, NEW.quantity, threshold, 'low_stock');
+    ELSEIF NEW.quantity = 0 AND OLD.quantity > 0 THEN
+        INSERT INTO stock_alerts
+            (product_id, warehouse_id, current_quantity, threshold, alert_type)
+        VALUES
+            (NEW.product_id, NEW.warehouse_id, 0, threshold, 'out_of_stock');
+    END IF;
+END
+"""
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "mysql":
+        return
+    op.execute("DROP TRIGGER IF EXISTS after_stock_insert")
+    op.execute("DROP TRIGGER IF EXISTS after_stock_update")
+    op.execute(AFTER_INSERT)
+    op.execute(AFTER_UPDATE)
+
+def downgrade() -> None:
+    # The previous rule is what this revision fixes; the triggers stay as they are
+    pass
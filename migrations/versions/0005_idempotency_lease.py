@@ -0,0 +1,26 @@
+# migrations/versions/0005_idempotency_lease.py
+"""
+Add idempotency_keys.reserved_until, the lease of the request that reserved a key.
+A reservation whose request died before storing its response (a crash or restart)
+used to answer every retry with 409 until the key expired; once the lease has passed
+a retry now takes the key over (app/utils/idempotency.py).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("idempotency_keys")}
+    if "reserved_until" not in columns:
+        op.add_column("idempotency_keys", sa.Column("reserved_until", sa.DateTime, nullable=True))
+
+def downgrade() -> None:
+    op.drop_column("idempotency_keys", "reserved_until")
@@ -0,0 +1,30 @@
+# migrations/versions/0006_revoked_tokens.py
+"""
+Add revoked_tokens, logouts shared by every worker. The staff and admin checks read it
+together with the user's current role (app/utils/permissions.py), so a logout or role
+change made through one worker applies to privileged endpoints on all of them.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    if "revoked_tokens" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(32), primary_key=True),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+
+def downgrade() -> None:
+    op.drop_table("revoked_tokens")
@@ -1,6 +1,10 @@
 # run.py
-from app.database import Base, engine
-from app.models import user, role
+# Bring the database schema up to date (same as `alembic upgrade head`). Run once per
+# deploy, before starting the API workers; they only check the revision at startup.
+import os
 
-Base.metadata.create_all(bind=engine)
-print("Database tables created successfully.")
\ No newline at end of file
+from alembic import command
+from alembic.config import Config
+
+command.upgrade(Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")), "head")
+print("Database schema is up to date.")
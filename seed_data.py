@@ -9,6 +9,7 @@ from app.models.transaction import Transaction
 from app.models.purchase_order import PurchaseOrder
 from app.models.user import User
 from app.utils.hashing import hash_password
+from app.utils.permissions import ROLE_ADMIN
 
 from datetime import datetime
 
@@ -120,9 +121,12 @@ try:
     # Insert admin user
     admin = db.query(User).filter_by(username="admin").first()
     if not admin:
-        new_admin = User(username="admin", password_hash=hash_password("admin123"))
+        new_admin = User(username="admin", password_hash=hash_password("admin123"), role_id=ROLE_ADMIN)
         db.add(new_admin)
         db.commit()
+    elif admin.role_id != ROLE_ADMIN:
+        admin.role_id = ROLE_ADMIN
+        db.commit()
 
     print("✅ Database seeded successfully!")
 
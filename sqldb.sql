@@ -25,7 +25,6 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`categories` (
   `name` VARCHAR(100) NOT NULL,
   `description` TEXT NULL DEFAULT NULL,
   PRIMARY KEY (`category_id`),
-  UNIQUE INDEX `category_id` (`category_id` ASC) VISIBLE,
   UNIQUE INDEX `name` (`name` ASC) VISIBLE)
 ENGINE = InnoDB
 AUTO_INCREMENT = 22
@@ -45,7 +44,7 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`purchase_orders` (
   `expected_delivery` DATE NULL DEFAULT NULL,
   `notes` TEXT NULL DEFAULT NULL,
   PRIMARY KEY (`po_id`),
-  UNIQUE INDEX `po_id` (`po_id` ASC) VISIBLE)
+  INDEX `ix_purchase_orders_status_order_date` (`status` ASC, `order_date` ASC) VISIBLE)
 ENGINE = InnoDB
 AUTO_INCREMENT = 7
 DEFAULT CHARACTER SET = utf8mb4
@@ -60,8 +59,8 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`users` (
   `username` VARCHAR(50) NOT NULL,
   `password_hash` TEXT NOT NULL,
   `created_at` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+  `role_id` INT NULL DEFAULT NULL,
   PRIMARY KEY (`user_id`),
-  UNIQUE INDEX `user_id` (`user_id` ASC) VISIBLE,
   UNIQUE INDEX `username` (`username` ASC) VISIBLE)
 ENGINE = InnoDB
 AUTO_INCREMENT = 9
@@ -81,7 +80,7 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`po_status_history` (
   `changed_at` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   `notes` TEXT NULL DEFAULT NULL,
   PRIMARY KEY (`history_id`),
-  INDEX `po_id` (`po_id` ASC) VISIBLE,
+  INDEX `ix_po_status_history_po_id_history_id` (`po_id` ASC, `history_id` ASC) VISIBLE,
   INDEX `changed_by` (`changed_by` ASC) VISIBLE,
   CONSTRAINT `po_status_history_ibfk_1`
     FOREIGN KEY (`po_id`)
@@ -110,7 +109,6 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`products` (
   `created_at` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   `category_code` VARCHAR(50) NULL DEFAULT NULL,
   PRIMARY KEY (`product_id`),
-  UNIQUE INDEX `product_id` (`product_id` ASC) VISIBLE,
   UNIQUE INDEX `sku` (`sku` ASC) VISIBLE,
   INDEX `idx_products_category_code` (`category_code` ASC) VISIBLE)
 ENGINE = InnoDB
@@ -129,8 +127,9 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`purchase_order_items` (
   `quantity` INT NOT NULL,
   `unit_cost` DECIMAL(10,2) NULL DEFAULT NULL,
   `warehouse_id` INT NULL DEFAULT NULL,
+  `received_quantity` INT NOT NULL DEFAULT '0',
   PRIMARY KEY (`po_item_id`),
-  UNIQUE INDEX `po_item_id` (`po_item_id` ASC) VISIBLE)
+  INDEX `ix_purchase_order_items_po_id` (`po_id` ASC) VISIBLE)
 ENGINE = InnoDB
 AUTO_INCREMENT = 7
 DEFAULT CHARACTER SET = utf8mb4
@@ -146,8 +145,7 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`report_logs` (
   `user_id` INT NULL DEFAULT NULL,
   `generated_at` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   `parameters` JSON NULL DEFAULT NULL,
-  PRIMARY KEY (`log_id`),
-  UNIQUE INDEX `log_id` (`log_id` ASC) VISIBLE)
+  PRIMARY KEY (`log_id`))
 ENGINE = InnoDB
 AUTO_INCREMENT = 6
 DEFAULT CHARACTER SET = utf8mb4
@@ -167,7 +165,7 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`returns` (
   `created_by` INT NULL DEFAULT NULL,
   `created_at` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`return_id`),
-  UNIQUE INDEX `return_id` (`return_id` ASC) VISIBLE)
+  INDEX `ix_returns_product_id` (`product_id` ASC) VISIBLE)
 ENGINE = InnoDB
 DEFAULT CHARACTER SET = utf8mb4
 COLLATE = utf8mb4_0900_ai_ci;
@@ -182,7 +180,6 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`stock` (
   `warehouse_id` INT NULL DEFAULT NULL,
   `quantity` INT NOT NULL DEFAULT '0',
   PRIMARY KEY (`stock_id`),
-  UNIQUE INDEX `stock_id` (`stock_id` ASC) VISIBLE,
   UNIQUE INDEX `product_id` (`product_id` ASC, `warehouse_id` ASC) VISIBLE)
 ENGINE = InnoDB
 AUTO_INCREMENT = 6
@@ -197,8 +194,7 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`warehouses` (
   `warehouse_id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
   `name` VARCHAR(100) NOT NULL,
   `location` TEXT NULL DEFAULT NULL,
-  PRIMARY KEY (`warehouse_id`),
-  UNIQUE INDEX `warehouse_id` (`warehouse_id` ASC) VISIBLE)
+  PRIMARY KEY (`warehouse_id`))
 ENGINE = InnoDB
 AUTO_INCREMENT = 13
 DEFAULT CHARACTER SET = utf8mb4
@@ -221,6 +217,8 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`stock_alerts` (
   PRIMARY KEY (`alert_id`),
   INDEX `product_id` (`product_id` ASC) VISIBLE,
   INDEX `warehouse_id` (`warehouse_id` ASC) VISIBLE,
+  INDEX `ix_stock_alerts_open` (`is_resolved` ASC, `alert_type` ASC, `product_id` ASC, `warehouse_id` ASC) VISIBLE,
+  INDEX `ix_stock_alerts_resolved_created_at` (`is_resolved` ASC, `created_at` ASC) VISIBLE,
   CONSTRAINT `stock_alerts_ibfk_1`
     FOREIGN KEY (`product_id`)
     REFERENCES `inventory_system`.`products` (`product_id`),
@@ -233,6 +231,183 @@ DEFAULT CHARACTER SET = utf8mb4
 COLLATE = utf8mb4_0900_ai_ci;
 
 
+-- -----------------------------------------------------
+-- Table `inventory_system`.`category_thresholds`
+-- Mirror of MongoDB category thresholds, resolved down the category hierarchy
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`category_thresholds` (
+  `category_code` VARCHAR(50) NOT NULL,
+  `min_stock_threshold` INT NULL DEFAULT NULL,
+  `reorder_level` INT NULL DEFAULT NULL,
+  `version` INT NOT NULL DEFAULT '0',
+  `synced_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`category_code`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `inventory_system`.`stock_ledger`
+-- Append-only stock movements; stock.quantity is their running total
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`stock_ledger` (
+  `entry_id` INT NOT NULL AUTO_INCREMENT,
+  `product_id` INT NOT NULL,
+  `warehouse_id` INT NOT NULL,
+  `delta` INT NOT NULL,
+  `source` VARCHAR(20) NOT NULL,
+  `reference_id` INT NULL DEFAULT NULL,
+  `created_by` INT NULL DEFAULT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`entry_id`),
+  INDEX `ix_stock_ledger_covering` (`product_id` ASC, `warehouse_id` ASC, `entry_id` ASC, `created_at` ASC, `delta` ASC) VISIBLE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `inventory_system`.`stock_snapshots`
+-- Per-(product, warehouse) balances covering the ledger up to last_entry_id
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`stock_snapshots` (
+  `snapshot_id` INT NOT NULL AUTO_INCREMENT,
+  `product_id` INT NOT NULL,
+  `warehouse_id` INT NOT NULL,
+  `quantity` INT NOT NULL,
+  `last_entry_id` INT NOT NULL,
+  `as_of` TIMESTAMP NOT NULL,
+  PRIMARY KEY (`snapshot_id`),
+  INDEX `ix_stock_snapshots_key_as_of` (`product_id` ASC, `warehouse_id` ASC, `as_of` ASC) VISIBLE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `inventory_system`.`idempotency_keys`
+-- Stored responses for requests sent with an Idempotency-Key header
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`idempotency_keys` (
+  `key_hash` VARCHAR(32) NOT NULL,
+  `request_hash` VARCHAR(32) NOT NULL,
+  `status_code` INT NULL DEFAULT NULL,
+  `content_type` VARCHAR(100) NULL DEFAULT NULL,
+  `response_body` BLOB NULL DEFAULT NULL,
+  `reserved_until` DATETIME NULL DEFAULT NULL,
+  `expires_at` DATETIME NOT NULL,
+  PRIMARY KEY (`key_hash`),
+  INDEX `ix_idempotency_keys_expires_at` (`expires_at` ASC) VISIBLE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `inventory_system`.`revoked_tokens`
+-- Access tokens logged out before they expire, shared by every worker
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`revoked_tokens` (
+  `jti` VARCHAR(32) NOT NULL,
+  `expires_at` DATETIME NOT NULL,
+  PRIMARY KEY (`jti`),
+  INDEX `ix_revoked_tokens_expires_at` (`expires_at` ASC) VISIBLE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `inventory_system`.`demand_forecasts`
+-- Fitted daily demand model per product and warehouse
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`demand_forecasts` (
+  `product_id` INT NOT NULL,
+  `warehouse_id` INT NOT NULL,
+  `model` VARCHAR(10) NOT NULL,
+  `alpha` FLOAT NOT NULL,
+  `level` FLOAT NOT NULL,
+  `demand_interval` FLOAT NOT NULL,
+  `days_since_demand` INT NOT NULL,
+  `forecast` FLOAT NOT NULL,
+  `error_variance` FLOAT NOT NULL,
+  `fitted_through` DATE NOT NULL,
+  `fitted_at` DATETIME NOT NULL,
+  PRIMARY KEY (`product_id`, `warehouse_id`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `inventory_system`.`stock_policies`
+-- Calculated safety stock and reorder point per product and warehouse
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`stock_policies` (
+  `product_id` INT NOT NULL,
+  `warehouse_id` INT NOT NULL,
+  `safety_stock` INT NOT NULL,
+  `reorder_point` INT NOT NULL,
+  `demand_per_day` FLOAT NOT NULL,
+  `demand_std` FLOAT NOT NULL,
+  `lead_time_days` FLOAT NOT NULL,
+  `lead_time_std` FLOAT NOT NULL,
+  `calculated_at` DATETIME NOT NULL,
+  PRIMARY KEY (`product_id`, `warehouse_id`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `inventory_system`.`stock_policy_changes`
+-- Before and after values written by the policy recalculation job
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`stock_policy_changes` (
+  `change_id` INT NOT NULL AUTO_INCREMENT,
+  `product_id` INT NOT NULL,
+  `warehouse_id` INT NOT NULL,
+  `old_safety_stock` INT NULL DEFAULT NULL,
+  `new_safety_stock` INT NOT NULL,
+  `old_reorder_point` INT NULL DEFAULT NULL,
+  `new_reorder_point` INT NOT NULL,
+  `changed_at` DATETIME NOT NULL,
+  PRIMARY KEY (`change_id`),
+  INDEX `ix_stock_policy_changes_key_changed_at` (`product_id` ASC, `warehouse_id` ASC, `changed_at` ASC) VISIBLE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
+-- -----------------------------------------------------
+-- Table `inventory_system`.`supplier_performance`
+-- Running totals per supplier over closed purchase orders
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `inventory_system`.`supplier_performance` (
+  `supplier_id` INT NOT NULL,
+  `orders_received` INT NOT NULL DEFAULT 0,
+  `orders_cancelled` INT NOT NULL DEFAULT 0,
+  `due_orders` INT NOT NULL DEFAULT 0,
+  `on_time_orders` INT NOT NULL DEFAULT 0,
+  `lead_time_orders` INT NOT NULL DEFAULT 0,
+  `lead_time_days_sum` INT NOT NULL DEFAULT 0,
+  `lead_time_days_sq_sum` INT NOT NULL DEFAULT 0,
+  `lead_le_7` INT NOT NULL DEFAULT 0,
+  `lead_le_14` INT NOT NULL DEFAULT 0,
+  `lead_le_30` INT NOT NULL DEFAULT 0,
+  `lead_gt_30` INT NOT NULL DEFAULT 0,
+  `quantity_ordered` INT NOT NULL DEFAULT 0,
+  `quantity_received` INT NOT NULL DEFAULT 0,
+  `standard_cost` DECIMAL(14,2) NOT NULL DEFAULT '0.00',
+  `cost_variance` DECIMAL(14,2) NOT NULL DEFAULT '0.00',
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`supplier_id`))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+
 -- -----------------------------------------------------
 -- Table `inventory_system`.`suppliers`
 -- -----------------------------------------------------
@@ -243,8 +418,7 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`suppliers` (
   `email` VARCHAR(100) NULL DEFAULT NULL,
   `phone` VARCHAR(20) NULL DEFAULT NULL,
   `address` TEXT NULL DEFAULT NULL,
-  PRIMARY KEY (`supplier_id`),
-  UNIQUE INDEX `supplier_id` (`supplier_id` ASC) VISIBLE)
+  PRIMARY KEY (`supplier_id`))
 ENGINE = InnoDB
 AUTO_INCREMENT = 12
 DEFAULT CHARACTER SET = utf8mb4
@@ -264,7 +438,8 @@ CREATE TABLE IF NOT EXISTS `inventory_system`.`transactions` (
   `created_by` INT NULL DEFAULT NULL,
   `created_at` TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`transaction_id`),
-  UNIQUE INDEX `transaction_id` (`transaction_id` ASC) VISIBLE)
+  INDEX `ix_transactions_product_id_created_at` (`product_id` ASC, `created_at` ASC, `transaction_type` ASC, `quantity` ASC) VISIBLE,
+  INDEX `ix_transactions_created_at` (`created_at` ASC, `transaction_type` ASC, `product_id` ASC, `warehouse_id` ASC, `quantity` ASC) VISIBLE)
 ENGINE = InnoDB
 AUTO_INCREMENT = 18
 DEFAULT CHARACTER SET = utf8mb4
@@ -520,23 +695,6 @@ CREATE  OR REPLACE ALGORITHM=UNDEFINED DEFINER=`root`@`localhost` SQL SECURITY D
 USE `inventory_system`;
 
 DELIMITER $$
-USE `inventory_system`$$
-CREATE
-DEFINER=`root`@`localhost`
-TRIGGER `inventory_system`.`after_po_status_change`
-AFTER UPDATE ON `inventory_system`.`purchase_orders`
-FOR EACH ROW
-BEGIN
-    -- Only log when status changes
-    IF OLD.status <> NEW.status THEN
-        INSERT INTO po_status_history 
-            (po_id, old_status, new_status, changed_by, notes)
-        VALUES 
-            (NEW.po_id, OLD.status, NEW.status, NEW.ordered_by, 
-             CONCAT('Status changed from ', OLD.status, ' to ', NEW.status));
-    END IF;
-END$$
-
 USE `inventory_system`$$
 CREATE
 DEFINER=`root`@`localhost`
@@ -546,13 +704,16 @@ FOR EACH ROW
 BEGIN
     DECLARE threshold INT;
     
-    -- Get the reorder level from the product
-    SELECT reorder_level INTO threshold 
-    FROM products 
-    WHERE product_id = NEW.product_id;
+    -- Same rule as EFFECTIVE_THRESHOLD in app/routers/alert.py: the stock policy's reorder
+    -- point, then the product's reorder level (0 means unset), then its category, else 5
+    SELECT COALESCE(sp.reorder_point, NULLIF(p.reorder_level, 0), ct.min_stock_threshold, ct.reorder_level, 5) INTO threshold 
+    FROM products p
+    LEFT JOIN category_thresholds ct ON ct.category_code = p.category_code
+    LEFT JOIN stock_policies sp ON sp.product_id = NEW.product_id AND sp.warehouse_id = NEW.warehouse_id
+    WHERE p.product_id = NEW.product_id;
     
     -- Check if the new stock is already below threshold
-    IF NEW.quantity <= threshold AND NEW.quantity > 0 THEN
+    IF NEW.quantity < threshold AND NEW.quantity > 0 THEN
         -- Create low stock alert
         INSERT INTO stock_alerts 
             (product_id, warehouse_id, current_quantity, threshold, alert_type)
@@ -576,13 +737,16 @@ FOR EACH ROW
 BEGIN
     DECLARE threshold INT;
     
-    -- Get the reorder level from the product
-    SELECT reorder_level INTO threshold 
-    FROM products 
-    WHERE product_id = NEW.product_id;
+    -- Same rule as EFFECTIVE_THRESHOLD in app/routers/alert.py: the stock policy's reorder
+    -- point, then the product's reorder level (0 means unset), then its category, else 5
+    SELECT COALESCE(sp.reorder_point, NULLIF(p.reorder_level, 0), ct.min_stock_threshold, ct.reorder_level, 5) INTO threshold 
+    FROM products p
+    LEFT JOIN category_thresholds ct ON ct.category_code = p.category_code
+    LEFT JOIN stock_policies sp ON sp.product_id = NEW.product_id AND sp.warehouse_id = NEW.warehouse_id
+    WHERE p.product_id = NEW.product_id;
     
     -- Check if stock has fallen below threshold
-    IF NEW.quantity <= threshold AND NEW.quantity > 0 AND (OLD.quantity > threshold OR OLD.quantity IS NULL) THEN
+    IF NEW.quantity < threshold AND NEW.quantity > 0 AND (OLD.quantity >= threshold OR OLD.quantity IS NULL) THEN
         -- Create low stock alert
         INSERT INTO stock_alerts 
             (product_id, warehouse_id, current_quantity, threshold, alert_type)
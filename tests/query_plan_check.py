@@ -0,0 +1,172 @@
+# tests/query_plan_check.py
+"""
+Regression check for the index plan. Calls the code that owns each hot query (the
+routers in app/routers and the jobs in app/utils) against a small in-memory SQLite
+database created from the models, records the SQL it sends, and runs EXPLAIN QUERY PLAN
+on the hot statement with the parameters it was sent. Fails if a statement reads its
+table without an index (a plain "SCAN <table>"), sorts in a temporary b-tree, or is no
+longer issued at all, so an edited query can't drift away from what is checked here.
+SQLite's planner doesn't depend on table statistics here, so the result only changes
+when a query or an index does.
+
+Not covered: the report procedures (sp_product_movement, sp_purchase_order_analysis)
+and views, which only exist on MySQL (see sqldb.sql).
+
+Run from the project root with `-m` so `app` is importable; no database or .env needed
+(DATABASE_URL defaults to an in-memory SQLite database):
+    python -m tests.query_plan_check
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+import app.models  # noqa: F401
+from app.models import alert, purchase_order, return_  # noqa: F401
+from app.models.product import Product
+from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem
+from app.models.stock import Stock
+from app.models.supplier import Supplier
+from app.models.warehouse import Warehouse
+from app.routers import alert as alert_router
+from app.routers import purchase_order as purchase_order_router
+from app.routers import transaction as transaction_router
+from app.utils import forecasting, replenishment, stock_ledger
+
+TODAY = date(2026, 7, 1)
+
+# name -> (call into the owning code, text that picks the hot statement out of what it sends)
+HOT_QUERIES = {
+    "alerts: list open, newest first": (
+        lambda db: alert_router.get_alerts(resolved=False, product_id=None, warehouse_id=None, db=db),
+        "FROM stock_alerts a",
+    ),
+    "alerts: existing open alert for a stock row": (
+        alert_router.check_stock_levels,
+        "FROM stock_alerts WHERE product_id = ?",
+    ),
+    "alerts: auto-resolve out of stock": (
+        alert_router.check_stock_levels,
+        "alert_type = 'out_of_stock' AND EXISTS",
+    ),
+    "alerts: auto-resolve low stock": (
+        alert_router.check_stock_levels,
+        "alert_type = 'low_stock' AND EXISTS",
+    ),
+    "alerts: stats by type": (
+        alert_router.get_alert_stats,
+        "as total_active",
+    ),
+    "purchase orders: list by status, newest first": (
+        lambda db: purchase_order_router.get_purchase_orders(limit=None, skip=0, supplier_id=None,
+                                                             status="pending", db=db),
+        "ORDER BY purchase_orders.order_date DESC",
+    ),
+    "purchase orders: items of a PO": (
+        lambda db: purchase_order_router.get_po_items(po_id=1, db=db),
+        "FROM purchase_order_items",
+    ),
+    "purchase orders: status history page": (
+        lambda db: purchase_order_router.get_po_history(po_id=1, limit=100, skip=0, db=db),
+        "FROM po_status_history h",
+    ),
+    "transactions: list newest first": (
+        transaction_router.list_transactions,
+        "FROM transactions",
+    ),
+    "forecasting: daily outbound window": (
+        lambda db: forecasting._daily_outbound(db, TODAY - timedelta(days=180), TODAY),
+        "FROM transactions",
+    ),
+    "replenishment: outbound velocity": (
+        lambda db: replenishment.build_plan(db),
+        "FROM transactions WHERE transaction_type = 'out'",
+    ),
+    "stock ledger: stock as of": (
+        lambda db: stock_ledger.stock_as_of(db, datetime.combine(TODAY, datetime.min.time())),
+        "FROM stock_ledger l",
+    ),
+}
+
+# name -> plan lines that are expected for that query
+ALLOWED = {
+    # The final sort is over one row per (product, warehouse), after the index reads
+    "stock ledger: stock as of": ("USE TEMP B-TREE FOR ORDER BY",),
+}
+
+def _problems(plan: list, allowed: tuple = ()) -> list:
+    """Plan lines showing a full table scan or a sort that no index provides"""
+    # Scans of subqueries the plan builds itself (CO-ROUTINE k, MATERIALIZE k) and of a
+    # SELECT without FROM (CONSTANT ROW) aren't table reads
+    derived = {"CONSTANT"} | {detail.split()[-1] for detail in plan if detail.split()[0] in ("CO-ROUTINE", "MATERIALIZE")}
+    problems = []
+    for detail in plan:
+        words = detail.split()
+        if detail in allowed:
+            continue
+        if words[:1] == ["SCAN"] and "INDEX" not in words and words[1] not in derived:
+            problems.append(detail)
+        if "TEMP B-TREE" in detail and "GROUP BY" not in detail:
+            problems.append(detail)
+    return problems
+
+def _seed(db) -> None:
+    """One row of everything the owning code needs to reach its hot statement"""
+    db.execute(insert(Warehouse), [{"warehouse_id": 1, "name": "Main"}])
+    db.execute(insert(Supplier), [{"supplier_id": 1, "name": "Acme"}])
+    db.execute(insert(Product), [
+        {"product_id": 1, "name": "Empty", "sku": "P-1"},
+        {"product_id": 2, "name": "Low", "sku": "P-2"},
+    ])
+    db.execute(insert(Stock), [
+        {"product_id": 1, "warehouse_id": 1, "quantity": 0},
+        {"product_id": 2, "warehouse_id": 1, "quantity": 1},
+    ])
+    db.execute(insert(PurchaseOrder), [{"po_id": 1, "supplier_id": 1, "status": "pending", "order_date": TODAY}])
+    db.execute(insert(PurchaseOrderItem), [
+        {"po_id": 1, "product_id": 1, "warehouse_id": 1, "quantity": 5, "unit_cost": 1}
+    ])
+    db.commit()
+
+def main() -> int:
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    _seed(db)
+
+    sent = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            sent.append((statement, parameters))
+
+    failures = 0
+    for name, (call, marker) in HOT_QUERIES.items():
+        sent.clear()
+        call(db)
+        db.rollback()
+        statements = [(sql, params) for sql, params in sent if marker in " ".join(sql.split())]
+
+        cursor = engine.raw_connection().cursor()
+        plan = []
+        for sql, params in statements:
+            plan += [row[-1] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        problems = _problems(plan, ALLOWED.get(name, ())) if statements else ["statement not issued"]
+        status = "FAIL" if problems else "ok"
+        print(f"{status:4}  {name}")
+        for detail in plan or problems:
+            print(f"        {detail}")
+        failures += bool(problems)
+
+    print(f"\n{len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} hot queries use an index")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# tests/snapshot_ordering_check.py
+"""
+Regression check for stock snapshots when ledger entries become visible out of id
+order, as they do on MySQL when a transaction that took an id commits after later ones.
+Replays that order on an in-memory SQLite database by inserting ids explicitly:
+
+- an entry whose id is still missing holds snapshots back to just below it;
+- once it shows up, the next run folds it, and the balances match the full ledger;
+- a gap older than STOCK_SNAPSHOT_SETTLE_SECONDS (a rolled-back insert) is passed over.
+
+On MySQL, gaps are instead held while information_schema.innodb_trx shows a transaction
+that could own them, which this check doesn't reach.
+
+Run from the project root (no database or .env needed):
+    python -m tests.snapshot_ordering_check
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.stock_ledger import StockLedger, StockSnapshot
+from app.utils.stock_ledger import STOCK_SNAPSHOT_SETTLE_SECONDS, stock_as_of, take_snapshots
+
+def entry(entry_id: int, delta: int, created_at: datetime) -> dict:
+    return {"entry_id": entry_id, "product_id": 1, "warehouse_id": 1, "delta": delta,
+            "source": "transaction", "created_at": created_at}
+
+def main() -> int:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[StockLedger.__table__, StockSnapshot.__table__])
+    db = sessionmaker(bind=engine)()
+
+    now = datetime.utcnow().replace(microsecond=0)
+    failures = 0
+
+    def check(name: str, ok: bool) -> None:
+        nonlocal failures
+        print(f"{'ok' if ok else 'FAIL':4}  {name}")
+        failures += not ok
+
+    def folded() -> int:
+        return db.query(func.coalesce(func.max(StockSnapshot.last_entry_id), 0)).scalar()
+
+    def balance() -> int:
+        rows = stock_as_of(db, now + timedelta(days=1))
+        return rows[0]["quantity"] if rows else 0
+
+    # Entry 3 took its id before 4 and 5 but is still uncommitted, while 4 has been
+    # visible for a while
+    old = now - timedelta(seconds=STOCK_SNAPSHOT_SETTLE_SECONDS + 60)
+    started = now - timedelta(seconds=STOCK_SNAPSHOT_SETTLE_SECONDS / 2)
+    db.execute(insert(StockLedger), [
+        entry(1, 100, old), entry(2, -10, old), entry(4, -5, started), entry(5, -1, now)
+    ])
+    db.commit()
+    take_snapshots(db)
+    check("snapshot stops below an entry that may still commit", folded() == 2)
+
+    # Entry 3 commits late, with the insert time it was given
+    db.execute(insert(StockLedger), [entry(3, -20, started)])
+    db.commit()
+    take_snapshots(db)
+    check("the late entry is folded by the next run", folded() == 5)
+    check("snapshot balance matches the ledger", balance() == 100 - 10 - 20 - 5 - 1)
+
+    # Entry 6 was rolled back long ago: its gap is passed over
+    db.execute(insert(StockLedger), [entry(7, 7, old)])
+    db.commit()
+    take_snapshots(db)
+    check("an old gap does not hold snapshots back", folded() == 7)
+    check("balance after passing the gap", balance() == 100 - 10 - 20 - 5 - 1 + 7)
+
+    snapshot_total = db.query(StockSnapshot.quantity).order_by(StockSnapshot.snapshot_id.desc()).first()[0]
+    ledger_total = db.query(func.sum(StockLedger.delta)).scalar()
+    check("latest snapshot equals the sum of the ledger", snapshot_total == ledger_total)
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())